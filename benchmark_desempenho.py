@@ -0,0 +1,671 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Benchmarks de desempenho do APOLO.
+
+Cada benchmark compara a implementação original com a otimizada sobre dados
+sintéticos e verifica que ambas produzem o mesmo resultado.
+
+Uso:
+    python benchmark_desempenho.py                 # executa todos
+    python benchmark_desempenho.py predict_clusters
+"""
+import contextlib
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from src.analysis.cluster_analyzer import ClusterAnalyzer
+from src.analysis.session_processor import SessionProcessor
+from src.analysis.signal_analyzer import SignalAnalyzer
+from src.analysis.spectral_tracker import SlidingSpectrumTracker
+from src.analysis.feature_extractor import MULTI_AXIS_SIGNALS
+from src.utils.session_file import SENSOR_COLUMNS
+
+FEATURE_COLUMNS = ["peak_freq", "tremor_power", "total_power", "tremor_index"]
+
+
+def _timeit(func: Callable, repeat: int = 3):
+    """Executa func 'repeat' vezes e retorna (melhor_tempo_s, último_resultado)."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _synthetic_features(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Gera um DataFrame de features com alguns grupos densos e ruído disperso."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0, 3, size=(3, len(FEATURE_COLUMNS)))
+    groups = rng.integers(0, len(centers), size=n_rows)
+    data = centers[groups] + rng.normal(0, 0.5, size=(n_rows, len(FEATURE_COLUMNS)))
+    noise = rng.random(n_rows) < 0.05
+    data[noise] = rng.uniform(-10, 10, size=(noise.sum(), len(FEATURE_COLUMNS)))
+    return pd.DataFrame(data, columns=FEATURE_COLUMNS)
+
+
+def _synthetic_session(n_samples: int, sample_rate: int = 100, seed: int = 0) -> pd.DataFrame:
+    """Gera uma sessão bruta com um tremor de 5 Hz intermitente sobre ruído."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples) / sample_rate
+    tremor_on = (np.sin(2 * np.pi * t / 120) > 0.5).astype(float)
+    accel_x = tremor_on * 0.8 * np.sin(2 * np.pi * 5.0 * t) + rng.normal(0, 0.3, n_samples)
+    return pd.DataFrame({"timestamp": t, "accel_x": accel_x})
+
+
+def _synthetic_imu_session(n_samples: int, sample_rate: int = 100, seed: int = 0) -> pd.DataFrame:
+    """Gera uma sessão com os seis eixos da IMU, cada um com ruído independente."""
+    rng = np.random.default_rng(seed)
+    session = _synthetic_session(n_samples, sample_rate, seed)
+    for column in SENSOR_COLUMNS[1:]:
+        session[column] = session["accel_x"] * rng.uniform(0.2, 1.0) + rng.normal(0, 0.3, n_samples)
+    return session
+
+
+def _quiet(func: Callable) -> Callable:
+    """Envolve func para descartar os prints de progresso."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return wrapper
+
+
+def bench_predict_clusters():
+    """Compara predict_clusters com o ciclo original e com a KD-tree."""
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    analyzer.fit(_synthetic_features(20_000, seed=1))
+
+    for n_windows in (1_000, 10_000):
+        session = _synthetic_features(n_windows, seed=2)
+        t_loop, labels_loop = _timeit(lambda: analyzer.predict_clusters(session, engine="loop"), repeat=1)
+        t_tree, labels_tree = _timeit(lambda: analyzer.predict_clusters(session, engine="kdtree"))
+        assert np.array_equal(labels_loop, labels_tree), "KD-tree diverge do ciclo original!"
+        print(f"  {n_windows:>6} janelas | loop: {t_loop:8.3f}s | kdtree: {t_tree:8.4f}s "
+              f"| speedup: {t_loop / t_tree:7.1f}x | rótulos idênticos")
+
+
+def bench_plot_decimation():
+    """Compara o tempo de desenho (PNG, como no st.pyplot) de plot_test_results com e sem decimação."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from src.utils.plotter import plot_test_results
+
+    sample_rate = 100
+    for minutes in (1, 10, 60):
+        n_samples = minutes * 60 * sample_rate
+        time_axis = np.arange(n_samples) / sample_rate
+        readings = _narrowband_tremor(n_samples, sample_rate, seed=minutes)
+        fft_results = SignalAnalyzer().find_tremor_frequency(readings, sample_rate)
+        line = f"  {minutes:>2} min ({n_samples:>6} amostras, {len(fft_results[0]):>6} bins)"
+        for name, max_points in (("completo", None), ("minmax", 2000)):
+            def render():
+                fig = plot_test_results(time_axis, readings, fft_results, "Repouso na Mão", max_points=max_points)
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format="png")
+                plt.close(fig)
+                return buffer.tell()
+            elapsed, size = _timeit(render, repeat=2)
+            line += f" | {name}: {elapsed * 1000:7.0f}ms, {size / 1e3:5.0f}KB"
+        print(line)
+
+
+def bench_score_batch():
+    """Compara a avaliação janela a janela (um dicionário por chamada) com score_batch sobre um array."""
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    _quiet(lambda: analyzer.fit(_synthetic_features(20_000, seed=1)))()
+    session = _synthetic_features(2_000, seed=2)
+    rows = session.to_dict("records")
+    values = session.to_numpy()
+
+    def one_row_dataframes():
+        # Caminho anterior de predict_is_anomalous: um DataFrame e uma comparação com todos os normais por janela
+        return np.array([np.min(np.linalg.norm(analyzer.normal_points - analyzer._transform(pd.DataFrame([row])),
+                                               axis=1)) > analyzer.eps for row in rows])
+    t_old, old = _timeit(one_row_dataframes, repeat=1)
+    t_single, single = _timeit(lambda: np.array([analyzer.predict_is_anomalous(row) for row in rows]), repeat=1)
+    t_frame, labels = _timeit(lambda: analyzer.predict_clusters(session))
+    t_batch, (distances, _) = _timeit(lambda: analyzer.score_batch(values))
+    same = np.array_equal(old, single) and np.array_equal(old, labels == -1) and np.array_equal(old, distances > analyzer.eps)
+    print(f"  {len(rows)} janelas | DataFrame por janela: {t_old * 1000:8.1f}ms | predict_is_anomalous por janela: "
+          f"{t_single * 1000:7.1f}ms | predict_clusters: {t_frame * 1000:5.1f}ms | score_batch (array): "
+          f"{t_batch * 1000:5.1f}ms ({t_old / t_batch:6.0f}x) | decisões iguais: {same}")
+
+
+def bench_episodes():
+    """Compara a contagem por cluster com list.count e um ciclo por janela com a segmentação por RLE."""
+    from src.analysis.episode_segmenter import segment_episodes, summarize_session
+
+    rng = np.random.default_rng(0)
+    for n_windows in (10_000, 200_000):
+        # Episódios de alguns segundos separados por períodos normais
+        labels = np.where(np.repeat(rng.random(n_windows // 10 + 1) < 0.2, 10)[:n_windows], -1,
+                          rng.integers(0, 3, n_windows))
+        features = pd.DataFrame({"peak_freq": rng.uniform(3, 12, n_windows), "tremor_power": rng.random(n_windows)})
+
+        def per_window():
+            counts = {cluster_id: list(labels).count(cluster_id) for cluster_id in sorted(np.unique(labels))}
+            episodes, current = [], None
+            peak, power = features["peak_freq"].to_numpy(), features["tremor_power"].to_numpy()
+            for i, label in enumerate(labels):
+                if label == -1:
+                    if current is None:
+                        current = [i, i, [], []]
+                    current[1] = i
+                    current[2].append(peak[i])
+                    current[3].append(power[i])
+                elif current is not None:
+                    episodes.append((current[0], current[1], np.mean(current[2]), max(current[3])))
+                    current = None
+            if current is not None:
+                episodes.append((current[0], current[1], np.mean(current[2]), max(current[3])))
+            return counts, episodes
+
+        def vectorized():
+            episodes = segment_episodes(labels, features)
+            return summarize_session(labels, episodes), episodes
+        t_loop, (counts, reference) = _timeit(per_window, repeat=1)
+        t_rle, (summary, episodes) = _timeit(vectorized)
+        same = (counts == summary["cluster_counts"] and len(reference) == len(episodes)
+                and np.allclose([episode[2] for episode in reference], episodes["mean_peak_freq"]))
+        print(f"  {n_windows:>7} janelas -> {len(episodes):>5} episódios | list.count + ciclo: {t_loop * 1000:8.1f}ms | "
+              f"RLE: {t_rle * 1000:6.1f}ms ({t_loop / t_rle:5.0f}x) | resultados iguais: {same}")
+
+
+def bench_session_processor():
+    """Compara a extração de features janela a janela com o modo em lote."""
+    for n_samples in (100_000, 1_000_000):
+        raw_df = _synthetic_session(n_samples)
+        loop = SessionProcessor(engine="loop")
+        batch = SessionProcessor(engine="batch")
+        t_loop, df_loop = _timeit(_quiet(lambda: loop.process_session_df(raw_df)), repeat=1)
+        t_batch, df_batch = _timeit(_quiet(lambda: batch.process_session_df(raw_df)))
+        assert np.allclose(df_loop.to_numpy(dtype=float), df_batch.to_numpy()), "Modo em lote diverge do ciclo!"
+        print(f"  {n_samples:>8} amostras | loop: {t_loop:7.3f}s | lote: {t_batch * 1000:8.1f}ms "
+              f"| speedup: {t_loop / t_batch:6.1f}x | {len(df_batch)} janelas iguais")
+
+
+def bench_multi_axis():
+    """Compara o custo das features multi-eixo (6 eixos + magnitudes) com o eixo X apenas."""
+    for n_samples in (100_000, 1_000_000):
+        raw_df = _synthetic_imu_session(n_samples)
+        single = SessionProcessor()
+        multi = SessionProcessor(multi_axis=True)
+        t_single, df_single = _timeit(_quiet(lambda: single.process_session_df(raw_df)))
+        t_multi, df_multi = _timeit(_quiet(lambda: multi.process_session_df(raw_df)))
+        same_x = [f"accel_x_{column}" for column in FEATURE_COLUMNS]
+        assert np.allclose(df_single.to_numpy(), df_multi[same_x].to_numpy()), "Eixo X diverge do modo de eixo único!"
+        n_signals = len(MULTI_AXIS_SIGNALS)
+        print(f"  {n_samples:>8} amostras | eixo X: {t_single * 1000:7.1f}ms | multi-eixo: {t_multi * 1000:7.1f}ms "
+              f"({t_multi / n_signals * 1000:6.1f}ms por sinal, {n_signals} sinais) | {df_multi.shape[1]} features")
+
+
+def _narrowband_tremor(n_samples: int, sample_rate: int = 100, seed: int = 0) -> np.ndarray:
+    """Tremor de 5 Hz com amplitude e fase aleatórias (ruído filtrado por um ressonador) sobre ruído branco."""
+    rng = np.random.default_rng(seed)
+    radius, theta = 0.995, 2 * np.pi * 5.0 / sample_rate
+    tremor = lfilter([1.0], [1.0, -2 * radius * np.cos(theta), radius ** 2], rng.normal(0, 1, n_samples))
+    return 0.8 * tremor / tremor.std() + rng.normal(0, 0.3, n_samples)
+
+
+def bench_welch():
+    """Compara custo e variância da FFT única com o estimador de Welch em gravações longas."""
+    n_realizations = 20
+    for n_samples in (60_000, 1_000_000):
+        sessions = [_narrowband_tremor(n_samples, seed=seed) for seed in range(n_realizations)]
+        for method in ("fft", "welch"):
+            t_method, _ = _timeit(lambda: SignalAnalyzer.find_tremor_frequency(sessions[0], 100, method=method))
+            peaks, indices = [], []
+            for signal in sessions:
+                xf, yf, peak_freq, _ = SignalAnalyzer.find_tremor_frequency(signal, 100, method=method)
+                band = (xf >= 4.0) & (xf <= 8.0)
+                peaks.append(peak_freq)
+                indices.append(np.sum(yf[band]) / np.sum(yf))
+            # Dispersão entre realizações do mesmo processo
+            print(f"  {n_samples:>8} amostras | {method:>5}: {t_method * 1000:7.1f}ms | {len(xf):>6} bins "
+                  f"| desvio da freq. de pico: {np.std(peaks):5.3f} Hz "
+                  f"| CV índice de tremor: {np.std(indices) / np.mean(indices):6.2%}")
+
+
+def bench_sliding_tracker():
+    """Compara uma FFT por janela com a DFT deslizante, com overlap de 50% e com passo de uma amostra."""
+    for n_samples, overlap in ((1_000_000, 0.5), (100_000, 0.995)):
+        raw_df = _synthetic_session(n_samples)
+        batch = SessionProcessor(engine="batch", spectral_method="welch", overlap=overlap)
+        sliding = SessionProcessor(engine="sliding", overlap=overlap)
+        t_batch, _ = _timeit(_quiet(lambda: batch.process_session_df(raw_df)))
+        t_sliding, df_sliding = _timeit(_quiet(lambda: sliding.process_session_df(raw_df)))
+
+        # Referência exata: Welch com um único segmento retangular do tamanho da janela
+        windows = batch.window_view(raw_df["accel_x"].to_numpy(), 0, len(df_sliding))
+        reference = SignalAnalyzer.find_tremor_features_batch(windows, 100, method="welch", window="boxcar")
+        max_error = max(np.max(np.abs(df_sliding[name].to_numpy() - reference[name])) for name in FEATURE_COLUMNS)
+        print(f"  {n_samples:>8} amostras, passo {sliding.step:>3} | FFT por janela: {t_batch * 1000:7.1f}ms "
+              f"| deslizante: {t_sliding * 1000:7.1f}ms | speedup: {t_batch / t_sliding:5.1f}x "
+              f"| {len(df_sliding)} janelas, erro máx. {max_error:.1e}")
+
+    # Captura ao vivo: blocos de 10 amostras (100 ms a 100 Hz), features atualizadas a cada amostra
+    signal = _synthetic_session(60_000)["accel_x"].to_numpy()
+    tracker = SlidingSpectrumTracker(200, 100)
+    start = time.perf_counter()
+    for i in range(0, len(signal), 10):
+        tracker.push(signal[i:i + 10])
+    per_sample_us = (time.perf_counter() - start) / len(signal) * 1e6
+    print(f"  ao vivo, blocos de 10 amostras | {per_sample_us:5.2f}µs por amostra ({len(tracker.bins)} bins)")
+
+
+def _run_measured(setup: str, statement: str):
+    """
+    Executa 'statement' num processo Python novo, depois de 'setup', e
+    retorna (tempo em s, aumento do pico de memória residente em bytes). A
+    memória é medida no processo (ru_maxrss) porque as alocações feitas em
+    Cython/C não passam pelo tracemalloc.
+    """
+    code = (f"import resource, time\n{setup}\n"
+            f"before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            f"start = time.perf_counter()\n{statement}\n"
+            f"elapsed = time.perf_counter() - start\n"
+            f"print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)")
+    root = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                            stdout=subprocess.PIPE, text=True).stdout.split()
+    return float(output[-2]), int(output[-1]) * 1024   # ru_maxrss em KB (Linux)
+
+
+def bench_prediction_memory():
+    """Compara os motores kdtree e gemm (tempo e pico de memória) com poucas e com muitas features."""
+    from src.analysis.model_artifact import ModelArtifact, MODEL_ARTIFACT_VERSION, save_model_artifact
+
+    n_normal, n_windows = 50_000, 20_000
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        for n_features in (4, 42):   # Eixo X apenas / multi-eixo
+            # Modelo sintético: grupos densos já normalizados, eps à escala da distância entre vizinhos
+            centers = rng.normal(0, 3, size=(5, n_features))
+            normal = centers[rng.integers(0, 5, n_normal)] + rng.normal(0, 0.5, (n_normal, n_features))
+            eps = 0.5 * np.sqrt(n_features) * 0.6
+            model_path = os.path.join(directory, f"modelo_{n_features}.npz")
+            save_model_artifact(model_path, ModelArtifact(
+                version=MODEL_ARTIFACT_VERSION, eps=eps, min_samples=8,
+                feature_columns=[f"f{i}" for i in range(n_features)],
+                scaler_mean=np.zeros(n_features), scaler_scale=np.ones(n_features), normal_points=normal))
+            windows = centers[rng.integers(0, 5, n_windows)] + rng.normal(0, 0.7, (n_windows, n_features))
+            windows_path = os.path.join(directory, f"janelas_{n_features}.npy")
+            np.save(windows_path, windows)
+
+            setup = (f"import numpy as np\nfrom src.analysis.cluster_analyzer import ClusterAnalyzer\n"
+                     f"analyzer = ClusterAnalyzer.load_model({model_path!r})\n"
+                     f"windows = np.load({windows_path!r})")
+            broadcast_gb = n_windows * n_normal * n_features * 8 / 1e9
+            line = f"  {n_features:>2} features, {n_normal} normais, {n_windows} janelas (subtração direta: {broadcast_gb:5.1f}GB)"
+            distances = {}
+            for engine in ("kdtree", "gemm"):
+                elapsed, peak = _run_measured(setup, f"d, _ = analyzer.score_batch(windows, engine={engine!r})\n"
+                                                     f"np.save({windows_path!r} + '.{engine}.npy', d)")
+                distances[engine] = np.load(f"{windows_path}.{engine}.npy")
+                line += f" | {engine}: {elapsed:6.2f}s, +{peak / 1e6:5.0f}MB"
+            same_labels = np.array_equal(distances["kdtree"] <= eps, distances["gemm"] <= eps)
+            # As duas árvores de soma diferem no último bit; o vizinho escolhido é o mesmo
+            same_distances = np.allclose(distances["kdtree"], distances["gemm"], rtol=1e-12, atol=0)
+            print(line + f" | rótulos iguais: {same_labels} | distâncias iguais: {same_distances}")
+
+
+def bench_dbscan_training():
+    """Compara o DBSCAN do scikit-learn com o DBSCAN por blocos (tempo, pico de memória e rótulos)."""
+    with tempfile.TemporaryDirectory() as directory:
+        for n_rows, run_sklearn in ((10_000, True), (30_000, True), (100_000, False)):
+            data_path = os.path.join(directory, "dados.npy")
+            np.save(data_path, ClusterAnalyzer._scale_features(_synthetic_features(n_rows, seed=1)))
+            # Os imports ficam fora da medição
+            setup = (f"import numpy as np\nfrom sklearn.cluster import DBSCAN\nfrom sklearn.neighbors import KDTree\n"
+                     f"from src.analysis.chunked_dbscan import chunked_dbscan\ndata = np.load({data_path!r})")
+            runs = {
+                "blocos": "labels = chunked_dbscan(data, 0.5, 8)",
+                "blocos+grelha": "labels = chunked_dbscan(data, 0.5, 8, grid=True)",
+            }
+            if run_sklearn:
+                runs = {"sklearn": "labels = DBSCAN(eps=0.5, min_samples=8).fit_predict(data)", **runs}
+
+            line, reference = f"  {n_rows:>7} janelas", None
+            for name, statement in runs.items():
+                labels_path = os.path.join(directory, f"{name}.npy")
+                elapsed, peak = _run_measured(setup, f"{statement}\nnp.save({labels_path!r}, labels)")
+                labels = np.load(labels_path)
+                if reference is None:
+                    reference = labels
+                assert np.array_equal(reference, labels), f"{name} diverge do scikit-learn!"
+                line += f" | {name}: {elapsed:6.2f}s, +{peak / 1e6:6.0f}MB"
+            print(line + (" | rótulos idênticos" if run_sklearn else " | rótulos idênticos entre blocos e grelha "
+                                                                   "(sklearn omitido: vizinhanças não cabem em RAM)"))
+
+
+def bench_normal_set_compression():
+    """Compara o modelo com todos os pontos normais com as compressões 'core' e 'net' (tamanho, predição e concordância)."""
+    baseline = _synthetic_features(50_000, seed=1)
+    rng = np.random.default_rng(3)
+    sessions = {
+        # Mesma distribuição do treino, com ruído: o caso típico
+        "sessão semelhante": baseline.sample(20_000, random_state=3) + rng.normal(0, 0.05, (20_000, len(FEATURE_COLUMNS))),
+        # Grupos noutras posições: muitas janelas na orla da normalidade
+        "sessão deslocada": _synthetic_features(20_000, seed=2),
+    }
+
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    reference = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for compression in (None, "core", "net"):
+            _quiet(lambda: analyzer.fit(baseline, compression=compression))()
+            model_path = os.path.join(directory, f"{compression}.npz")
+            _quiet(lambda: analyzer.save_model(model_path))()
+            line = (f"  {compression or 'completo':>8}: {len(analyzer._trained_data):>6} pontos, "
+                    f"{os.path.getsize(model_path) / 1e6:5.2f}MB")
+            for name, session in sessions.items():
+                t_predict, labels = _timeit(lambda: analyzer.predict_clusters(session))
+                reference.setdefault(name, (t_predict, labels))
+                t_full, labels_full = reference[name]
+                hidden = np.sum((labels == 0) & (labels_full == -1))
+                line += (f" | {name}: {t_predict * 1000:6.1f}ms ({t_full / t_predict:4.1f}x), "
+                         f"concordância {np.mean(labels == labels_full):7.2%}, anomalias escondidas {hidden}")
+            print(line)
+
+
+def bench_parameter_search():
+    """Compara o varrimento de (eps, min_samples) a partir de uma consulta com um DBSCAN por combinação."""
+    from sklearn.cluster import DBSCAN
+    from src.analysis import parameter_search
+
+    for n_rows in (5_000, 20_000):
+        baseline = _synthetic_features(n_rows, seed=1)
+        t_knee, eps = _timeit(lambda: parameter_search.suggest_eps(baseline, 8), repeat=1)
+        eps_values, min_samples_values = parameter_search.eps_grid(eps), (4, 8, 16)
+        t_sweep, sweep = _timeit(lambda: parameter_search.sweep_dbscan_parameters(baseline, eps_values,
+                                                                                  min_samples_values), repeat=1)
+
+        def refit_all():
+            scaled = ClusterAnalyzer._scale_features(baseline)
+            return [DBSCAN(eps=row.eps, min_samples=row.min_samples).fit_predict(scaled)
+                    for row in sweep.itertuples()]
+        t_refit, all_labels = _timeit(refit_all, repeat=1)
+        same = all(row.n_clusters == labels.max() + 1 and row.n_noise == np.sum(labels == -1)
+                   for row, labels in zip(sweep.itertuples(), all_labels))
+        print(f"  {n_rows:>6} janelas | eps sugerido (k=8): {eps:.3f} em {t_knee:5.2f}s | {len(sweep)} combinações: "
+              f"varrimento {t_sweep:5.2f}s vs um DBSCAN por combinação {t_refit:6.2f}s "
+              f"({t_refit / t_sweep:4.1f}x) | clusters e ruído iguais: {same}")
+
+
+def bench_projection():
+    """Compara o t-SNE sobre todas as janelas com o t-SNE sobre uma amostra estratificada com interpolação."""
+    from sklearn.manifold import trustworthiness
+    from config import PROJECTION_MAX_POINTS
+
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    _quiet(lambda: analyzer.fit(_synthetic_features(20_000, seed=1)))()
+    for n_rows, run_full in ((6_000, True), (20_000, False), (60_000, False)):
+        session = _synthetic_features(n_rows, seed=1)   # Mesmos grupos do treino, ~5% de anomalias
+        labels = analyzer.predict_clusters(session)
+        sample = ClusterAnalyzer._stratified_sample(labels, PROJECTION_MAX_POINTS)
+        anomalies_kept = np.isin(np.flatnonzero(labels == -1), sample).all()
+
+        # Qualidade medida num subconjunto fixo (a confiança é O(n²) em memória)
+        check = np.random.default_rng(0).choice(n_rows, size=2_000, replace=False)
+        scaled = ClusterAnalyzer._scale_features(session)[check]
+        results = []
+        if run_full:
+            results.append(("exato", *_timeit(lambda: ClusterAnalyzer.reduce_dimensions_tsne(session, max_points=None), repeat=1)))
+        results.append(("amostrado", *_timeit(lambda: ClusterAnalyzer.reduce_dimensions_tsne(session, labels=labels), repeat=1)))
+        for name, elapsed, embedding in results:
+            print(f"  {n_rows:>6} janelas | t-SNE {name:>9}: {elapsed:6.1f}s | confiança (k=10): "
+                  f"{trustworthiness(scaled, embedding[check], n_neighbors=10):.3f}"
+                  + (f" | {len(sample)} embebidas, todas as {np.sum(labels == -1)} anomalias incluídas: {anomalies_kept}"
+                     if name == "amostrado" else ""))
+
+    # Sessão quase toda anómala: a amostra continua limitada a max_points e
+    # as janelas fora dela continuam a ser interpoladas
+    labels = np.where(np.arange(400) < 300, -1, 0)
+    session = _synthetic_features(400, seed=3)
+    sample = ClusterAnalyzer._stratified_sample(labels, 200)
+    embedding = ClusterAnalyzer.reduce_dimensions_tsne(session, labels=labels, max_points=200)
+    assert len(sample) <= 200 and embedding.shape == (400, 2) and np.isfinite(embedding).all()
+    print(f"  {len(labels):>6} janelas, {np.sum(labels == -1)} anomalias | amostra de {len(sample)} "
+          f"({np.isin(sample, np.flatnonzero(labels == -1)).sum()} anomalias) | projeção completa: OK")
+
+
+def bench_model_registry():
+    """Compara carregar o modelo do paciente a cada pedido com o ModelRegistry (LRU) num servidor com vários pacientes."""
+    from src.analysis.model_registry import ModelRegistry
+
+    n_patients, n_requests = 20, 1_000
+    window = _synthetic_features(1, seed=2)
+    # Poucos pacientes concentram a maior parte dos pedidos (distribuição de Zipf)
+    rng = np.random.default_rng(0)
+    weights = 1.0 / np.arange(1, n_patients + 1)
+    requests = [f"paciente{i:02d}" for i in rng.choice(n_patients, size=n_requests, p=weights / weights.sum())]
+    with tempfile.TemporaryDirectory() as directory:
+        trainer = ModelRegistry(directory)
+        for i in range(n_patients):
+            analyzer = ClusterAnalyzer.new_instance(eps=0.5, min_samples=8)
+            _quiet(lambda: analyzer.fit(_synthetic_features(10_000, seed=1)))()
+            _quiet(lambda: trainer.save(f"paciente{i:02d}", analyzer))()
+
+        def per_request():
+            for patient_id in requests:
+                ClusterAnalyzer.load_model(trainer.model_path(patient_id), shared=False).predict_clusters(window)
+        t_load, _ = _timeit(_quiet(per_request), repeat=1)
+        print(f"  {n_requests} pedidos de {n_patients} pacientes | carregar a cada pedido: "
+              f"{t_load / n_requests * 1000:6.2f}ms/pedido")
+        for max_models in (4, 8, 20):
+            registry = ModelRegistry(directory, max_models=max_models)
+
+            def served():
+                for patient_id in requests:
+                    registry.get(patient_id).predict_clusters(window)
+            t_registry, _ = _timeit(_quiet(served), repeat=1)
+            stats = registry.stats()
+            print(f"  ModelRegistry(max_models={max_models:>2}): {t_registry / n_requests * 1000:6.2f}ms/pedido "
+                  f"({t_load / t_registry:5.1f}x) | acertos {stats['hits'] / n_requests:6.1%}, "
+                  f"descartados {stats['evictions']}")
+
+
+def _cold_start(code: str, repeat: int = 3) -> float:
+    """Melhor tempo de um processo Python novo a executar 'code' a partir da raiz do projeto."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    return _timeit(lambda: subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL), repeat=repeat)[0]
+
+
+def bench_capture_buffer():
+    """
+    Lê o buffer circular da captura sem locks enquanto uma thread escreve,
+    verificando que nenhuma linha substituída (ou a meio de ser escrita) é
+    devolvida.
+    """
+    import threading
+    from src.hardware.capture_buffer import SampleRingBuffer, IMU_AXES
+
+    # Escrita interrompida a meio: a linha mais antiga já foi reescrita mas o
+    # novo total ainda não foi publicado
+    capacity = 8
+    buffer = SampleRingBuffer(capacity)
+    for i in range(capacity):
+        buffer.append(i, (float(i),) * len(IMU_AXES))
+    buffer._timestamps_ns[buffer.total_written % capacity] = capacity
+    timestamps_ns, values, cursor, lost = buffer.read_since(0)
+    in_flight_dropped = timestamps_ns.tolist() == list(range(1, capacity)) and lost == 1 and cursor == capacity
+    print(f"  escrita em curso na linha mais antiga | descartada pelo leitor: {in_flight_dropped}")
+
+    # Produtor e leitor em simultâneo; cada linha tem o valor do seu timestamp
+    n_samples, capacity = 2_000_000, 1_000
+    buffer = SampleRingBuffer(capacity)
+
+    def produce():
+        for i in range(n_samples):
+            buffer.append(i, (float(i),) * len(IMU_AXES))
+
+    producer = threading.Thread(target=produce)
+    cursor, read, lost, torn, reads = 0, 0, 0, 0, 0
+    start = time.perf_counter()
+    producer.start()
+    while producer.is_alive() or cursor < buffer.total_written:
+        timestamps_ns, values, new_cursor, new_lost = buffer.read_since(cursor)
+        expected = np.arange(cursor + new_lost, new_cursor)
+        torn += int(np.sum(timestamps_ns != expected)) + int(np.sum(values != expected[:, None]))
+        read, lost, cursor, reads = read + len(timestamps_ns), lost + new_lost, new_cursor, reads + 1
+    producer.join()
+    elapsed = time.perf_counter() - start
+    print(f"  {n_samples} amostras, buffer de {capacity} | {reads} leituras em {elapsed:.2f}s | "
+          f"lidas {read}, perdidas {lost} (total {read + lost == n_samples}) | linhas inconsistentes: {torn}")
+
+
+def bench_model_load():
+    """Compara o modelo gravado com joblib com o formato compacto .npz (tamanho, carga e arranque a frio)."""
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    _quiet(lambda: analyzer.fit(_synthetic_features(50_000, seed=1)))()
+    session = _synthetic_features(2_000, seed=2)
+    labels = analyzer.predict_clusters(session)
+
+    with tempfile.TemporaryDirectory() as directory:
+        joblib_path = os.path.join(directory, "modelo.joblib")
+        npz_path = os.path.join(directory, "modelo.npz")
+        _quiet(lambda: analyzer.save_model(joblib_path))()
+        _quiet(lambda: analyzer.save_model(npz_path))()
+
+        t_joblib, _ = _timeit(_quiet(lambda: ClusterAnalyzer.load_model(joblib_path)))
+        t_npz, loaded = _timeit(_quiet(lambda: ClusterAnalyzer.load_model(npz_path)))
+        assert np.array_equal(loaded.predict_clusters(session), labels), "Modelo compacto diverge do original!"
+
+        cold_base = _cold_start("pass")
+        cold_joblib = _cold_start(f"import joblib; joblib.load({joblib_path!r})")
+        cold_npz = _cold_start(f"from src.analysis.model_artifact import load_model_artifact; "
+                               f"load_model_artifact({npz_path!r})")
+        print(f"  {len(analyzer._trained_data)} pontos normais | joblib: {os.path.getsize(joblib_path) / 1e6:5.2f}MB, "
+              f"carga {t_joblib * 1000:6.1f}ms | npz: {os.path.getsize(npz_path) / 1e6:5.2f}MB, "
+              f"carga {t_npz * 1000:6.2f}ms (mapeado) | rótulos idênticos")
+        print(f"  arranque a frio (processo novo, {cold_base * 1000:.0f}ms só do Python) | "
+              f"joblib: {cold_joblib * 1000:6.0f}ms | npz (só NumPy): {cold_npz * 1000:6.0f}ms")
+
+        # Carga mais a primeira predição de uma janela, como na monitorização
+        window = session.to_numpy()[:1].tolist()
+        first_predict = (f"from src.analysis.cluster_analyzer import ClusterAnalyzer; "
+                         f"ClusterAnalyzer.load_model({npz_path!r}).score_batch({window!r}{{engine}})")
+        cold_kdtree = _cold_start(first_predict.format(engine=", engine='kdtree'"))
+        cold_default = _cold_start(first_predict.format(engine=""))
+        default_engine = "sklearn" in _import_profile(first_predict.format(engine=""), repeat=1)[2]
+        print(f"  carga + 1.ª predição a frio | npz + kdtree (importa o scikit-learn): {cold_kdtree * 1000:6.0f}ms | "
+              f"npz + motor por omissão (gemm, só NumPy): {cold_default * 1000:6.0f}ms"
+              f"{' | AVISO: o scikit-learn foi importado' if default_engine else ''}")
+
+
+# Dependências pesadas que só devem ser importadas pelas funcionalidades que as usam
+HEAVY_MODULES = ("sklearn", "matplotlib", "scipy.signal", "umap", "joblib", "pydualsense", "streamlit")
+
+
+def _import_profile(code: str, repeat: int = 3):
+    """
+    Executa 'code' em processos Python novos com -X importtime.
+
+    Returns:
+        tuple: (melhor tempo total em s, tempo de importação em s por pacote
+        de topo, somando os seus módulos, conjunto de módulos importados)
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    best, stderr = float("inf"), ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=root, check=True,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        best = min(best, time.perf_counter() - start)
+        stderr = result.stderr
+
+    packages: Dict[str, float] = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, _, name = line.split("|")
+        module = name.strip()
+        modules.add(module)
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_time.split(":")[1]) / 1e6
+    return best, packages, modules
+
+
+def bench_startup():
+    """Mede o arranque a frio (python -X importtime) dos pontos de entrada e de uma predição pura."""
+    analyzer = ClusterAnalyzer(eps=0.5, min_samples=8)
+    _quiet(lambda: analyzer.fit(_synthetic_features(5_000, seed=1)))()
+
+    with tempfile.TemporaryDirectory() as directory:
+        model_path = os.path.join(directory, "modelo.npz")
+        features_path = os.path.join(directory, "features.csv")
+        _quiet(lambda: analyzer.save_model(model_path))()
+        _synthetic_features(500, seed=2).to_csv(features_path, index=False)
+
+        targets = {
+            "main.py": "import main",
+            "streamlit_ui.py": "import src.app.streamlit_ui",
+            "treinar_modelo_local.py": "import treinar_modelo_local",
+            "predição (.npz)": (f"import pandas as pd; from src.analysis.cluster_analyzer import ClusterAnalyzer; "
+                                f"ClusterAnalyzer.load_model({model_path!r}).predict_clusters(pd.read_csv({features_path!r}))"),
+        }
+        baseline, _, _ = _import_profile("pass")
+        print(f"  (processo Python vazio: {baseline * 1000:.0f}ms)")
+        for name, code in targets.items():
+            if name == "streamlit_ui.py" and importlib.util.find_spec("streamlit") is None:
+                print(f"  {name:<24} ignorado (streamlit não instalado)")
+                continue
+            elapsed, packages, modules = _import_profile(code)
+            heaviest = sorted(packages.items(), key=lambda item: -item[1])[:4]
+            loaded = [heavy for heavy in HEAVY_MODULES if heavy in modules]
+            print(f"  {name:<24} {elapsed * 1000:6.0f}ms | mais pesados: "
+                  f"{', '.join(f'{package} {seconds * 1000:.0f}ms' for package, seconds in heaviest)} | "
+                  f"pesados carregados: {', '.join(loaded) or 'nenhum'}")
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "predict_clusters": bench_predict_clusters,
+    "score_batch": bench_score_batch,
+    "session_processor": bench_session_processor,
+    "episodes": bench_episodes,
+    "plot_decimation": bench_plot_decimation,
+    "multi_axis": bench_multi_axis,
+    "welch": bench_welch,
+    "sliding_tracker": bench_sliding_tracker,
+    "capture_buffer": bench_capture_buffer,
+    "model_load": bench_model_load,
+    "projection": bench_projection,
+    "prediction_memory": bench_prediction_memory,
+    "dbscan_training": bench_dbscan_training,
+    "normal_set_compression": bench_normal_set_compression,
+    "parameter_search": bench_parameter_search,
+    "model_registry": bench_model_registry,
+    "startup": bench_startup,
+}
+
+
+def main():
+    selected = sys.argv[1:] or list(BENCHMARKS)
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"Benchmark desconhecido: '{name}'. Opções: {', '.join(BENCHMARKS)}")
+            continue
+        print(f"\n=== {name} ===")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
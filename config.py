@@ -21,6 +21,52 @@ DBSCAN_EPS = 1.5
 # Para 7 features: 2 × 7 = 14
 DBSCAN_MIN_SAMPLES = 2  # Multiplicador (será multiplicado por num_features)
 
+# Motor usado em ClusterAnalyzer.predict_clusters:
+# "kdtree" (índice espacial construído no fit), "gemm" (distâncias por blocos
+# em float32 com BLAS, compensa com muitas features, ex: multi-eixo) ou
+# "loop" (comparação ponto a ponto)
+PREDICTION_ENGINE = "kdtree"
+
+# Memória máxima dos blocos de distâncias do motor "gemm", em MB
+PREDICTION_MEMORY_BUDGET_MB = 64
+
+# Com PREDICTION_ENGINE = "kdtree", lotes até este número de janelas num modelo
+# ainda sem KD-tree (ex: .npz acabado de carregar, monitorização janela a
+# janela) usam o motor "gemm", só com NumPy: a primeira predição não importa o
+# scikit-learn nem constrói o índice (~1,5 s a frio)
+PREDICTION_NUMPY_MAX_WINDOWS = 256
+
+# Implementação do DBSCAN no treino (ClusterAnalyzer.fit):
+# "sklearn" (DBSCAN do scikit-learn, guarda todas as vizinhanças em memória) ou
+# "chunked" (por blocos, com memória limitada; ver src/analysis/chunked_dbscan.py)
+DBSCAN_TRAINING_ENGINE = "sklearn"
+
+# Pares vizinhos acumulados em memória pelo motor "chunked" antes de cada
+# fusão de componentes (~32 bytes por par: 2 000 000 ≈ 64 MB)
+DBSCAN_CHUNK_PAIRS = 2_000_000
+
+# Pré-divisão em células de lado eps/√d no motor "chunked"
+DBSCAN_GRID_BUCKETING = False
+
+# Compressão dos pontos normais guardados no modelo (ClusterAnalyzer.fit e
+# treinar_modelo_local.py): None (todos), "core" (só os core points) ou "net"
+# (rede de cobertura). A compressão pode marcar como anómalas algumas janelas
+# na orla da normalidade (0,16% numa sessão desviada no benchmark
+# normal_set_compression), nunca o contrário.
+NORMAL_SET_COMPRESSION = None
+
+# Raio da rede de cobertura "net", como fração de eps
+NORMAL_SET_NET_FRACTION = 0.5
+
+# Escolha automática do eps (src/analysis/parameter_search.py):
+# maior k do gráfico K-Distance, calculado uma vez para todos os k ≤ K_MAX
+PARAM_SEARCH_K_MAX = 20
+
+# Grelha do varrimento de (eps, min_samples): PARAM_SWEEP_EPS_VALUES valores
+# de eps entre (1 - SPREAD) e (1 + SPREAD) vezes o eps sugerido
+PARAM_SWEEP_EPS_VALUES = 7
+PARAM_SWEEP_EPS_SPREAD = 0.5
+
 # ============================================================================
 # ANÁLISE DE TREMOR - FAIXAS DE FREQUÊNCIA
 # ============================================================================
@@ -31,16 +77,43 @@ TREMOR_FREQ_MIN = 4.0
 # Frequência máxima característica de tremor de repouso (Parkinson) em Hz
 TREMOR_FREQ_MAX = 8.0
 
+# Estimador espectral das features de tremor:
+# "fft" (uma FFT sobre todo o sinal) ou "welch" (média de FFTs curtas com janela,
+# mais estável em gravações longas). As escalas das features diferem, por isso o
+# estimador do treino é guardado com o modelo (ClusterAnalyzer.feature_params) e
+# usado ao avaliar novas sessões, independentemente deste valor.
+SPECTRAL_METHOD = "fft"
+
+# Duração de cada segmento do método de Welch em segundos (resolução = 1/duração Hz)
+WELCH_SEGMENT_SEC = 2.0
+
+# Janela aplicada a cada segmento (nome de janela do scipy.signal)
+WELCH_WINDOW = "hann"
+
+# Sobreposição entre segmentos consecutivos (0.5 = 50%)
+WELCH_OVERLAP = 0.5
+
 # ============================================================================
 # PROCESSAMENTO DE SINAIS
 # ============================================================================
 
-# Taxa de amostragem alvo em Hz (controlada por time.sleep(0.01) = 10ms)
+# Taxa de amostragem alvo em Hz: as capturas do controle são reamostradas
+# para uma grelha uniforme a esta taxa antes da FFT
 TARGET_SAMPLE_RATE = 100
 
 # Intervalo de polling em segundos (time.sleep)
 POLLING_INTERVAL_SEC = 0.01
 
+# ============================================================================
+# CAPTURA DE SENSORES
+# ============================================================================
+
+# Taxa máxima de relatórios HID esperada do controle em Hz (dimensiona o buffer circular)
+CAPTURE_MAX_RATE_HZ = 1000
+
+# Duração em segundos que o buffer circular de captura consegue reter
+CAPTURE_BUFFER_SECONDS = 60
+
 # ============================================================================
 # SEGMENTAÇÃO EM JANELAS
 # ============================================================================
@@ -51,6 +124,9 @@ WINDOW_SIZE_SEC = 1.0
 # Taxa de overlap das janelas (0.5 = 50%)
 WINDOW_OVERLAP = 0.5
 
+# Número de linhas lidas por bloco ao processar CSVs de sessão em streaming
+CSV_CHUNK_SIZE = 100_000
+
 # ============================================================================
 # TESTES E COLETA
 # ============================================================================
@@ -61,6 +137,64 @@ TEST_DURATION_SEC = 10
 # Duração recomendada para treino (múltiplas sessões de TEST_DURATION_SEC)
 RECOMMENDED_TRAINING_DURATION_MIN = 15
 
+# ============================================================================
+# MONITORIZAÇÃO CONTÍNUA
+# ============================================================================
+
+# Janela de análise da monitorização contínua em segundos
+MONITOR_WINDOW_SEC = 2.0
+
+# Overlap entre janelas consecutivas da monitorização (0.5 = 50%)
+MONITOR_OVERLAP = 0.5
+
+# Intervalo de atualização da linha temporal na interface em segundos
+MONITOR_REFRESH_SEC = 0.5
+
+# Intervalo com que a thread de monitorização lê as novas amostras em segundos
+MONITOR_POLL_SEC = 0.1
+
+# Número máximo de janelas mantidas na linha temporal (600 × 1 s = 10 min)
+MONITOR_TIMELINE_MAX_WINDOWS = 600
+
+# ============================================================================
+# VISUALIZAÇÃO
+# ============================================================================
+
+# Número máximo de projeções 2D (PCA/t-SNE/UMAP) guardadas em cache pela interface
+PROJECTION_CACHE_MAX_ENTRIES = 8
+
+# Acima deste número de janelas, o t-SNE e o UMAP embebem apenas uma amostra
+# estratificada (com as anomalias até metade da amostra) e as restantes janelas
+# são posicionadas pelos vizinhos mais próximos da amostra
+PROJECTION_MAX_POINTS = 3000
+
+# Vizinhos normais do treino usados para posicionar uma nova janela na
+# projeção UMAP guardada com o modelo
+PROJECTION_NEIGHBORS = 10
+
+# Pontos desenhados por curva nos gráficos de sinal (src/utils/plotter.py):
+# sinais mais longos são decimados para a visualização, ~2 pontos por pixel
+PLOT_MAX_POINTS = 2000
+
+# Decimação dos gráficos: "minmax" (mínimo e máximo de cada grupo de amostras,
+# preserva os picos) ou "lttb" (Largest-Triangle-Three-Buckets)
+PLOT_DECIMATION = "minmax"
+
+# Frequência máxima mostrada no gráfico do espectro (Hz)
+SPECTRUM_MAX_FREQ_HZ = 20
+
+# ============================================================================
+# EPISÓDIOS DE TREMOR (src/analysis/episode_segmenter.py)
+# ============================================================================
+
+# Episódios com menos janelas anómalas são descartados (as falhas preenchidas
+# por EPISODE_MAX_GAP_WINDOWS não contam)
+EPISODE_MIN_WINDOWS = 1
+
+# Falhas de até este número de janelas normais entre duas anomalias não
+# separam o episódio (0: qualquer janela normal termina o episódio)
+EPISODE_MAX_GAP_WINDOWS = 0
+
 # ============================================================================
 # CAMINHOS DE ARQUIVOS
 # ============================================================================
@@ -68,8 +202,23 @@ RECOMMENDED_TRAINING_DURATION_MIN = 15
 # Caminho do dataset de treino
 DATASET_PATH = "gameplay_session.csv"
 
-# Caminho do modelo treinado
-MODEL_PATH = "analyzer_model.joblib"
+# Caminho do modelo treinado (.npz: formato compacto, ver src/analysis/model_artifact.py)
+MODEL_PATH = "analyzer_model.npz"
+
+# Modelo no formato antigo (objeto completo gravado com joblib), usado se MODEL_PATH não existir
+LEGACY_MODEL_PATH = "analyzer_model.joblib"
+
+# Pasta dos modelos por paciente do ModelRegistry (<id do paciente>.npz ou .joblib)
+MODEL_REGISTRY_DIR = "modelos"
+
+# Máximo de modelos mantidos em memória pelo ModelRegistry (os menos usados recentemente são descartados)
+MODEL_REGISTRY_MAX_MODELS = 8
+
+# Pasta da cache de features das sessões (ver src/analysis/feature_cache.py)
+FEATURE_CACHE_DIR = ".apolo_cache/features"
+
+# Tamanho máximo da cache de features em MB (as entradas menos usadas são apagadas)
+FEATURE_CACHE_MAX_MB = 512
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
@@ -7,20 +7,30 @@
 """
 Script para gravar dados de sensores e botões de um controle DualSense
 durante uma sessão de jogo, salvando o resultado num ficheiro CSV.
+
+No formato "binario" (default), as amostras são escritas em blocos num
+ficheiro .apolo durante a gravação (memória constante e sem perda da sessão
+em caso de falha) e, no fim, exportadas para o CSV habitual.
 """
 
 import time
 import csv
 from pydualsense import pydualsense
+from src.utils.session_file import BinarySessionWriter, binary_to_csv, CSV_COLUMNS
 
 # --- CONFIGURAÇÕES ---
 OUTPUT_FILENAME = "gameplay_session.csv"
+BINARY_OUTPUT_FILENAME = "gameplay_session.apolo"
 LOGGING_FREQUENCY_HZ = 100
+OUTPUT_FORMAT = "binario"  # "binario" (gravação em blocos) ou "csv" (buffer em memória)
+BINARY_FLUSH_SAMPLES = 1000  # Amostras por bloco escrito no disco (10 s a 100 Hz)
+EXPORT_CSV_ON_EXIT = True  # No formato binário, exporta também o CSV no fim
 
 class GameDataLogger:
     def __init__(self):
         self.dualsense = None
         self.data_buffer = []
+        self.writer = None
         self.latest_sensor_data = {
             'accel_x': 0.0, 'accel_y': 0.0, 'accel_z': 0.0,
             'gyro_x': 0.0, 'gyro_y': 0.0, 'gyro_z': 0.0
@@ -52,6 +62,8 @@ class GameDataLogger:
             self._setup_callbacks()
             
             input("\n>>> Pressione [Enter] para começar a gravar... <<<")
+            if OUTPUT_FORMAT == "binario":
+                self.writer = BinarySessionWriter(BINARY_OUTPUT_FILENAME, LOGGING_FREQUENCY_HZ, block_size=BINARY_FLUSH_SAMPLES)
             print(f"\nGravação iniciada! A gravar dados a {LOGGING_FREQUENCY_HZ} Hz.")
             print("Jogue o seu jogo. Quando terminar, volte a este terminal e pressione [Ctrl+C] para parar.")
 
@@ -80,35 +92,45 @@ class GameDataLogger:
                     state.DpadUp, state.DpadDown, state.DpadLeft, state.DpadRight,
                     state.L2, state.R2
                 ]
-                self.data_buffer.append(row)
+                if self.writer is not None:
+                    self.writer.append(row)
+                else:
+                    self.data_buffer.append(row)
                 time.sleep(1.0 / LOGGING_FREQUENCY_HZ)
         except KeyboardInterrupt:
             print("\nGravação interrompida pelo utilizador.")
 
     def save_data(self):
         """Salva os dados acumulados no buffer para um ficheiro CSV."""
+        if self.writer is not None:
+            self._close_binary_recording()
+            return
+
         if not self.data_buffer:
             print("Nenhum dado para salvar.")
             return
 
         print(f"\nA salvar {len(self.data_buffer)} amostras de dados em '{OUTPUT_FILENAME}'...")
-        header = [
-            'timestamp', 
-            'accel_x', 'accel_y', 'accel_z',
-            'gyro_x', 'gyro_y', 'gyro_z',
-            'R1', 'L1',
-            'DpadUp', 'DpadDown', 'DpadLeft', 'DpadRight',
-            'L2_force', 'R2_force'
-        ]
-        
         with open(OUTPUT_FILENAME, 'w', newline='') as f:
             writer = csv.writer(f)
-            writer.writerow(header)
+            writer.writerow(CSV_COLUMNS)
             # --- CORREÇÃO AQUI ---
             writer.writerows(self.data_buffer) # Estava 'data_guffer'
         
         print("Dados salvos com sucesso!")
 
+    def _close_binary_recording(self):
+        """Escreve o último bloco da gravação binária e, se pedido, exporta o CSV."""
+        self.writer.close()
+        if self.writer.n_written == 0:
+            print("Nenhum dado para salvar.")
+            return
+
+        print(f"\n{self.writer.n_written} amostras gravadas em '{BINARY_OUTPUT_FILENAME}'.")
+        if EXPORT_CSV_ON_EXIT:
+            binary_to_csv(BINARY_OUTPUT_FILENAME, OUTPUT_FILENAME)
+        print("Dados salvos com sucesso!")
+
 if __name__ == "__main__":
     logger = GameDataLogger()
     logger.run()
\ No newline at end of file
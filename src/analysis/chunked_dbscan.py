@@ -0,0 +1,147 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+DBSCAN por blocos para linhas de base grandes.
+
+O DBSCAN do scikit-learn calcula de uma vez a lista de vizinhos de todos os
+pontos, pelo que a memória cresce com o número total de pares a menos de eps
+(8 bytes por par mais ~100 bytes por ponto) e esgota a RAM com centenas de
+milhares de janelas densas. Aqui o grafo de vizinhança nunca existe inteiro:
+
+1. Contagem: os vizinhos de cada ponto são contados por blocos
+   (query_radius com count_only), o que define os core points.
+2. Ligação: para cada bloco de core points constrói-se o grafo esparso das
+   ligações a outros core points a menos de eps, que é fundido nas
+   componentes já encontradas (scipy.sparse.csgraph) e descartado.
+3. Fronteira: cada ponto não-core com um core point a menos de eps recebe o
+   menor rótulo entre os clusters desses core points; os restantes são ruído.
+
+Os clusters são numerados pela ordem do seu primeiro core point, e um ponto
+de fronteira fica com o cluster de menor rótulo, tal como na expansão
+sequencial do scikit-learn: os rótulos são os mesmos do
+DBSCAN(eps, min_samples).fit_predict (a menos de empates numéricos em
+distâncias iguais a eps).
+
+Teto de memória: além dos dados e das KD-trees (~16·d bytes por ponto), os
+arrays por ponto ocupam ~40 bytes. As ligações são acumuladas até
+max_pairs pares (~32 bytes por par, com a conversão para CSR) e então
+fundidas e libertadas; as consultas são feitas em sub-blocos de
+_QUERY_BLOCK pontos. O pico fica assim limitado a cerca de
+32 × (max_pairs + _QUERY_BLOCK × maior vizinhança) bytes, e não cresce com
+o número total de pares (ex: 2 000 000 pares ≈ 64 MB).
+
+Com grid=True, os pontos são agrupados em células de lado eps/√d, cujos
+pontos estão todos a menos de eps uns dos outros: as células com pelo menos
+min_samples pontos são core sem ser preciso contar os vizinhos e os seus
+pontos entram já ligados. Compensa em poucas dimensões ou com muitas janelas
+quase iguais (ex: controle parado).
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from config import DBSCAN_CHUNK_PAIRS
+
+# Pontos por consulta à KD-tree
+_QUERY_BLOCK = 256
+
+def _grid_cells(data: np.ndarray, eps: float):
+    """Índice da célula de lado eps/√d de cada ponto e o número de pontos por célula."""
+    side = eps / np.sqrt(data.shape[1])
+    keys = np.floor(data / side).astype(np.int64)
+    _, cells, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    return cells.ravel(), counts
+
+
+def _merge(component: np.ndarray, sources: list, targets: list, n_nodes: int) -> np.ndarray:
+    """Funde as componentes ligadas pelos pares (sources, targets) e retorna o novo rótulo de cada nó."""
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    graph = csr_matrix((np.ones(len(sources), dtype=bool), (component[sources], component[targets])),
+                       shape=(n_nodes, n_nodes))
+    _, merged = connected_components(graph, directed=False)
+    return merged[component]
+
+
+def chunked_dbscan(data: np.ndarray, eps: float, min_samples: int,
+                   max_pairs: int = DBSCAN_CHUNK_PAIRS, grid: bool = False, return_core: bool = False):
+    """
+    DBSCAN com memória limitada (ver a documentação do módulo).
+
+    Args:
+        data: Matriz (n_pontos, n_features), já normalizada.
+        eps: Raio de vizinhança.
+        min_samples: Vizinhos (incluindo o próprio ponto) de um core point.
+        max_pairs: Pares vizinhos acumulados antes de cada fusão de componentes.
+        grid: Se True, usa a pré-divisão em células de lado eps/√d.
+        return_core: Se True, retorna também a máscara dos core points.
+
+    Returns:
+        Rótulos de cluster por ponto (-1 = ruído), iguais aos do DBSCAN do
+        scikit-learn, e com return_core a máscara dos core points.
+    """
+    from sklearn.neighbors import KDTree
+
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    n_points = len(data)
+    labels = np.full(n_points, -1, dtype=np.intp)
+    if n_points == 0:
+        return (labels, np.zeros(0, dtype=bool)) if return_core else labels
+
+    # 1. Core points (a contagem não guarda os vizinhos)
+    is_core = np.zeros(n_points, dtype=bool)
+    cells = None
+    if grid:
+        cells, cell_counts = _grid_cells(data, eps)
+        is_core = cell_counts[cells] >= min_samples
+    tree = KDTree(data)
+    pending = np.flatnonzero(~is_core)
+    for start in range(0, len(pending), _QUERY_BLOCK):
+        block = pending[start:start + _QUERY_BLOCK]
+        is_core[block] = tree.query_radius(data[block], eps, count_only=True) >= min_samples
+    del tree
+
+    core = np.flatnonzero(is_core)
+    if len(core) == 0:
+        return (labels, is_core) if return_core else labels
+
+    # 2. Componentes ligadas dos core points, fundidas a cada max_pairs pares
+    core_data = data[core]
+    core_tree = KDTree(core_data)
+    if grid:
+        # Core points da mesma célula densa começam já na mesma componente
+        _, component = np.unique(cells[core], return_inverse=True)
+        component = component.ravel()
+    else:
+        component = np.arange(len(core))
+    n_nodes = component.max() + 1
+    sources, targets, n_pairs = [], [], 0
+    for start in range(0, len(core), _QUERY_BLOCK):
+        neighbors = core_tree.query_radius(core_data[start:start + _QUERY_BLOCK], eps)
+        lengths = [len(ind) for ind in neighbors]
+        sources.append(np.repeat(np.arange(start, start + len(neighbors)), lengths))
+        targets.append(np.concatenate(neighbors))
+        n_pairs += sum(lengths)
+        if n_pairs >= max_pairs:
+            component = _merge(component, sources, targets, n_nodes)
+            sources, targets, n_pairs = [], [], 0
+    if sources:
+        component = _merge(component, sources, targets, n_nodes)
+
+    # Clusters numerados pela ordem do primeiro core point (como no scikit-learn)
+    _, first, inverse = np.unique(component, return_index=True, return_inverse=True)
+    rank = np.empty(len(first), dtype=np.intp)
+    rank[np.argsort(first)] = np.arange(len(first))
+    core_labels = rank[inverse.ravel()]
+    labels[core] = core_labels
+
+    # 3. Pontos de fronteira: menor rótulo entre os core points a menos de eps
+    border = np.flatnonzero(~is_core)
+    for start in range(0, len(border), _QUERY_BLOCK):
+        block = border[start:start + _QUERY_BLOCK]
+        for point, ind in zip(block, core_tree.query_radius(data[block], eps)):
+            if len(ind):
+                labels[point] = core_labels[ind].min()
+    return (labels, is_core) if return_core else labels
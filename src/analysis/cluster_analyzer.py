@@ -7,24 +7,37 @@
 """
 Este módulo contém a classe ClusterAnalyzer, a única responsável por
 aplicar o DBSCAN para análise, treino e deteção de anomalias.
-Implementa padrão Singleton para garantir uma única instância em toda aplicação.
+Implementa padrão Singleton para garantir uma única instância em toda aplicação;
+os modelos de vários pacientes no mesmo processo usam instâncias independentes
+(ClusterAnalyzer.new_instance e load_model(shared=False), ver ModelRegistry).
+
+O scikit-learn, o joblib e o UMAP só são importados pelos métodos que os
+usam: carregar um modelo .npz não importa nenhum deles, e a predição
+importa apenas sklearn.neighbors, na primeira consulta à KD-tree.
 """
-from typing import Dict, Any, Optional
+import importlib.util
+import threading
+import contextlib
+from typing import Callable, Dict, Any, Optional
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import DBSCAN
-from sklearn.decomposition import PCA
-from sklearn.neighbors import NearestNeighbors
-from sklearn.manifold import TSNE
-import joblib
-from config import DBSCAN_EPS, get_min_samples_for_dimensions
-
-try:
-    import umap
-    HAS_UMAP = True
-except ImportError:
-    HAS_UMAP = False
+from src.analysis.model_artifact import (
+    ModelArtifact, MODEL_ARTIFACT_VERSION, MODEL_ARTIFACT_EXTENSION, save_model_artifact, load_model_artifact
+)
+from config import (
+    DBSCAN_EPS, PREDICTION_ENGINE, PREDICTION_MEMORY_BUDGET_MB, PREDICTION_NUMPY_MAX_WINDOWS,
+    DBSCAN_TRAINING_ENGINE, DBSCAN_GRID_BUCKETING,
+    NORMAL_SET_COMPRESSION, NORMAL_SET_NET_FRACTION, PROJECTION_NEIGHBORS, PROJECTION_MAX_POINTS, get_min_samples_for_dimensions
+)
+
+# Verifica a instalação sem importar o UMAP (que carrega o numba)
+HAS_UMAP = importlib.util.find_spec("umap") is not None
+
+# Projeções 2D que podem ser ajustadas no treino e guardadas com o modelo
+PROJECTION_METHODS = ("pca", "umap")
+
+# Compressões do conjunto de pontos normais guardado pelo fit()
+COMPRESSION_METHODS = ("core", "net")
 
 class ClusterAnalyzer:
     """
@@ -33,9 +46,14 @@ class ClusterAnalyzer:
     """
     
     _instance = None  # Instância singleton
+    _construction = threading.local()  # private=True: a thread está a criar instâncias independentes
     
     def __new__(cls, *args, **kwargs):
-        """Garante que apenas uma instância seja criada."""
+        """Garante que apenas uma instância seja criada (exceto em _private_instances)."""
+        if getattr(cls._construction, "private", False):
+            instance = super().__new__(cls)
+            instance._initialized = False
+            return instance
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._initialized = False
@@ -57,18 +75,69 @@ class ClusterAnalyzer:
         self.eps = eps if eps is not None else DBSCAN_EPS
         # min_samples será calculado no fit() quando soubermos o num_features
         self.min_samples = min_samples
-        self._scaler = StandardScaler()
+        self._scaler = None  # StandardScaler, criado no fit()
+        self._scaler_mean = None
+        self._scaler_scale = None
         self._dbscan = None  # Será inicializado no fit()
         self._feature_columns = None
         self._trained_data = None
+        self._neighbor_index = None  # KD-tree sobre _trained_data, construída no fit()
+        self._gemm_operands = None  # Cópia float32 de _trained_data (× -2) e normas, para o motor "gemm"
         self._normal_cluster_label = None
+        self._projection_method = ""  # Projeção 2D ajustada no fit() ("" se nenhuma)
+        self._projection_arrays = {}
+        self._feature_params = {}  # Parâmetros de extração das features do treino ({} se desconhecidos)
         self._initialized = True
         
-        print("[ClusterAnalyzer] Singleton inicializado")
+        if self is ClusterAnalyzer._instance:
+            print("[ClusterAnalyzer] Singleton inicializado")
+
+    @classmethod
+    @contextlib.contextmanager
+    def _private_instances(cls):
+        """
+        Dentro deste bloco, as instâncias criadas por esta thread (construtor,
+        from_artifact ou joblib.load) são independentes do singleton.
+        """
+        previous = getattr(cls._construction, "private", False)
+        cls._construction.private = True
+        try:
+            yield
+        finally:
+            cls._construction.private = previous
+
+    @classmethod
+    def new_instance(cls, eps: float = None, min_samples: int = None) -> "ClusterAnalyzer":
+        """
+        Cria um ClusterAnalyzer independente do singleton, por exemplo para
+        treinar ou servir o modelo de outro paciente no mesmo processo.
+        """
+        with cls._private_instances():
+            return cls(eps=eps, min_samples=min_samples)
+
+    @property
+    def feature_columns(self) -> Optional[list]:
+        """Colunas de features, na ordem usada no treino."""
+        return self._feature_columns
+
+    @property
+    def feature_params(self) -> Dict:
+        """
+        Parâmetros do SessionProcessor que extraiu as features do treino
+        (SessionProcessor.feature_params), ou {} num modelo antigo. As novas
+        sessões devem ser processadas com SessionProcessor.from_feature_params.
+        """
+        return getattr(self, '_feature_params', {})
+
+    @property
+    def normal_points(self) -> Optional[np.ndarray]:
+        """Pontos normais do modelo (features normalizadas), indexados pelos índices de score_batch."""
+        return self._trained_data
 
     @staticmethod
     def _scale_features(features_df: pd.DataFrame):
         """Aplica o StandardScaler às features."""
+        from sklearn.preprocessing import StandardScaler
         return StandardScaler().fit_transform(features_df)
 
     @staticmethod
@@ -79,6 +148,7 @@ class ClusterAnalyzer:
         if features_df.empty or features_df.shape[1] < 2:
             return None
         
+        from sklearn.decomposition import PCA
         scaled_data = ClusterAnalyzer._scale_features(features_df)
         n_components = min(n_components, scaled_data.shape[1])
         pca = PCA(n_components=n_components)
@@ -94,6 +164,7 @@ class ClusterAnalyzer:
         if features_df.empty or features_df.shape[1] < 2:
             return None, None, None
         
+        from sklearn.decomposition import PCA
         scaled_data = ClusterAnalyzer._scale_features(features_df)
         pca = PCA()
         pca.fit(scaled_data)
@@ -106,28 +177,107 @@ class ClusterAnalyzer:
         return componentes, variancia_individual, variancia_acumulada
 
     @staticmethod
-    def reduce_dimensions_tsne(features_df: pd.DataFrame, n_components: int = 2, perplexity: int = 30) -> np.ndarray:
+    def _stratified_sample(labels: np.ndarray, max_points: int, seed: int = 42) -> np.ndarray:
+        """
+        Índices ordenados de uma amostra com cerca de max_points janelas,
+        estratificada pelos rótulos. As anomalias (-1) entram todas enquanto
+        couberem; pelo menos metade de max_points fica reservada às janelas
+        normais, que servem de referência à interpolação, e as anomalias que
+        não cabem no resto são amostradas, para que o tamanho da amostra não
+        cresça com o número de anomalias.
+        """
+        rng = np.random.default_rng(seed)
+        anomalies = np.flatnonzero(labels == -1)
+        others = np.flatnonzero(labels != -1)
+        budget = min(len(others), max(max_points - len(anomalies), max_points // 2))
+        anomaly_budget = max_points - budget
+        if len(anomalies) > anomaly_budget:
+            anomalies = rng.choice(anomalies, size=anomaly_budget, replace=False)
+        if budget >= len(others):
+            return np.sort(np.concatenate((anomalies, others)))
+
+        chosen = [anomalies]
+        for label in np.unique(labels[others]):
+            members = others[labels[others] == label]
+            size = min(len(members), max(1, int(round(budget * len(members) / len(others)))))
+            chosen.append(rng.choice(members, size=size, replace=False))
+        return np.sort(np.concatenate(chosen))
+
+    @staticmethod
+    def _interpolate_embedding(distances: np.ndarray, indices: np.ndarray, embedding: np.ndarray) -> np.ndarray:
+        """Média das coordenadas dos vizinhos, pesada pelo inverso da distância."""
+        weights = 1.0 / np.maximum(distances, 1e-12)
+        weights /= weights.sum(axis=1, keepdims=True)
+        return np.einsum("nk,nkd->nd", weights, embedding[indices])
+
+    @staticmethod
+    def _embed_sampled(scaled_data: np.ndarray, embed: Callable[[np.ndarray], np.ndarray],
+                       labels: Optional[np.ndarray], max_points: Optional[int]) -> np.ndarray:
+        """
+        Aplica 'embed' a todas as janelas ou, acima de max_points, a uma
+        amostra estratificada; as restantes janelas são posicionadas pela
+        média das coordenadas dos PROJECTION_NEIGHBORS vizinhos mais próximos
+        da amostra (no espaço normalizado). O custo do embedding deixa assim
+        de crescer com o tamanho da sessão.
+        """
+        n_samples = len(scaled_data)
+        if max_points is None or n_samples <= max_points:
+            return embed(scaled_data)
+
+        from sklearn.neighbors import KDTree
+        labels = np.zeros(n_samples, dtype=int) if labels is None else np.asarray(labels)
+        sample = ClusterAnalyzer._stratified_sample(labels, max_points)
+        if len(sample) == n_samples:
+            return embed(scaled_data)
+        sample_embedding = embed(scaled_data[sample])
+
+        rest = np.ones(n_samples, dtype=bool)
+        rest[sample] = False
+        embedding = np.empty((n_samples, sample_embedding.shape[1]))
+        embedding[sample] = sample_embedding
+        distances, indices = KDTree(scaled_data[sample]).query(
+            scaled_data[rest], k=min(PROJECTION_NEIGHBORS, len(sample))
+        )
+        embedding[rest] = ClusterAnalyzer._interpolate_embedding(distances, indices, sample_embedding)
+        return embedding
+
+    @staticmethod
+    def reduce_dimensions_tsne(features_df: pd.DataFrame, n_components: int = 2, perplexity: int = 30,
+                               labels: Optional[np.ndarray] = None,
+                               max_points: Optional[int] = PROJECTION_MAX_POINTS) -> np.ndarray:
         """
         Reduz dimensionalidade usando t-SNE (não-linear, interpretável para visualização).
         Melhor para exploração de clusters mas mais lento.
+
+        Sessões com mais de max_points janelas são projetadas por amostragem
+        (ver _embed_sampled); com labels, a amostra é estratificada pelos
+        rótulos e privilegia as anomalias. max_points=None projeta todas.
         """
         if features_df.empty or features_df.shape[1] < 2:
             return None
         
+        from sklearn.manifold import TSNE
         scaled_data = ClusterAnalyzer._scale_features(features_df)
-        # Ajustar perplexity para amostras pequenas
-        n_samples = scaled_data.shape[0]
-        perplexity = min(perplexity, (n_samples - 1) // 3)
-        perplexity = max(5, perplexity)
-        
-        tsne = TSNE(n_components=n_components, perplexity=perplexity, random_state=42)
-        return tsne.fit_transform(scaled_data)
+
+        def embed(data: np.ndarray) -> np.ndarray:
+            # Ajustar perplexity para amostras pequenas
+            n_samples = data.shape[0]
+            adjusted = max(5, min(perplexity, (n_samples - 1) // 3))
+            tsne = TSNE(n_components=n_components, perplexity=adjusted, method="barnes_hut",
+                        init="pca", learning_rate="auto", random_state=42)
+            return tsne.fit_transform(data)
+
+        return ClusterAnalyzer._embed_sampled(scaled_data, embed, labels, max_points)
 
     @staticmethod
-    def reduce_dimensions_umap(features_df: pd.DataFrame, n_components: int = 2, n_neighbors: int = 15) -> Optional[np.ndarray]:
+    def reduce_dimensions_umap(features_df: pd.DataFrame, n_components: int = 2, n_neighbors: int = 15,
+                               labels: Optional[np.ndarray] = None,
+                               max_points: Optional[int] = PROJECTION_MAX_POINTS) -> Optional[np.ndarray]:
         """
         Reduz dimensionalidade usando UMAP (não-linear, rápido, preserva estrutura global).
         Requer instalação: pip install umap-learn
+
+        A amostragem de sessões grandes é a mesma de reduce_dimensions_tsne.
         """
         if not HAS_UMAP:
             print("Aviso: UMAP não está instalado. Use: pip install umap-learn")
@@ -136,9 +286,14 @@ class ClusterAnalyzer:
         if features_df.empty or features_df.shape[1] < 2:
             return None
         
+        import umap
         scaled_data = ClusterAnalyzer._scale_features(features_df)
-        reducer = umap.UMAP(n_components=n_components, n_neighbors=n_neighbors, random_state=42, metric='euclidean')
-        return reducer.fit_transform(scaled_data)
+
+        def embed(data: np.ndarray) -> np.ndarray:
+            reducer = umap.UMAP(n_components=n_components, n_neighbors=n_neighbors, random_state=42, metric='euclidean')
+            return reducer.fit_transform(data)
+
+        return ClusterAnalyzer._embed_sampled(scaled_data, embed, labels, max_points)
 
     @staticmethod
     def calculate_k_distance_graph(features_df: pd.DataFrame, k: int):
@@ -149,6 +304,7 @@ class ClusterAnalyzer:
         if features_df.empty:
             return np.array([])
             
+        from sklearn.neighbors import NearestNeighbors
         scaled_data = ClusterAnalyzer._scale_features(features_df)
         
         neighbors = NearestNeighbors(n_neighbors=k)
@@ -173,6 +329,7 @@ class ClusterAnalyzer:
 
         principal_components = None
         if scaled_features.shape[1] >= 2:
+            from sklearn.decomposition import PCA
             pca = PCA(n_components=2)
             principal_components = pca.fit_transform(scaled_features)
 
@@ -183,13 +340,47 @@ class ClusterAnalyzer:
             "principal_components": principal_components
         }
 
-    def fit(self, baseline_df: pd.DataFrame):
+    def fit(self, baseline_df: pd.DataFrame, projection: Optional[str] = None, engine: Optional[str] = None,
+            compression: Optional[str] = NORMAL_SET_COMPRESSION, feature_params: Optional[Dict] = None):
         """
         Treina o ClusterAnalyzer com dados de base para aprender o que é 'normal'.
         Considera TODOS os clusters (exceto ruído/-1) como normalidade.
+
+        Args:
+            baseline_df: DataFrame de features do treino.
+            projection: 'pca' ou 'umap' para ajustar também uma projeção 2D
+                sobre o treino, guardada com o modelo e aplicada às novas
+                sessões com project() (default: nenhuma).
+            engine: 'sklearn' (DBSCAN do scikit-learn) ou 'chunked' (por
+                blocos, com memória limitada e os mesmos rótulos; ver
+                src.analysis.chunked_dbscan). Default: DBSCAN_TRAINING_ENGINE.
+            compression: Guarda só uma parte dos pontos normais, para que o
+                tamanho do modelo e o custo da predição deixem de crescer com
+                a linha de base: 'core' (só os core points do DBSCAN) ou 'net'
+                (uma rede de cobertura: cada ponto normal fica a menos de
+                NORMAL_SET_NET_FRACTION × eps de um ponto guardado). Como os
+                pontos guardados são pontos normais, a compressão nunca
+                esconde uma anomalia; só pode marcar como anómalas janelas na
+                orla da normalidade. Default: NORMAL_SET_COMPRESSION.
+            feature_params: SessionProcessor.feature_params() do processador
+                que extraiu baseline_df, guardado com o modelo para que as
+                novas sessões usem as mesmas features.
         """
+        engine = engine or DBSCAN_TRAINING_ENGINE
+        if engine not in ("sklearn", "chunked"):
+            raise ValueError(f"Motor de treino desconhecido: '{engine}'")
+        if compression is not None and compression not in COMPRESSION_METHODS:
+            raise ValueError(f"Compressão desconhecida: '{compression}'. Opções: {', '.join(COMPRESSION_METHODS)}")
+        if projection is not None and projection not in PROJECTION_METHODS:
+            raise ValueError(f"Projeção desconhecida: '{projection}'. Opções: {', '.join(PROJECTION_METHODS)}")
+
+        from sklearn.cluster import DBSCAN
+        from sklearn.neighbors import KDTree
+        from sklearn.preprocessing import StandardScaler
+
         features_df = baseline_df.drop(columns=['label'], errors='ignore')
         self._feature_columns = features_df.columns.tolist()
+        self._feature_params = dict(feature_params or {})
         
         # Calcula min_samples dinamicamente se não foi especificado
         if self.min_samples is None:
@@ -200,59 +391,395 @@ class ClusterAnalyzer:
         # Inicializa DBSCAN com os parâmetros
         self._dbscan = DBSCAN(eps=self.eps, min_samples=self.min_samples)
         
+        self._scaler = StandardScaler()
         scaled_data = self._scaler.fit_transform(features_df)
-        labels = self._dbscan.fit_predict(scaled_data)
+        self._scaler_mean, self._scaler_scale = self._scaler.mean_, self._scaler.scale_
+        if engine == "chunked":
+            from src.analysis.chunked_dbscan import chunked_dbscan
+            labels, is_core = chunked_dbscan(scaled_data, self.eps, self.min_samples,
+                                             grid=DBSCAN_GRID_BUCKETING, return_core=True)
+        else:
+            labels = self._dbscan.fit_predict(scaled_data)
+            is_core = np.zeros(len(labels), dtype=bool)
+            is_core[self._dbscan.core_sample_indices_] = True
         
+        normal_rows = np.flatnonzero(labels != -1)
         if len(labels) > 0:
             valid_labels = labels[labels != -1]
             if len(valid_labels) > 0:
-                self._trained_data = scaled_data[labels != -1]
+                if compression == "core":
+                    normal_rows = np.flatnonzero(is_core)
+                elif compression == "net":
+                    radius = NORMAL_SET_NET_FRACTION * self.eps
+                    normal_rows = normal_rows[self._covering_subset(scaled_data[normal_rows], radius)]
+                self._trained_data = scaled_data[normal_rows]
+                self._neighbor_index = KDTree(self._trained_data)
+                self._gemm_operands = None
                 n_clusters = len(np.unique(valid_labels))
                 n_normal_points = len(valid_labels)
                 print(f"Linha de base treinada. {n_clusters} cluster(s) com {n_normal_points} pontos de 'normalidade'.")
+                if compression is not None:
+                    print(f"Conjunto normal comprimido ({compression}): {len(normal_rows)} de {n_normal_points} pontos guardados.")
             else:
                 self._trained_data = np.array([])
+                self._neighbor_index = None
+                self._gemm_operands = None
                 print("Aviso: Nenhum cluster de normalidade encontrado.")
         else:
             print("Aviso: Nenhum dado para treinar.")
 
+        self._projection_method, self._projection_arrays = "", {}
+        if projection is not None and len(labels) > 0:
+            self._fit_projection(scaled_data, normal_rows, projection)
+
+    @staticmethod
+    def _covering_subset(points: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Índices de uma rede de cobertura gulosa: percorre os pontos por ordem e
+        guarda cada ponto que ainda não esteja a menos de 'radius' de um ponto
+        guardado. Todos os pontos ficam a menos de 'radius' da rede.
+        """
+        from sklearn.neighbors import KDTree
+        tree = KDTree(points)
+        covered = np.zeros(len(points), dtype=bool)
+        centers = []
+        for i in range(len(points)):
+            if covered[i]:
+                continue
+            centers.append(i)
+            covered[tree.query_radius(points[i:i + 1], radius)[0]] = True
+        return np.array(centers, dtype=np.intp)
+
+    def _fit_projection(self, scaled_data: np.ndarray, normal_rows: np.ndarray, method: str):
+        """
+        Ajusta a projeção 2D sobre os dados de treino normalizados. Do PCA
+        guardam-se a média e os componentes; do UMAP, que não tem uma forma
+        fechada, guardam-se as coordenadas dos pontos normais, e as novas
+        janelas são posicionadas pelos seus vizinhos normais mais próximos.
+        """
+        if method == "pca":
+            if scaled_data.shape[1] < 2:
+                print("Aviso: A projeção PCA requer pelo menos 2 features.")
+                return
+            from sklearn.decomposition import PCA
+            pca = PCA(n_components=2).fit(scaled_data)
+            self._projection_arrays = {"mean": pca.mean_, "components": pca.components_}
+        else:
+            if not HAS_UMAP:
+                raise ImportError("A projeção UMAP requer o pacote umap-learn: pip install umap-learn")
+            if self._trained_data.shape[0] == 0:
+                print("Aviso: Sem pontos normais, a projeção UMAP não é guardada.")
+                return
+            import umap
+            embedding = umap.UMAP(n_components=2, random_state=42, metric='euclidean').fit_transform(scaled_data)
+            self._projection_arrays = {"embedding": embedding[normal_rows]}
+        self._projection_method = method
+        print(f"Projeção {method.upper()} ajustada sobre {len(scaled_data)} janelas de treino.")
+
+    @property
+    def projection_method(self) -> str:
+        """Projeção 2D guardada com o modelo ('pca', 'umap' ou '' se nenhuma)."""
+        return getattr(self, '_projection_method', "")
+
+    def project(self, features_df: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        Aplica a projeção 2D ajustada no treino a novas janelas, sem voltar a
+        ajustar nada: as coordenadas de sessões diferentes são comparáveis.
+
+        Returns:
+            Array (n_janelas, 2), ou None se o modelo não tiver projeção.
+        """
+        if not self.projection_method:
+            return None
+        scaled_data = self._transform(features_df)
+        if self.projection_method == "pca":
+            return (scaled_data - self._projection_arrays["mean"]) @ self._projection_arrays["components"].T
+
+        # UMAP: média das coordenadas dos vizinhos normais, pesada pelo inverso da distância
+        embedding = self._projection_arrays["embedding"]
+        if len(scaled_data) == 0:
+            return np.zeros((0, embedding.shape[1]))
+        k = min(PROJECTION_NEIGHBORS, len(embedding))
+        distances, indices = self._get_neighbor_index().query(scaled_data, k=k)
+        return self._interpolate_embedding(distances, indices, embedding)
+
     def predict_is_anomalous(self, features: dict) -> bool:
         """
         Prevê se um novo conjunto de features é uma anomalia.
         """
         if self._trained_data is None: raise RuntimeError("O modelo deve ser treinado com 'fit()' antes de prever.")
-        if self._trained_data.shape[0] == 0: return True
+        row = np.array([[features[column] for column in self._feature_columns]], dtype=np.float64)
+        distances, _ = self.score_batch(row)
+        return bool(distances[0] > self.eps)
 
-        features_df = pd.DataFrame([features])[self._feature_columns]
-        scaled_point = self._scaler.transform(features_df)
-        
-        distances = np.linalg.norm(self._trained_data - scaled_point, axis=1)
-        return np.min(distances) > self.eps
+    def _scaler_params(self):
+        """Média e escala do StandardScaler do treino (modelos antigos só têm o objeto)."""
+        if getattr(self, '_scaler_mean', None) is not None:
+            return self._scaler_mean, self._scaler_scale
+        return self._scaler.mean_, self._scaler.scale_
+
+    def _transform(self, features_df: pd.DataFrame) -> np.ndarray:
+        """
+        Normaliza as features com a média e a escala do treino, com as mesmas
+        operações de StandardScaler.transform mas sem depender do scikit-learn.
+        """
+        mean, scale = self._scaler_params()
+        if isinstance(features_df, pd.DataFrame):
+            values = features_df[self._feature_columns].to_numpy(dtype=np.float64, copy=True)
+        else:
+            values = np.array(features_df, dtype=np.float64)
+        values -= mean
+        values /= scale
+        return values
+
+    def _get_neighbor_index(self):
+        """
+        Retorna a KD-tree dos pontos normais, construindo-a se necessário
+        (ex: modelos .npz ou antigos, gravados sem o índice).
+        """
+        if getattr(self, '_neighbor_index', None) is None:
+            from sklearn.neighbors import KDTree
+            self._neighbor_index = KDTree(self._trained_data)
+        return self._neighbor_index
+
+    def _nearest_normal_kdtree(self, scaled_data: np.ndarray):
+        """
+        Consulta de uma vez, na KD-tree, o vizinho normal mais próximo de
+        cada ponto.
+        """
+        distances, indices = self._get_neighbor_index().query(scaled_data, k=1)
+        distances, indices = distances[:, 0], indices[:, 0]
+
+        # Pontos em cima da fronteira são recalculados com a mesma fórmula do
+        # ciclo original, para que arredondamentos não troquem o rótulo.
+        borderline = np.flatnonzero(np.abs(distances - self.eps) <= 1e-9 * max(1.0, self.eps))
+        for i in borderline:
+            point_distances = np.linalg.norm(self._trained_data - scaled_data[i], axis=1)
+            indices[i] = np.argmin(point_distances)
+            distances[i] = point_distances[indices[i]]
+        return distances, indices
+
+    def _get_gemm_operands(self):
+        """
+        Retorna os pontos normais em float32 (metade da memória dos float64)
+        multiplicados por -2 (exato em vírgula flutuante) e as suas normas ao
+        quadrado, calculados na primeira predição "gemm".
+        """
+        if getattr(self, '_gemm_operands', None) is None:
+            points = np.ascontiguousarray(self._trained_data, dtype=np.float32)
+            self._gemm_operands = (-2 * points, np.einsum("ij,ij->i", points, points))
+        return self._gemm_operands
+
+    def _nearest_normal_gemm(self, scaled_data: np.ndarray, memory_budget_mb: float = PREDICTION_MEMORY_BUDGET_MB):
+        """
+        Vizinho normal mais próximo por blocos, com as distâncias ao quadrado
+        na forma ||a||² + ||b||² - 2ab: o produto é uma multiplicação de
+        matrizes float32 (BLAS) e nunca existe o array n × m × d da subtração
+        direta. Cada bloco de distâncias (janelas × pontos normais) ocupa no
+        máximo memory_budget_mb, contando com um temporário do mesmo tamanho.
+
+        O float32 só seleciona candidatos: os pontos normais a menos do erro
+        de arredondamento do melhor valor float32 de cada janela são
+        comparados em float64, com a fórmula do ciclo original. A distância e
+        o índice retornados são os do vizinho exato (em empate, o de menor
+        índice), como nos motores "kdtree" e "loop".
+        """
+        points, point_norms = self._get_gemm_operands()
+        n_points, n_normal = len(scaled_data), len(points)
+        n_features = scaled_data.shape[1]
+        queries = scaled_data.astype(np.float32)
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        # Erro de arredondamento de ||b||² - 2ab em float32 (cresce com o
+        # número de features); dois valores diferem no máximo do dobro
+        margin = 2 * (4 * n_features + 16) * np.finfo(np.float32).eps * (
+            query_norms.astype(np.float64) + float(point_norms.max()))
 
-    def predict_clusters(self, features_df: pd.DataFrame) -> np.ndarray:
+        tile_elements = max(1, int(memory_budget_mb * 2**20) // (2 * points.itemsize))
+        normal_block = min(n_normal, tile_elements)
+        query_block = max(1, tile_elements // normal_block)
+        # Candidatos comparados em float64 de cada vez (linhas de n_features float64)
+        candidate_block = max(1, tile_elements // n_features)
+
+        # Mínimo float32 de ||b||² - 2ab por janela (||a||² é igual para todos os pontos)
+        best = np.full(n_points, np.inf, dtype=np.float32)
+        block_rows = np.arange(min(query_block, n_points))
+        distances = np.full(n_points, np.inf)
+        indices = np.zeros(n_points, dtype=np.intp)
+        for q_start in range(0, n_points, query_block):
+            q_end = min(q_start + query_block, n_points)
+            block = queries[q_start:q_end]
+            for n_start in range(0, n_normal, normal_block):
+                partial = block @ points[n_start:n_start + normal_block].T
+                partial += point_norms[n_start:n_start + normal_block]
+                local = partial.argmin(axis=1)
+                np.minimum(best[q_start:q_end], partial[block_rows[:len(block)], local], out=best[q_start:q_end])
+                # Como best só diminui, os pontos abaixo deste limite incluem
+                # todos os candidatos finais
+                within = partial <= (best[q_start:q_end] + margin[q_start:q_end])[:, None]
+                counts = np.count_nonzero(within, axis=1)
+                # Com um só candidato no bloco, é o argmin; só as janelas com
+                # vários (quase empates, raros) são percorridas com nonzero
+                rows = np.flatnonzero(counts == 1)
+                cols = local[rows]
+                ambiguous = np.flatnonzero(counts > 1)
+                if len(ambiguous):
+                    ambiguous_rows, ambiguous_cols = np.nonzero(within[ambiguous])
+                    rows = np.concatenate((rows, ambiguous[ambiguous_rows]))
+                    cols = np.concatenate((cols, ambiguous_cols))
+                for c_start in range(0, len(rows), candidate_block):
+                    self._update_nearest(scaled_data, rows[c_start:c_start + candidate_block] + q_start,
+                                         cols[c_start:c_start + candidate_block] + n_start, distances, indices)
+        return distances, indices
+
+    def _update_nearest(self, scaled_data: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                        distances: np.ndarray, indices: np.ndarray):
+        """Atualiza o vizinho mais próximo de cada janela com os pares candidatos (janela, ponto normal), em float64."""
+        candidate_distances = np.linalg.norm(scaled_data[rows] - self._trained_data[cols], axis=1)
+        # Melhor candidato de cada janela: ordena por janela, distância e índice
+        order = np.lexsort((cols, candidate_distances, rows))
+        rows, cols, candidate_distances = rows[order], cols[order], candidate_distances[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        rows, cols, candidate_distances = rows[first], cols[first], candidate_distances[first]
+        better = (candidate_distances < distances[rows]) | (
+            (candidate_distances == distances[rows]) & (cols < indices[rows]))
+        distances[rows[better]] = candidate_distances[better]
+        indices[rows[better]] = cols[better]
+
+    def _nearest_normal_loop(self, scaled_data: np.ndarray):
+        """Implementação de referência: compara cada ponto com todos os normais."""
+        distances = np.empty(len(scaled_data))
+        indices = np.empty(len(scaled_data), dtype=np.intp)
+        for i, point in enumerate(scaled_data):
+            point_distances = np.linalg.norm(self._trained_data - point, axis=1)
+            indices[i] = np.argmin(point_distances)
+            distances[i] = point_distances[indices[i]]
+        return distances, indices
+
+    def score_batch(self, data, engine: str = None):
+        """
+        Distância de cada janela ao ponto normal mais próximo do modelo, numa
+        única chamada vetorizada. A distância é medida nas features
+        normalizadas (a mesma escala do eps): a janela é anómala se a
+        distância for maior do que eps, e ordenar pela distância ordena as
+        anomalias pela gravidade.
+
+        Args:
+            data: Array (n_janelas, n_features) com as colunas na ordem de
+                feature_columns, ou um DataFrame de features.
+            engine: 'kdtree', 'gemm' ou 'loop' (ver predict_clusters). Por
+                omissão PREDICTION_ENGINE, exceto nos lotes pequenos antes de
+                a KD-tree existir (ver PREDICTION_NUMPY_MAX_WINDOWS).
+
+        Returns:
+            Tuplo (distances, indices) de arrays (n_janelas,): a distância ao
+            ponto normal mais próximo e o índice desse ponto no conjunto de
+            pontos normais do modelo. Sem pontos normais, inf e -1.
+        """
+        if self._trained_data is None:
+            raise RuntimeError("O modelo deve ser treinado com 'fit()' antes de prever.")
+        default_engine = engine is None
+        engine = engine or PREDICTION_ENGINE
+        if not isinstance(data, pd.DataFrame):
+            data = np.atleast_2d(data)
+            if data.ndim != 2 or data.shape[1] != len(self._feature_columns):
+                raise ValueError(f"Esperado um array (n_janelas, {len(self._feature_columns)}) com as colunas "
+                                 f"{list(self._feature_columns)}; recebido {data.shape}.")
+        scaled_data = self._transform(data)
+        if self._trained_data.shape[0] == 0 or len(scaled_data) == 0:
+            return np.full(len(scaled_data), np.inf), np.full(len(scaled_data), -1, dtype=np.intp)
+
+        # Poucas janelas num modelo ainda sem KD-tree: o "gemm" só usa NumPy e
+        # evita importar o scikit-learn e construir o índice para uma predição
+        if (default_engine and engine == "kdtree" and getattr(self, '_neighbor_index', None) is None
+                and len(scaled_data) <= PREDICTION_NUMPY_MAX_WINDOWS):
+            engine = "gemm"
+        if engine == "kdtree":
+            return self._nearest_normal_kdtree(scaled_data)
+        if engine == "gemm":
+            return self._nearest_normal_gemm(scaled_data)
+        if engine == "loop":
+            return self._nearest_normal_loop(scaled_data)
+        raise ValueError(f"Motor de predição desconhecido: '{engine}'")
+
+    def predict_clusters(self, features_df: pd.DataFrame, engine: str = None) -> np.ndarray:
         """
         Aplica o conhecimento do modelo treinado a um novo dataset para
         classificar cada ponto como 'normal' (0) ou 'anomalia' (-1).
+
+        Args:
+            features_df: DataFrame de features (uma linha por janela).
+            engine: 'kdtree' (consulta em lote no índice espacial), 'gemm'
+                (distâncias por blocos em float32, com memória limitada) ou
+                'loop' (ciclo original ponto a ponto). Default: PREDICTION_ENGINE.
         """
-        if self._trained_data is None: 
-            raise RuntimeError("O modelo deve ser treinado com 'fit()' antes de prever.")
-        scaled_data = self._scaler.transform(features_df)
-        labels = np.full(shape=len(scaled_data), fill_value=-1, dtype=int)
-        if self._trained_data.shape[0] > 0:
-            for i, point in enumerate(scaled_data):
-                distances = np.linalg.norm(self._trained_data - point, axis=1)
-                if np.min(distances) <= self.eps:
-                    labels[i] = 0
-        return labels
+        distances, _ = self.score_batch(features_df, engine=engine)
+        return self.labels_from_scores(distances)
+
+    def labels_from_scores(self, distances: np.ndarray) -> np.ndarray:
+        """Rótulos de predict_clusters (0 = normal, -1 = anomalia) a partir das distâncias de score_batch."""
+        return np.where(distances <= self.eps, 0, -1)
 
     def save_model(self, path: str):
-        """Salva o estado do analyzer treinado num ficheiro."""
-        joblib.dump(self, path)
+        """
+        Salva o analyzer treinado num ficheiro. Com a extensão .npz é usado o
+        formato compacto (ver src.analysis.model_artifact); caso contrário, o
+        objeto completo é gravado com joblib.
+        """
+        if str(path).endswith(MODEL_ARTIFACT_EXTENSION):
+            if self._trained_data is None:
+                raise RuntimeError("O modelo deve ser treinado com 'fit()' antes de ser salvo.")
+            mean, scale = self._scaler_params()
+            save_model_artifact(path, ModelArtifact(
+                version=MODEL_ARTIFACT_VERSION, eps=self.eps, min_samples=self.min_samples,
+                feature_columns=list(self._feature_columns), scaler_mean=mean, scaler_scale=scale,
+                normal_points=np.asarray(self._trained_data).reshape(-1, len(self._feature_columns)),
+                projection_method=self.projection_method,
+                projection_arrays=getattr(self, '_projection_arrays', {}),
+                feature_params=self.feature_params
+            ))
+        else:
+            import joblib
+            joblib.dump(self, path)
         print(f"Analyzer salvo em {path}")
 
+    @classmethod
+    def from_artifact(cls, artifact: ModelArtifact) -> "ClusterAnalyzer":
+        """Restaura o analyzer (a instância singleton, exceto em _private_instances) a partir de um modelo compacto."""
+        analyzer = cls.__new__(cls)
+        analyzer.eps = artifact.eps
+        analyzer.min_samples = artifact.min_samples
+        analyzer._scaler = None
+        analyzer._scaler_mean = artifact.scaler_mean
+        analyzer._scaler_scale = artifact.scaler_scale
+        analyzer._dbscan = None
+        analyzer._feature_columns = artifact.feature_columns
+        analyzer._trained_data = artifact.normal_points
+        analyzer._neighbor_index = None  # Construída na primeira predição
+        analyzer._gemm_operands = None
+        analyzer._normal_cluster_label = None
+        analyzer._projection_method = artifact.projection_method
+        analyzer._projection_arrays = artifact.projection_arrays
+        analyzer._feature_params = artifact.feature_params
+        analyzer._initialized = True
+        return analyzer
+
     @staticmethod
-    def load_model(path: str):
-        """Carrega um analyzer treinado a partir de um ficheiro."""
-        analyzer = joblib.load(path)
+    def load_model(path: str, shared: bool = True):
+        """
+        Carrega um analyzer treinado a partir de um ficheiro .npz (formato
+        compacto, com os pontos normais mapeados em memória) ou joblib.
+
+        Args:
+            path: Caminho do modelo.
+            shared: Se True, o modelo é carregado na instância singleton; se
+                False, numa instância independente, sem alterar o singleton.
+        """
+        with contextlib.nullcontext() if shared else ClusterAnalyzer._private_instances():
+            if str(path).endswith(MODEL_ARTIFACT_EXTENSION):
+                analyzer = ClusterAnalyzer.from_artifact(load_model_artifact(path))
+            else:
+                import joblib
+                analyzer = joblib.load(path)
         print(f"Analyzer carregado de {path}")
         return analyzer
\ No newline at end of file
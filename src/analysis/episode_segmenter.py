@@ -0,0 +1,169 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Segmentação dos rótulos de predict_clusters em episódios de tremor.
+
+Janelas anómalas consecutivas formam um episódio (início, fim, duração, média
+de peak_freq e máximo de tremor_power), obtido por run-length encoding do
+array de rótulos. Tudo é vetorizado e O(n): os limites dos episódios vêm de
+np.diff e as agregações de np.add.reduceat / np.maximum.reduceat, sem ciclos
+Python sobre as janelas.
+"""
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import EPISODE_MAX_GAP_WINDOWS, EPISODE_MIN_WINDOWS
+
+ANOMALY_LABEL = -1
+
+EPISODE_COLUMNS = ["start_s", "end_s", "duration_s", "n_windows", "first_window", "last_window",
+                   "mean_peak_freq", "max_tremor_power", "max_distance"]
+
+def run_lengths(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run-length encoding de um array 1D.
+
+    Returns:
+        Tuplo (starts, lengths, run_values): o índice inicial, o comprimento
+        e o valor de cada sequência de valores iguais consecutivos.
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), values[:0]
+    starts = np.concatenate(([0], np.flatnonzero(values[1:] != values[:-1]) + 1))
+    lengths = np.diff(np.append(starts, len(values)))
+    return starts, lengths, values[starts]
+
+
+def _anomaly_mask(labels: np.ndarray, max_gap_windows: int) -> np.ndarray:
+    """Janelas anómalas, com as falhas de até max_gap_windows janelas normais entre duas anomalias preenchidas."""
+    anomalous = np.asarray(labels) == ANOMALY_LABEL
+    if max_gap_windows <= 0:
+        return anomalous
+    starts, lengths, run_values = run_lengths(anomalous)
+    # Sequências normais curtas com anomalias dos dois lados
+    inner = np.zeros(len(starts), dtype=bool)
+    inner[1:-1] = True
+    gaps = np.flatnonzero(~run_values & inner & (lengths <= max_gap_windows))
+    filled = anomalous.copy()
+    if len(gaps):
+        # Marca o início (+1) e o fim (-1) de cada falha e acumula
+        marks = np.zeros(len(anomalous) + 1, dtype=np.int64)
+        np.add.at(marks, starts[gaps], 1)
+        np.add.at(marks, starts[gaps] + lengths[gaps], -1)
+        filled |= np.cumsum(marks[:-1]) > 0
+    return filled
+
+
+def _feature_column(features_df: Optional[pd.DataFrame], name: str) -> Optional[str]:
+    """Coluna da feature do eixo X do acelerómetro (com o prefixo das features multi-eixo, se for o caso)."""
+    if features_df is None:
+        return None
+    for column in (name, f"accel_x_{name}"):
+        if column in features_df.columns:
+            return column
+    return None
+
+
+def segment_episodes(labels: np.ndarray, features_df: Optional[pd.DataFrame] = None,
+                     window_sec: float = 2.0, step_sec: float = 1.0,
+                     distances: Optional[np.ndarray] = None,
+                     min_windows: int = EPISODE_MIN_WINDOWS,
+                     max_gap_windows: int = EPISODE_MAX_GAP_WINDOWS) -> pd.DataFrame:
+    """
+    Junta as janelas anómalas consecutivas em episódios.
+
+    Args:
+        labels: Rótulos de predict_clusters (-1 = anomalia), um por janela.
+        features_df: Features das mesmas janelas (para peak_freq e tremor_power).
+        window_sec: Duração de cada janela, em segundos.
+        step_sec: Passo entre o início de janelas consecutivas, em segundos.
+        distances: Distâncias de score_batch (opcional), para a gravidade máxima.
+        min_windows: Episódios com menos janelas anómalas (sem contar as
+            falhas preenchidas) são descartados.
+        max_gap_windows: Falhas de até este número de janelas normais entre
+            duas anomalias não separam o episódio.
+
+    Returns:
+        DataFrame com uma linha por episódio e as colunas de EPISODE_COLUMNS
+        (NaN nas agregações sem dados).
+    """
+    anomalous = _anomaly_mask(labels, max_gap_windows)
+    starts, lengths, run_values = run_lengths(anomalous)
+    starts, lengths = starts[run_values], lengths[run_values]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=EPISODE_COLUMNS)
+
+    # As falhas preenchidas contam para a duração do episódio mas não para
+    # min_windows nem para as agregações (são janelas normais)
+    really_anomalous = np.asarray(labels) == ANOMALY_LABEL
+
+    # reduceat agrega de starts[i] até starts[i + 1]: os limites incluem o fim
+    # de cada episódio para que as janelas normais seguintes não entrem
+    def episode_bounds(starts: np.ndarray, last: np.ndarray) -> np.ndarray:
+        bounds = np.ravel(np.column_stack((starts, last + 1)))
+        return bounds[bounds < len(anomalous)]
+
+    n_anomalous = np.add.reduceat(really_anomalous.astype(np.int64),
+                                  episode_bounds(starts, starts + lengths - 1))[::2]
+    keep = n_anomalous >= max(1, min_windows)
+    starts, lengths = starts[keep], lengths[keep]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=EPISODE_COLUMNS)
+
+    last = starts + lengths - 1
+    episodes = pd.DataFrame({
+        "start_s": starts * step_sec,
+        "end_s": last * step_sec + window_sec,
+        "duration_s": (last - starts) * step_sec + window_sec,
+        "n_windows": lengths,
+        "first_window": starts,
+        "last_window": last,
+    })
+    bounds = episode_bounds(starts, last)
+
+    def reduce_episodes(values: Optional[np.ndarray], reducer: str) -> np.ndarray:
+        if values is None:
+            return np.full(len(starts), np.nan)
+        values = np.asarray(values, dtype=np.float64)
+        if reducer == "mean":
+            sums = np.add.reduceat(np.where(really_anomalous, values, 0.0), bounds)[::2]
+            counts = np.add.reduceat(really_anomalous.astype(np.int64), bounds)[::2]
+            return sums / counts
+        return np.maximum.reduceat(np.where(really_anomalous, values, -np.inf), bounds)[::2]
+
+    peak_column = _feature_column(features_df, "peak_freq")
+    power_column = _feature_column(features_df, "tremor_power")
+    episodes["mean_peak_freq"] = reduce_episodes(
+        features_df[peak_column].to_numpy() if peak_column else None, "mean")
+    episodes["max_tremor_power"] = reduce_episodes(
+        features_df[power_column].to_numpy() if power_column else None, "max")
+    episodes["max_distance"] = reduce_episodes(distances, "max")
+    return episodes[EPISODE_COLUMNS]
+
+
+def summarize_session(labels: np.ndarray, episodes: pd.DataFrame) -> Dict:
+    """
+    Resumo compacto de uma sessão: contagem de janelas por cluster (com
+    np.unique, sem percorrer os rótulos uma vez por cluster) e estatísticas
+    dos episódios.
+    """
+    labels = np.asarray(labels)
+    cluster_ids, counts = np.unique(labels, return_counts=True)
+    n_windows = len(labels)
+    n_anomalous = int(counts[cluster_ids == ANOMALY_LABEL].sum())
+    durations = episodes["duration_s"].to_numpy(dtype=np.float64) if len(episodes) else np.zeros(0)
+    return {
+        "n_windows": n_windows,
+        "n_anomalous_windows": n_anomalous,
+        "anomalous_fraction": n_anomalous / n_windows if n_windows else 0.0,
+        "cluster_counts": dict(zip(cluster_ids.tolist(), counts.tolist())),
+        "n_episodes": len(episodes),
+        "total_episode_s": float(durations.sum()),
+        "longest_episode_s": float(durations.max()) if len(durations) else 0.0,
+        "mean_episode_s": float(durations.mean()) if len(durations) else 0.0,
+    }
@@ -0,0 +1,144 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Este módulo contém a classe FeatureCache, uma cache em disco dos DataFrames
+de features produzidos pelo SessionProcessor, indexada por um hash SHA-256
+do conteúdo da sessão e dos parâmetros de extração.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from config import FEATURE_CACHE_DIR, FEATURE_CACHE_MAX_MB
+
+# Incrementar quando a extração de features mudar de forma incompatível,
+# para invalidar as entradas antigas
+FEATURE_CACHE_VERSION = 1
+
+CACHE_FILE_EXTENSION = ".npz"
+
+# Tamanho dos blocos lidos ao calcular o hash de um ficheiro
+_HASH_BLOCK_SIZE = 1 << 20
+
+class FeatureCache:
+    """
+    Guarda DataFrames de features em ficheiros .npz (uma coluna por array),
+    um por chave. As chaves combinam o hash do sinal bruto (ou do ficheiro
+    de sessão) com os parâmetros de extração, pelo que uma sessão já vista
+    com os mesmos parâmetros não volta a ser processada.
+
+    Quando o tamanho total ultrapassa max_bytes, as entradas usadas há mais
+    tempo são apagadas (LRU pela data de modificação, atualizada em cada
+    leitura). As escritas são atómicas, pelo que vários processos (ex: o
+    treino em paralelo) podem partilhar a mesma pasta.
+    """
+    def __init__(self, directory: str = FEATURE_CACHE_DIR, max_bytes: int = FEATURE_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _new_hasher(params: Dict):
+        hasher = hashlib.sha256()
+        hasher.update(json.dumps({"version": FEATURE_CACHE_VERSION, **params}, sort_keys=True, default=str).encode())
+        return hasher
+
+    @staticmethod
+    def key_for_array(signal: np.ndarray, params: Dict) -> str:
+        """Chave de um sinal em memória (dtype, forma e conteúdo) com os parâmetros de extração."""
+        hasher = FeatureCache._new_hasher(params)
+        signal = np.ascontiguousarray(signal)
+        hasher.update(f"{signal.dtype.str}{signal.shape}".encode())
+        hasher.update(memoryview(signal).cast("B"))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def key_for_file(source, params: Dict) -> str:
+        """
+        Chave de um ficheiro de sessão (caminho ou objeto de ficheiro, ex: upload
+        do Streamlit) com os parâmetros de extração. Objetos de ficheiro são
+        lidos do início e devolvidos à posição inicial.
+        """
+        hasher = FeatureCache._new_hasher(params)
+        if hasattr(source, "read"):
+            source.seek(0)
+            for block in iter(lambda: source.read(_HASH_BLOCK_SIZE), b""):
+                hasher.update(block if isinstance(block, bytes) else block.encode())
+            source.seek(0)
+        else:
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                    hasher.update(block)
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame guardado com esta chave, ou None se não existir."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = [str(name) for name in data["__columns__"]]
+                features_df = pd.DataFrame({name: data[f"col{i}"] for i, name in enumerate(columns)})
+            os.utime(path)
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            # Entrada inexistente, apagada por outro processo ou corrompida
+            self.misses += 1
+            return None
+        self.hits += 1
+        return features_df
+
+    def put(self, key: str, features_df: pd.DataFrame):
+        """Guarda o DataFrame com esta chave e aplica o limite de tamanho."""
+        arrays = {f"col{i}": features_df[name].to_numpy() for i, name in enumerate(features_df.columns)}
+        arrays["__columns__"] = np.array([str(name) for name in features_df.columns])
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Apaga as entradas menos usadas recentemente até o total caber em max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_FILE_EXTENSION):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Apaga todas as entradas da cache."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(CACHE_FILE_EXTENSION):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
@@ -3,6 +3,49 @@
 from typing import Dict, List
 import numpy as np
 from src.analysis.signal_analyzer import SignalAnalyzer
+from src.utils.session_file import SENSOR_COLUMNS
+
+TREMOR_FEATURES = ["peak_freq", "tremor_power", "total_power", "tremor_index"]
+
+# Os seis eixos da IMU seguidos da magnitude vetorial de cada sensor
+MULTI_AXIS_SIGNALS = SENSOR_COLUMNS + ["accel_mag", "gyro_mag"]
+
+def add_magnitude_signals(axes: np.ndarray) -> np.ndarray:
+    """
+    Acrescenta a magnitude vetorial do acelerómetro e do giroscópio.
+
+    Args:
+        axes: Array (..., 6, n) com os eixos na ordem de SENSOR_COLUMNS.
+
+    Returns:
+        Array (..., 8, n) na ordem de MULTI_AXIS_SIGNALS.
+    """
+    accel_mag = np.sqrt(np.sum(np.square(axes[..., 0:3, :], dtype=np.float64), axis=-2))
+    gyro_mag = np.sqrt(np.sum(np.square(axes[..., 3:6, :], dtype=np.float64), axis=-2))
+    return np.concatenate([axes, accel_mag[..., None, :], gyro_mag[..., None, :]], axis=-2)
+
+def multi_axis_feature_columns(batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Converte o resultado de find_tremor_features_batch sobre (janelas, sinais)
+    em colunas por sinal ('accel_y_tremor_index', ...) e combinadas.
+
+    Combinadas:
+        - 'tremor_index_max': maior índice de tremor entre os sinais.
+        - 'peak_freq_dominant': frequência de pico do sinal com maior índice de tremor.
+    """
+    columns = {}
+    for i, signal_name in enumerate(MULTI_AXIS_SIGNALS):
+        for feature in TREMOR_FEATURES:
+            columns[f"{signal_name}_{feature}"] = batch[feature][:, i]
+
+    dominant = np.argmax(batch["tremor_index"], axis=1)
+    columns["tremor_index_max"] = np.max(batch["tremor_index"], axis=1)
+    columns["peak_freq_dominant"] = np.take_along_axis(batch["peak_freq"], dominant[:, None], axis=1)[:, 0]
+    return columns
+
+def is_multi_axis_feature_set(columns: List[str]) -> bool:
+    """Indica se um conjunto de colunas de features vem da extração multi-eixo."""
+    return any(col.startswith(f"{signal_name}_") for col in columns for signal_name in MULTI_AXIS_SIGNALS)
 
 def _extract_features_from_rest_test(test_result: Dict) -> Dict:
     """Extrai features de um teste de tremor de repouso."""
@@ -18,8 +61,11 @@ def _extract_features_from_rest_test(test_result: Dict) -> Dict:
         print(f"⚠️ AVISO: Sinal muito plano (std={signal_std:.4f}). Pode indicar dados inválidos ou controle desconectado.")
         return {"peak_freq": 0, "tremor_power": 0, "total_power": 0, "tremor_index": 0}
 
-    analyzer = SignalAnalyzer()
-    fft_x, yf, dominant_freq, _ = analyzer.find_tremor_frequency(sensor_readings, sample_rate)
+    # Reaproveita a FFT já calculada pelo chamador, se existir
+    fft_results = test_result.get('fft_results')
+    if fft_results is None:
+        fft_results = SignalAnalyzer().find_tremor_frequency(sensor_readings, sample_rate)
+    fft_x, yf, dominant_freq, _ = fft_results
     
     tremor_mask = (fft_x >= 4.0) & (fft_x <= 8.0)
     tremor_power = np.sum(yf[tremor_mask])
@@ -31,6 +77,17 @@ def _extract_features_from_rest_test(test_result: Dict) -> Dict:
         "total_power": total_power, "tremor_index": tremor_index
     }
 
+def _extract_features_from_multi_axis_rest_test(test_result: Dict) -> Dict:
+    """Extrai as features por eixo e combinadas de um teste de repouso com os seis eixos."""
+    axes = test_result.get('axes', {})
+    sample_rate = test_result.get('sample_rate', 0)
+    if any(len(axes.get(name, [])) == 0 for name in SENSOR_COLUMNS) or sample_rate <= 0:
+        return {}
+
+    signals = add_magnitude_signals(np.array([axes[name] for name in SENSOR_COLUMNS], dtype=np.float64))
+    batch = SignalAnalyzer.find_tremor_features_batch(signals[None, :, :], sample_rate)
+    return {name: float(values[0]) for name, values in multi_axis_feature_columns(batch).items()}
+
 def _extract_features_from_tapping_test(test_result: Dict) -> Dict:
     """Extrai features de um teste de finger tapping."""
     press_timestamps = test_result.get('readings', [])
@@ -61,6 +118,8 @@ def extract_features(test_result: Dict) -> Dict:
 
     if "Repouso" in test_name:
         features.update(_extract_features_from_rest_test(test_result))
+        if 'axes' in test_result:
+            features.update(_extract_features_from_multi_axis_rest_test(test_result))
     elif "Tapping" in test_name:
         features.update(_extract_features_from_tapping_test(test_result))
     # Adicionar aqui 'elif' para outros tipos de teste (ex: Pronação-Supinação)
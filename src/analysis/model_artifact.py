@@ -0,0 +1,162 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Formato compacto do modelo treinado pelo ClusterAnalyzer.
+
+O modelo é um ficheiro .npz sem compressão com apenas o necessário para
+prever: eps, min_samples, nomes das features, média e escala do
+StandardScaler e a matriz dos pontos normais (já normalizados), e
+opcionalmente os arrays da projeção 2D ajustada no treino e os parâmetros
+de extração das features (SessionProcessor.feature_params, em JSON). Não guarda
+objetos Python, pelo que é lido só com NumPy, sem depender da versão do
+scikit-learn, e a matriz dos pontos normais é mapeada em memória
+diretamente do ficheiro.
+
+Conversão de um modelo antigo (joblib) pela linha de comando:
+    python -m src.analysis.model_artifact analyzer_model.joblib analyzer_model.npz
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+MODEL_ARTIFACT_VERSION = 1
+MODEL_ARTIFACT_EXTENSION = ".npz"
+
+# Cabeçalho local de um membro ZIP: assinatura, versão, flags, compressão,
+# hora, data, crc, tamanhos, comprimento do nome e do campo extra
+_ZIP_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+
+# Prefixo dos membros com os arrays da projeção
+_PROJECTION_PREFIX = "projection_array_"
+
+@dataclass
+class ModelArtifact:
+    """Conteúdo de um modelo compacto."""
+    version: int
+    eps: float
+    min_samples: int
+    feature_columns: List[str]
+    scaler_mean: np.ndarray
+    scaler_scale: np.ndarray
+    normal_points: np.ndarray
+    # Projeção ajustada no treino ("" se não existir) e os seus arrays
+    projection_method: str = ""
+    projection_arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    # Parâmetros do SessionProcessor que extraiu as features do treino ({} se desconhecidos)
+    feature_params: Dict = field(default_factory=dict)
+
+
+def save_model_artifact(path: str, artifact: ModelArtifact):
+    """Grava o modelo num .npz sem compressão (escrita atómica)."""
+    arrays = {
+        "format_version": np.array(MODEL_ARTIFACT_VERSION),
+        "eps": np.array(artifact.eps, dtype=np.float64),
+        "min_samples": np.array(artifact.min_samples, dtype=np.int64),
+        "feature_columns": np.array(artifact.feature_columns, dtype=str),
+        "scaler_mean": np.asarray(artifact.scaler_mean, dtype=np.float64),
+        "scaler_scale": np.asarray(artifact.scaler_scale, dtype=np.float64),
+        "normal_points": np.ascontiguousarray(artifact.normal_points, dtype=np.float64),
+    }
+    if artifact.projection_method:
+        arrays["projection_method"] = np.array(artifact.projection_method)
+        for name, values in artifact.projection_arrays.items():
+            arrays[f"{_PROJECTION_PREFIX}{name}"] = np.asarray(values, dtype=np.float64)
+    if artifact.feature_params:
+        arrays["feature_params"] = np.array(json.dumps(artifact.feature_params, sort_keys=True))
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _memmap_npz_member(path: str, name: str) -> np.ndarray:
+    """
+    Mapeia em memória um array de um .npz sem compressão, localizando o
+    ficheiro .npy do membro dentro do ZIP.
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"O array '{name}' de '{path}' está comprimido e não pode ser mapeado em memória.")
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        fields = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+        name_length, extra_length = fields[-2], fields[-1]
+        f.seek(info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def load_model_artifact(path: str, mmap: bool = True) -> ModelArtifact:
+    """
+    Lê um modelo compacto.
+
+    Args:
+        path: Caminho do ficheiro .npz.
+        mmap: Se True, a matriz dos pontos normais é mapeada em memória em
+            vez de lida para a RAM.
+
+    Raises:
+        ValueError: Se o ficheiro não for um modelo ou tiver uma versão mais recente.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if "format_version" not in data.files:
+            raise ValueError(f"Ficheiro '{path}' não é um modelo APOLO.")
+        version = int(data["format_version"])
+        if version > MODEL_ARTIFACT_VERSION:
+            raise ValueError(f"Versão de modelo não suportada em '{path}' (versão {version}).")
+        artifact = ModelArtifact(
+            version=version,
+            eps=float(data["eps"]),
+            min_samples=int(data["min_samples"]),
+            feature_columns=[str(name) for name in data["feature_columns"]],
+            scaler_mean=data["scaler_mean"],
+            scaler_scale=data["scaler_scale"],
+            normal_points=None if mmap else data["normal_points"],
+        )
+        if "projection_method" in data.files:
+            artifact.projection_method = str(data["projection_method"])
+            artifact.projection_arrays = {
+                name[len(_PROJECTION_PREFIX):]: data[name]
+                for name in data.files if name.startswith(_PROJECTION_PREFIX)
+            }
+        if "feature_params" in data.files:
+            artifact.feature_params = json.loads(str(data["feature_params"]))
+    if mmap:
+        artifact.normal_points = _memmap_npz_member(path, "normal_points")
+    return artifact
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    from src.analysis.cluster_analyzer import ClusterAnalyzer
+    ClusterAnalyzer.load_model(sys.argv[1]).save_model(sys.argv[2])
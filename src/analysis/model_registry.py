@@ -0,0 +1,159 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Este módulo contém a classe ModelRegistry, que mantém os modelos de vários
+pacientes no mesmo processo (por exemplo, um servidor que monitoriza vários
+controles).
+
+Cada paciente tem o seu modelo em MODEL_REGISTRY_DIR/<id>.npz (ou .joblib, no
+formato antigo), carregado numa instância independente do ClusterAnalyzer na
+primeira vez que é pedido. Os modelos ficam em memória por ordem de uso e,
+acima de MODEL_REGISTRY_MAX_MODELS, os menos usados recentemente são
+descartados (voltam a ser lidos do disco se forem pedidos outra vez).
+
+A troca de um modelo (swap, reload, save) é atómica: o novo analyzer é
+preparado fora do lock e a entrada é substituída de uma só vez. Quem já tinha
+obtido o modelo anterior termina a predição com ele; os pedidos seguintes
+recebem o novo.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from src.analysis.cluster_analyzer import ClusterAnalyzer
+from src.analysis.model_artifact import MODEL_ARTIFACT_EXTENSION
+from config import MODEL_REGISTRY_DIR, MODEL_REGISTRY_MAX_MODELS
+
+# Extensão dos modelos no formato antigo (objeto completo gravado com joblib)
+LEGACY_MODEL_EXTENSION = ".joblib"
+
+def _check_patient_id(patient_id: str):
+    """O ID é usado como nome de ficheiro: não pode ser vazio nem conter caminhos."""
+    if not patient_id or os.path.basename(patient_id) != patient_id or patient_id in (".", ".."):
+        raise ValueError(f"ID de paciente inválido: '{patient_id}'")
+
+class ModelRegistry:
+    """
+    Modelos treinados por paciente, carregados a pedido e limitados por LRU.
+    Pode ser usado por várias threads ao mesmo tempo.
+    """
+    def __init__(self, model_dir: str = MODEL_REGISTRY_DIR, max_models: int = MODEL_REGISTRY_MAX_MODELS):
+        if max_models < 1:
+            raise ValueError("max_models tem de ser pelo menos 1.")
+        self.model_dir = model_dir
+        self.max_models = max_models
+        self._models: "OrderedDict[str, ClusterAnalyzer]" = OrderedDict()  # Do menos para o mais usado
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def model_path(self, patient_id: str) -> str:
+        """Caminho do modelo do paciente: o .npz, ou o .joblib se só existir esse."""
+        _check_patient_id(patient_id)
+        path = os.path.join(self.model_dir, patient_id + MODEL_ARTIFACT_EXTENSION)
+        legacy_path = os.path.join(self.model_dir, patient_id + LEGACY_MODEL_EXTENSION)
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            return legacy_path
+        return path
+
+    def get(self, patient_id: str) -> ClusterAnalyzer:
+        """
+        Retorna o modelo do paciente, carregando-o do disco se não estiver em
+        memória.
+
+        Raises:
+            FileNotFoundError: Se o paciente não tiver modelo em model_dir.
+        """
+        with self._lock:
+            analyzer = self._models.get(patient_id)
+            if analyzer is not None:
+                self._models.move_to_end(patient_id)
+                self.hits += 1
+                return analyzer
+            self.misses += 1
+        # A leitura é feita fora do lock para não atrasar os outros pacientes;
+        # se duas threads carregarem o mesmo modelo, fica o primeiro
+        analyzer = self._load(patient_id)
+        with self._lock:
+            analyzer = self._models.setdefault(patient_id, analyzer)
+            self._models.move_to_end(patient_id)
+            self._evict()
+        return analyzer
+
+    def swap(self, patient_id: str, analyzer: ClusterAnalyzer) -> Optional[ClusterAnalyzer]:
+        """Substitui atomicamente o modelo em memória do paciente e retorna o anterior (ou None)."""
+        if analyzer.feature_columns is None:
+            raise RuntimeError("O modelo deve ser treinado com 'fit()' antes de ser registado.")
+        with self._lock:
+            previous = self._models.get(patient_id)
+            self._models[patient_id] = analyzer
+            self._models.move_to_end(patient_id)
+            self._evict()
+        return previous
+
+    def reload(self, patient_id: str) -> ClusterAnalyzer:
+        """Volta a ler o modelo do paciente do disco (ex: após um novo treino) e troca-o atomicamente."""
+        analyzer = self._load(patient_id)
+        self.swap(patient_id, analyzer)
+        return analyzer
+
+    def save(self, patient_id: str, analyzer: ClusterAnalyzer) -> str:
+        """
+        Grava o modelo do paciente em model_dir (formato .npz, escrita atómica)
+        e passa a servi-lo de imediato. Retorna o caminho gravado.
+        """
+        _check_patient_id(patient_id)
+        os.makedirs(self.model_dir, exist_ok=True)
+        path = os.path.join(self.model_dir, patient_id + MODEL_ARTIFACT_EXTENSION)
+        analyzer.save_model(path)
+        self.swap(patient_id, analyzer)
+        return path
+
+    def evict(self, patient_id: str) -> bool:
+        """Descarta o modelo do paciente da memória. Retorna False se não estava carregado."""
+        with self._lock:
+            return self._models.pop(patient_id, None) is not None
+
+    def loaded_patients(self) -> List[str]:
+        """IDs dos pacientes com modelo em memória, do menos para o mais usado recentemente."""
+        with self._lock:
+            return list(self._models)
+
+    def available_patients(self) -> List[str]:
+        """IDs dos pacientes com modelo em model_dir."""
+        if not os.path.isdir(self.model_dir):
+            return []
+        extensions = (MODEL_ARTIFACT_EXTENSION, LEGACY_MODEL_EXTENSION)
+        return sorted({os.path.splitext(name)[0] for name in os.listdir(self.model_dir)
+                       if name.endswith(extensions)})
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso da cache de modelos."""
+        with self._lock:
+            return {"loaded": len(self._models), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+    def __contains__(self, patient_id: str) -> bool:
+        with self._lock:
+            return patient_id in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+    def _load(self, patient_id: str) -> ClusterAnalyzer:
+        path = self.model_path(patient_id)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Modelo do paciente '{patient_id}' não encontrado em '{self.model_dir}'.")
+        return ClusterAnalyzer.load_model(path, shared=False)
+
+    def _evict(self):
+        """Descarta os modelos menos usados acima de max_models (chamado com o lock)."""
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+            self.evictions += 1
@@ -0,0 +1,186 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Este módulo contém a classe OnlineAnomalyMonitor, que avalia o sinal do
+controle janela a janela à medida que as amostras chegam, usando a mesma
+segmentação do SessionProcessor e o modelo do ClusterAnalyzer.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from src.analysis.cluster_analyzer import ClusterAnalyzer
+from src.analysis.session_processor import SessionProcessor
+from src.analysis.feature_extractor import is_multi_axis_feature_set, TREMOR_FEATURES
+from src.hardware.capture_buffer import interpolate_at
+from config import MONITOR_WINDOW_SEC, MONITOR_OVERLAP, TARGET_SAMPLE_RATE, MONITOR_TIMELINE_MAX_WINDOWS
+
+class OnlineAnomalyMonitor:
+    """
+    Monitorização contínua: reamostra as amostras recebidas para a taxa do
+    SessionProcessor, fecha as janelas à medida que ficam completas e
+    classifica cada uma com o modelo treinado.
+
+    Os resultados são publicados numa linha temporal limitada
+    (MONITOR_TIMELINE_MAX_WINDOWS), que a interface consulta sem bloquear.
+    Se o modelo foi treinado com features multi-eixo, as janelas usam os
+    seis eixos da IMU; caso contrário, apenas o eixo X do acelerómetro.
+    O processor é criado com os parâmetros de extração guardados no modelo
+    (ClusterAnalyzer.feature_params); um processor explícito tem de ser
+    compatível com eles. Com um processor de motor 'sliding', as features são mantidas por um
+    SlidingSpectrumTracker a cada amostra, em vez de uma FFT por janela.
+    """
+    def __init__(self, analyzer: ClusterAnalyzer, processor: Optional[SessionProcessor] = None,
+                 max_windows: int = MONITOR_TIMELINE_MAX_WINDOWS):
+        self.analyzer = analyzer
+        if processor is None:
+            # Os parâmetros de config.py só valem para os modelos antigos, que não guardam os do treino
+            processor = SessionProcessor.from_feature_params(
+                analyzer.feature_params, window_size_sec=MONITOR_WINDOW_SEC, sample_rate_hz=TARGET_SAMPLE_RATE,
+                overlap=MONITOR_OVERLAP, multi_axis=is_multi_axis_feature_set(analyzer.feature_columns or [])
+            )
+        else:
+            processor.check_feature_params(analyzer.feature_params)
+        self.processor = processor
+        self.timeline = deque(maxlen=max_windows)
+        self._timeline_lock = threading.Lock()
+        self.lost_samples = 0
+        self._source = None
+        self._cursor = 0
+        self.reset()
+
+    def reset(self):
+        """Descarta o sinal pendente e a linha temporal."""
+        with self._timeline_lock:
+            self.timeline.clear()
+        self.lost_samples = 0
+        self._signal = np.empty((0, 6))  # Sinal uniforme (n, 6) ainda necessário para as próximas janelas
+        self._signal_offset = 0        # Índice global da primeira amostra de _signal
+        self._next_start = 0           # Índice global do início da próxima janela
+        self._last_raw = None          # Última amostra bruta (timestamp_ns, valores), para interpolar entre blocos
+        self._grid_origin_ns = None    # Instante da amostra uniforme de índice 0
+        self._grid_count = 0           # Amostras uniformes já produzidas
+        self._tracker = self.processor.make_tracker() if self.processor.engine == "sliding" else None
+
+    def swap_analyzer(self, analyzer: ClusterAnalyzer):
+        """
+        Troca o modelo usado nas próximas janelas (ex: ModelRegistry.reload após
+        um novo treino), sem perder o sinal pendente nem a linha temporal.
+
+        Raises:
+            ValueError: Se o novo modelo usar outras features ou outros
+                parâmetros de extração.
+        """
+        if list(analyzer.feature_columns or []) != list(self.analyzer.feature_columns or []):
+            raise ValueError("O novo modelo tem de usar as mesmas features do atual.")
+        self.processor.check_feature_params(analyzer.feature_params)
+        self.analyzer = analyzer
+
+    def attach(self, sensor_controller):
+        """Começa a consumir as amostras que o controle receber a partir de agora."""
+        self.reset()
+        self._source = sensor_controller
+        self._cursor = sensor_controller.sample_cursor
+
+    def update(self) -> List[Dict]:
+        """Lê as amostras novas do controle associado e avalia as janelas completas."""
+        if self._source is None:
+            return []
+        timestamps_ns, values, self._cursor, lost = self._source.read_samples_since(self._cursor)
+        self.lost_samples += lost
+        return self.push_samples(timestamps_ns, values)
+
+    def push_samples(self, timestamps_ns: np.ndarray, values: np.ndarray) -> List[Dict]:
+        """
+        Acrescenta amostras brutas (timestamps irregulares) e avalia as janelas
+        que ficarem completas.
+
+        Args:
+            timestamps_ns: Timestamps monotónicos (n,) em nanossegundos.
+            values: Amostras (n, 6) na ordem de IMU_AXES.
+
+        Returns:
+            Lista com as entradas da linha temporal das novas janelas.
+        """
+        if len(timestamps_ns) == 0:
+            return []
+        if self._last_raw is not None:
+            timestamps_ns = np.concatenate([[self._last_raw[0]], timestamps_ns])
+            values = np.concatenate([self._last_raw[1][None, :], values])
+        self._last_raw = (timestamps_ns[-1], values[-1])
+        if self._grid_origin_ns is None:
+            self._grid_origin_ns = int(timestamps_ns[0])
+
+        # Pontos da grelha uniforme cobertos pelas amostras recebidas
+        period_ns = 1e9 / self.processor.sample_rate_hz
+        last_index = int((timestamps_ns[-1] - self._grid_origin_ns) // period_ns)
+        grid_indices = np.arange(self._grid_count, last_index + 1)
+        if len(grid_indices) == 0:
+            return []
+        grid_ns = self._grid_origin_ns + np.round(grid_indices * period_ns).astype(np.int64)
+        if len(timestamps_ns) > 1:
+            uniform = interpolate_at(timestamps_ns, values, grid_ns)
+        else:
+            uniform = np.repeat(values[-1:], len(grid_ns), axis=0)
+        self._grid_count = last_index + 1
+        self._signal = np.concatenate([self._signal, uniform])
+
+        return self._score_complete_windows(uniform)
+
+    def _score_complete_windows(self, new_samples: np.ndarray) -> List[Dict]:
+        window, step = self.processor.window_size_samples, self.processor.step
+        start_time = time.perf_counter()
+        # O tracker tem de receber todas as amostras, mesmo sem janelas novas
+        tracked = self._tracker.push(new_samples[:, 0]) if self._tracker is not None else None
+
+        n_available = self._signal_offset + len(self._signal)
+        n_windows = len(range(self._next_start, n_available - window + 1, step))
+        if n_windows == 0:
+            return []
+
+        if tracked is not None:
+            features_df = pd.DataFrame({name: tracked[name] for name in TREMOR_FEATURES})
+        else:
+            local_start = self._next_start - self._signal_offset
+            signal = self._signal if self.processor.multi_axis else self._signal[:, 0]
+            windows = self.processor.window_view(signal, local_start, n_windows)
+            features_df, _ = self.processor.extract_window_features(windows)
+        analyzer = self.analyzer  # Uma troca de modelo a meio só vale para as janelas seguintes
+        distances, _ = analyzer.score_batch(features_df[analyzer.feature_columns])
+        labels = analyzer.labels_from_scores(distances)
+        latency_ms = (time.perf_counter() - start_time) * 1000 / n_windows
+
+        # A linha temporal mostra sempre as features do eixo X do acelerómetro
+        prefix = "accel_x_" if self.processor.multi_axis else ""
+        starts = self._next_start + step * np.arange(n_windows)
+        entries = []
+        for i in range(n_windows):
+            entry = {
+                "time_s": (starts[i] + window) / self.processor.sample_rate_hz,
+                "peak_freq": float(features_df[prefix + "peak_freq"].iat[i]),
+                "tremor_power": float(features_df[prefix + "tremor_power"].iat[i]),
+                "tremor_index": float(features_df[prefix + "tremor_index"].iat[i]),
+                "anomalous": bool(labels[i] == -1),
+                "anomaly_distance": float(distances[i]),
+                "latency_ms": latency_ms,
+            }
+            entries.append(entry)
+        with self._timeline_lock:
+            self.timeline.extend(entries)
+
+        self._next_start += n_windows * step
+        self._signal = self._signal[self._next_start - self._signal_offset:]
+        self._signal_offset = self._next_start
+        return entries
+
+    def timeline_df(self) -> pd.DataFrame:
+        """Retorna uma cópia da linha temporal como DataFrame (pode ser chamado de outra thread)."""
+        with self._timeline_lock:
+            entries = list(self.timeline)
+        return pd.DataFrame(entries)
@@ -0,0 +1,168 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Escolha automática dos parâmetros do DBSCAN.
+
+- k_distance_matrix: distâncias aos k_max vizinhos mais próximos, calculadas
+  uma vez; o gráfico K-Distance de qualquer k ≤ k_max é uma coluna ordenada.
+- find_knee / suggest_eps: "cotovelo" da curva K-Distance (o ponto mais
+  afastado da reta entre o primeiro e o último ponto da curva ordenada),
+  usado como eps.
+- sweep_dbscan_parameters: número de clusters e fração de ruído do DBSCAN
+  para uma grelha de (eps, min_samples), a partir de uma única consulta de
+  vizinhança ao maior eps, sem voltar a treinar.
+
+As features são normalizadas com o StandardScaler, como no treino. Tal como
+no DBSCAN do scikit-learn, cada ponto conta como seu próprio vizinho: o k-ésimo
+vizinho de um ponto inclui-o a ele, pelo que o eps sugerido para k é o
+adequado a min_samples = k.
+"""
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+from config import PARAM_SWEEP_EPS_VALUES, PARAM_SWEEP_EPS_SPREAD
+
+def _scale(features_df: pd.DataFrame) -> np.ndarray:
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler().fit_transform(features_df)
+
+
+def k_distance_matrix(features_df: pd.DataFrame, k_max: int) -> np.ndarray:
+    """
+    Distâncias de cada janela aos seus k_max vizinhos mais próximos (incluindo
+    a própria), por ordem crescente: array (n_janelas, k_max).
+    """
+    if features_df.empty:
+        return np.zeros((0, k_max))
+    from sklearn.neighbors import NearestNeighbors
+    scaled_data = _scale(features_df)
+    k_max = min(k_max, len(scaled_data))
+    distances, _ = NearestNeighbors(n_neighbors=k_max).fit(scaled_data).kneighbors(scaled_data)
+    return distances
+
+
+def k_distance_curve(distances: np.ndarray, k: int) -> np.ndarray:
+    """Curva K-Distance (distâncias ao k-ésimo vizinho, ordenadas) a partir de k_distance_matrix."""
+    return np.sort(distances[:, k - 1])
+
+
+def find_knee(curve: np.ndarray) -> Optional[int]:
+    """
+    Índice do cotovelo de uma curva crescente: o ponto mais afastado da reta
+    que une o primeiro e o último ponto, com ambos os eixos normalizados.
+    Retorna None se a curva for demasiado curta ou plana.
+    """
+    if len(curve) < 3 or curve[-1] <= curve[0]:
+        return None
+    x = np.linspace(0.0, 1.0, len(curve))
+    y = (curve - curve[0]) / (curve[-1] - curve[0])
+    # Numa curva convexa o cotovelo fica abaixo da diagonal
+    return int(np.argmax(x - y))
+
+
+def suggest_eps(features_df: pd.DataFrame, min_samples: int,
+                distances: Optional[np.ndarray] = None) -> Optional[float]:
+    """
+    eps sugerido para min_samples: o valor da curva K-Distance (k = min_samples)
+    no seu cotovelo. 'distances' permite reaproveitar um k_distance_matrix.
+    """
+    if distances is None:
+        distances = k_distance_matrix(features_df, min_samples)
+    if len(distances) == 0 or min_samples > distances.shape[1]:
+        return None
+    curve = k_distance_curve(distances, min_samples)
+    knee = find_knee(curve)
+    return None if knee is None else float(curve[knee])
+
+
+def eps_grid(center: float, n_values: int = PARAM_SWEEP_EPS_VALUES,
+             spread: float = PARAM_SWEEP_EPS_SPREAD) -> np.ndarray:
+    """Valores de eps entre (1 - spread) e (1 + spread) vezes 'center'."""
+    return np.round(np.linspace(center * (1 - spread), center * (1 + spread), n_values), 4)
+
+
+def sweep_dbscan_parameters(features_df: pd.DataFrame, eps_values: Sequence[float],
+                            min_samples_values: Sequence[int],
+                            distances: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Resultado do DBSCAN para cada combinação de eps e min_samples, sem treinar
+    nenhum modelo.
+
+    É feita uma única consulta de vizinhança ao maior eps. Para cada
+    min_samples, a distância de core de um ponto (ao seu min_samples-ésimo
+    vizinho, lida de um k_distance_matrix que pode ser reaproveitado em
+    'distances') é o menor eps com que ele é core point, e dois core points ficam
+    ligados a partir de eps = max(distância entre eles, distâncias de core).
+    Cada ligação é atribuída ao primeiro eps da grelha em que existe, e as
+    componentes ligadas dos core points são fundidas eps a eps só com as
+    ligações novas, pelo que cada par é processado uma vez por min_samples.
+    Um ponto deixa de ser ruído a partir do menor max(distância, distância de
+    core) a um vizinho. O número de clusters e de pontos de ruído são os
+    mesmos do DBSCAN(eps, min_samples). A memória usada é a da vizinhança ao
+    maior eps, a mesma de um único treino com esse eps.
+
+    Returns:
+        DataFrame com as colunas eps, min_samples, n_clusters, n_noise,
+        noise_fraction e largest_cluster_fraction, uma linha por combinação.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+    from sklearn.neighbors import NearestNeighbors
+
+    columns = ["eps", "min_samples", "n_clusters", "n_noise", "noise_fraction", "largest_cluster_fraction"]
+    if features_df.empty or not len(eps_values) or not len(min_samples_values):
+        return pd.DataFrame(columns=columns)
+
+    min_samples_values = sorted(set(int(min_samples) for min_samples in min_samples_values))
+    if distances is None or distances.shape[1] < min(min_samples_values[-1], len(features_df)):
+        distances = k_distance_matrix(features_df, min_samples_values[-1])
+    scaled_data = _scale(features_df)
+    n_points = len(scaled_data)
+    eps_values = sorted(float(eps) for eps in eps_values)
+    neighbors = NearestNeighbors(radius=eps_values[-1]).fit(scaled_data)
+    pair_distances, indices = neighbors.radius_neighbors(scaled_data)
+    counts = np.array([len(ind) for ind in indices])
+    row_start = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rows_all = np.repeat(np.arange(n_points), counts)
+    cols_all = np.concatenate(indices)
+    dist_all = np.concatenate(pair_distances)
+    del pair_distances, indices
+    # Cada par aparece nos dois sentidos e cada ponto é vizinho de si próprio
+    link = rows_all < cols_all
+    link_rows, link_cols, link_dist = rows_all[link], cols_all[link], dist_all[link]
+    del rows_all, link
+
+    results = []
+    for min_samples in min_samples_values:
+        core_distance = np.full(n_points, np.inf)
+        if min_samples <= distances.shape[1]:
+            core_distance = distances[:, min_samples - 1]
+        # eps a partir do qual o ponto tem um core point a menos de eps (ou é core)
+        reach = np.minimum.reduceat(np.maximum(dist_all, core_distance[cols_all]), row_start)
+
+        weight = np.maximum(link_dist, np.maximum(core_distance[link_rows], core_distance[link_cols]))
+        # Índice do primeiro eps com weight <= eps (len(eps_values) se nenhum)
+        level = np.searchsorted(eps_values, weight)
+        component = np.arange(n_points)
+        for index, eps in enumerate(eps_values):
+            new_links = level == index
+            if new_links.any():
+                graph = csr_matrix((np.ones(new_links.sum(), dtype=bool),
+                                    (component[link_rows[new_links]], component[link_cols[new_links]])),
+                                   shape=(n_points, n_points))
+                _, merged = connected_components(graph, directed=False)
+                component = merged[component]
+            is_core = core_distance <= eps
+            cluster_sizes = np.bincount(np.unique(component[is_core], return_inverse=True)[1].ravel())
+            n_noise = int(np.sum(reach > eps))
+            results.append({
+                "eps": eps, "min_samples": int(min_samples), "n_clusters": len(cluster_sizes),
+                "n_noise": n_noise, "noise_fraction": n_noise / n_points,
+                # Tamanho aproximado: conta só os core points de cada cluster
+                "largest_cluster_fraction": cluster_sizes.max() / n_points if len(cluster_sizes) else 0.0,
+            })
+    return pd.DataFrame(results, columns=columns).sort_values(["eps", "min_samples"], ignore_index=True)
@@ -5,52 +5,244 @@
 Este módulo contém a classe SessionProcessor, responsável por transformar
 dados brutos de uma sessão de movimento em um DataFrame de features.
 """
+from typing import Callable, Dict, Iterator, List, Optional
+import numpy as np
 import pandas as pd
-from src.analysis.signal_analyzer import SignalAnalyzer
-from src.analysis.feature_extractor import _extract_features_from_rest_test
+from numpy.lib.recfunctions import structured_to_unstructured
+from numpy.lib.stride_tricks import sliding_window_view
+from src.analysis.signal_analyzer import SignalAnalyzer, TREMOR_FREQ_MIN, TREMOR_FREQ_MAX
+from src.analysis.feature_cache import FeatureCache
+from src.analysis.spectral_tracker import SlidingSpectrumTracker
+from src.analysis.feature_extractor import (
+    _extract_features_from_rest_test, add_magnitude_signals, multi_axis_feature_columns,
+    MULTI_AXIS_SIGNALS, TREMOR_FEATURES
+)
+from src.utils.session_file import SESSION_FILE_EXTENSION, SENSOR_COLUMNS, open_session_memmap
+from config import CSV_CHUNK_SIZE, WELCH_SEGMENT_SEC, WELCH_WINDOW, WELCH_OVERLAP
+
+ACCEL_COLUMNS = ['accel_x', 'Accel_X', 'ACCEL_X', 'acceleration_x', 'ax']
+
+# Número máximo de janelas transformadas por cada rfft no modo em lote
+BATCH_MAX_WINDOWS = 4096
 
 class SessionProcessor:
     """
     Processa uma sessão de dados brutos, segmenta-a em janelas
     e extrai features de cada janela.
+
+    Motores disponíveis:
+        - 'batch': todas as janelas numa view strided e uma rfft por lote (default).
+        - 'loop': uma FFT por janela, num ciclo Python (implementação original).
+        - 'sliding': DFT deslizante sobre os bins da faixa de tremor
+          (SlidingSpectrumTracker), O(bins) por amostra. As features são
+          potências, equivalentes a spectral_method='welch' com uma janela
+          retangular de um só segmento; spectral_method é ignorado.
+
+    Com multi_axis=True, as features são extraídas dos seis eixos da IMU e da
+    magnitude vetorial de cada sensor (MULTI_AXIS_SIGNALS), com uma única rfft
+    sobre um array (janelas × sinais × amostras); caso contrário, apenas do
+    eixo X do acelerómetro.
+
+    spectral_method escolhe o estimador espectral das features ('fft' ou
+    'welch', ver SignalAnalyzer.find_tremor_frequency); por omissão,
+    SPECTRAL_METHOD de config.py.
+
+    As features de motores ou estimadores diferentes têm escalas diferentes:
+    um modelo treinado guarda feature_params() e as sessões a avaliar com ele
+    devem ser processadas por from_feature_params.
+
+    Com uma FeatureCache, as features de cada sessão ficam guardadas em disco
+    e uma sessão com o mesmo conteúdo e os mesmos parâmetros não volta a ser
+    processada.
     """
-    def __init__(self, window_size_sec: float = 2.0, sample_rate_hz: int = 100, overlap: float = 0.5):
+    def __init__(self, window_size_sec: float = 2.0, sample_rate_hz: int = 100, overlap: float = 0.5,
+                 engine: str = "batch", multi_axis: bool = False, spectral_method: Optional[str] = None,
+                 cache: Optional[FeatureCache] = None):
+        if engine not in ("batch", "loop", "sliding"):
+            raise ValueError(f"Motor de processamento desconhecido: '{engine}'")
+        if multi_axis and engine != "batch":
+            raise ValueError("A extração multi-eixo só está disponível no motor 'batch'.")
         self.window_size_sec = window_size_sec
         self.sample_rate_hz = sample_rate_hz
         self.window_size_samples = int(self.window_size_sec * self.sample_rate_hz)
+        self.overlap = overlap
         self.step = int(self.window_size_samples * (1 - overlap))
         if self.step == 0: self.step = 1
+        self.engine = engine
+        self.multi_axis = multi_axis
+        self.spectral_method = SignalAnalyzer.resolve_spectral_method(spectral_method)
+        self.cache = cache
+
+    @staticmethod
+    def _find_accel_column(columns) -> Optional[str]:
+        """Procura a coluna de aceleração entre os nomes conhecidos."""
+        for col in ACCEL_COLUMNS:
+            if col in columns:
+                return col
+        return None
+
+    def _signal_columns(self, columns) -> Optional[List[str]]:
+        """Colunas de sinal a ler da sessão, ou None se alguma não existir."""
+        accel_col = self._find_accel_column(columns)
+        if accel_col is None:
+            return None
+        if not self.multi_axis:
+            return [accel_col]
+        other_axes = SENSOR_COLUMNS[1:]
+        if any(col not in columns for col in other_axes):
+            return None
+        return [accel_col] + other_axes
+
+    def _missing_columns_error(self, columns):
+        expected = "de aceleração" if not self.multi_axis else f"dos sensores ({', '.join(SENSOR_COLUMNS)})"
+        print(f"ERRO: Coluna {expected} não encontrada. Colunas disponíveis: {list(columns)}")
+
+    def cache_params(self) -> Dict:
+        """Parâmetros que determinam as features extraídas, usados nas chaves da cache."""
+        # Os motores 'batch' e 'loop' produzem as mesmas features; o 'sliding' usa potências
+        spectral = "sliding" if self.engine == "sliding" else self.spectral_method
+        params = {
+            "window_size_samples": self.window_size_samples, "step": self.step,
+            "sample_rate_hz": self.sample_rate_hz, "multi_axis": self.multi_axis,
+            "spectral": spectral, "tremor_band": [TREMOR_FREQ_MIN, TREMOR_FREQ_MAX]
+        }
+        if spectral == "welch":
+            params["welch"] = [WELCH_SEGMENT_SEC, WELCH_WINDOW, WELCH_OVERLAP]
+        return params
+
+    def feature_params(self) -> Dict:
+        """
+        Argumentos do construtor que determinam as features, guardados com o
+        modelo treinado (ClusterAnalyzer.fit) para recriar um processador
+        compatível com from_feature_params.
+        """
+        params = {
+            # 'batch' e 'loop' produzem as mesmas features; o 'batch' é o mais rápido
+            "engine": "sliding" if self.engine == "sliding" else "batch",
+            "spectral_method": self.spectral_method, "window_size_sec": self.window_size_sec,
+            "sample_rate_hz": self.sample_rate_hz, "overlap": self.overlap, "multi_axis": self.multi_axis
+        }
+        if self.engine != "sliding" and self.spectral_method == "welch":
+            params["welch"] = [WELCH_SEGMENT_SEC, WELCH_WINDOW, WELCH_OVERLAP]
+        return params
+
+    def check_feature_params(self, params: Dict):
+        """
+        Verifica se este processador extrai as mesmas features de um modelo
+        treinado com 'params' (ClusterAnalyzer.feature_params). Os modelos
+        antigos, sem parâmetros guardados, não são verificados.
+
+        Raises:
+            ValueError: Se os parâmetros forem diferentes.
+        """
+        if not params:
+            return
+        current = self.feature_params()
+        differences = [f"{name}: {params.get(name)} no modelo, {current.get(name)} aqui"
+                       for name in sorted(set(params) | set(current)) if params.get(name) != current.get(name)]
+        if differences:
+            raise ValueError("O modelo foi treinado com outras features ("
+                             + "; ".join(differences) + "). Processe a sessão com "
+                             "SessionProcessor.from_feature_params ou volte a treinar o modelo.")
+
+    @classmethod
+    def from_feature_params(cls, params: Dict, **options) -> "SessionProcessor":
+        """
+        Processador que extrai as mesmas features de um modelo treinado
+        (params = ClusterAnalyzer.feature_params). 'options' são os restantes
+        argumentos do construtor (ex: cache) e os valores usados com os
+        modelos antigos, que não guardam estes parâmetros.
+
+        Raises:
+            ValueError: Se o modelo usar parâmetros de Welch diferentes dos de config.py.
+        """
+        processor = cls(**{**options, **{name: value for name, value in params.items() if name != "welch"}})
+        processor.check_feature_params(params)
+        return processor
+
+    def _cached(self, make_key: Callable[[Dict], str], compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Retorna as features da cache, se existirem; caso contrário calcula-as e guarda-as."""
+        if self.cache is None:
+            return compute()
+        key = make_key(self.cache_params())
+        features_df = self.cache.get(key)
+        if features_df is not None:
+            print(f"Features lidas da cache ({len(features_df)} janelas).")
+            return features_df
+        features_df = compute()
+        if not features_df.empty:
+            self.cache.put(key, features_df)
+        return features_df
+
+    def window_view(self, signal: np.ndarray, start: int, n_windows: int) -> np.ndarray:
+        """
+        View sem cópia das janelas do sinal: (janelas, amostras) para um sinal
+        (n,) ou (janelas, eixos, amostras) para um sinal (n, eixos).
+        """
+        return sliding_window_view(signal, self.window_size_samples, axis=0)[start::self.step][:n_windows]
+
+    def _num_windows(self, n_samples: int) -> int:
+        """Número de janelas geradas por range(0, n_samples - janela, passo)."""
+        return len(range(0, n_samples - self.window_size_samples, self.step))
 
     def process_session_df(self, raw_df: pd.DataFrame) -> pd.DataFrame:
         """
         Recebe um DataFrame bruto de uma sessão e retorna um DataFrame de features.
         """
-        all_features = []
-        fft_analyzer = SignalAnalyzer()
-        
-        accel_columns = ['accel_x', 'Accel_X', 'ACCEL_X', 'acceleration_x', 'ax']
-        accel_col = None
-        for col in accel_columns:
-            if col in raw_df.columns:
-                accel_col = col
-                break
-        
-        if accel_col is None:
-            print(f"ERRO: Coluna de aceleração não encontrada. Colunas disponíveis: {list(raw_df.columns)}")
+        columns = self._signal_columns(raw_df.columns)
+        if columns is None:
+            self._missing_columns_error(raw_df.columns)
             return pd.DataFrame()
-        
-        signal = raw_df[accel_col].to_numpy()
-        
+
+        signal = raw_df[columns].to_numpy() if self.multi_axis else raw_df[columns[0]].to_numpy()
+        return self._cached(lambda params: FeatureCache.key_for_array(signal, params),
+                            lambda: self._process_signal(signal))
+
+    def process_session_binary(self, path: str) -> pd.DataFrame:
+        """
+        Processa uma sessão gravada no formato binário (ver src.utils.session_file).
+
+        O ficheiro é mapeado em memória e as colunas dos sensores são usadas
+        como views sem cópia; apenas os lotes de janelas em processamento
+        ocupam memória.
+        """
+        def compute() -> pd.DataFrame:
+            records = open_session_memmap(path)
+            if self.multi_axis:
+                # Os seis sensores são float32 contíguos no registo: view (n, 6)
+                return self._process_signal(structured_to_unstructured(records[SENSOR_COLUMNS], copy=False))
+            return self._process_signal(records['accel_x'])
+
+        return self._cached(lambda params: FeatureCache.key_for_file(path, {**params, "source": "binary"}), compute)
+
+    def process_session_file(self, path: str) -> pd.DataFrame:
+        """Processa uma sessão em CSV ou no formato binário, conforme a extensão."""
+        if str(path).endswith(SESSION_FILE_EXTENSION):
+            return self.process_session_binary(path)
+        return self.process_session_csv(path)
+
+    def _process_signal(self, signal: np.ndarray) -> pd.DataFrame:
+        """Segmenta o sinal de aceleração em janelas e extrai as features."""
         if len(signal) < self.window_size_samples:
             print("Aviso: A sessão de dados é mais curta que a janela de análise.")
             return pd.DataFrame()
 
         print(f"Processando {len(signal)} amostras em janelas de {self.window_size_samples} com passo de {self.step}...")
+        if self.engine == "loop":
+            return self._process_signal_loop(signal)
+        if self.engine == "sliding":
+            return self._process_signal_sliding(signal)
+        return self._process_signal_batch(signal)
+
+    def _process_signal_loop(self, signal: np.ndarray) -> pd.DataFrame:
+        """Extrai as features janela a janela (implementação de referência)."""
+        all_features = []
+        fft_analyzer = SignalAnalyzer()
         for i in range(0, len(signal) - self.window_size_samples, self.step):
             window = signal[i:i + self.window_size_samples]
-            fft_results = fft_analyzer.find_tremor_frequency(window, self.sample_rate_hz)
+            fft_results = fft_analyzer.find_tremor_frequency(window, self.sample_rate_hz, method=self.spectral_method)
             test_result = {
-                "name": f"Janela_{i}", "readings": window, 
+                "name": f"Janela_{i}", "readings": window,
                 "sample_rate": self.sample_rate_hz, "fft_results": fft_results
             }
             features = _extract_features_from_rest_test(test_result)
@@ -58,5 +250,162 @@ class SessionProcessor:
 
         if not all_features:
             return pd.DataFrame()
-            
-        return pd.DataFrame(all_features)
\ No newline at end of file
+
+        return pd.DataFrame(all_features)
+
+    def _process_signal_batch(self, signal: np.ndarray) -> pd.DataFrame:
+        """
+        Extrai as features de todas as janelas com uma view strided (sem cópia)
+        e uma rfft por lote de janelas.
+        """
+        n_windows = self._num_windows(len(signal))
+        if n_windows == 0:
+            return pd.DataFrame()
+
+        windows = self.window_view(signal, 0, n_windows)
+        features_df, n_flat = self.extract_window_features(windows)
+        self._warn_flat_windows(n_flat)
+        return features_df
+
+    def make_tracker(self) -> SlidingSpectrumTracker:
+        """Cria um SlidingSpectrumTracker com a janela e o passo deste processador."""
+        return SlidingSpectrumTracker(self.window_size_samples, self.sample_rate_hz, step=self.step)
+
+    def _process_signal_sliding(self, signal: np.ndarray) -> pd.DataFrame:
+        """
+        Extrai as features com a DFT deslizante, entregando o sinal ao tracker
+        em blocos de BATCH_MAX_WINDOWS passos para limitar a memória.
+        """
+        n_windows = self._num_windows(len(signal))
+        if n_windows == 0:
+            return pd.DataFrame()
+
+        tracker = self.make_tracker()
+        block_size = BATCH_MAX_WINDOWS * self.step
+        parts = [tracker.push(signal[start:start + block_size]) for start in range(0, len(signal), block_size)]
+        features = {name: np.concatenate([part[name] for part in parts])[:n_windows] for name in parts[0]}
+        self._warn_flat_windows(int(np.sum(features["flat"])))
+        return pd.DataFrame({name: features[name] for name in TREMOR_FEATURES})
+
+    def extract_window_features(self, windows: np.ndarray):
+        """
+        Calcula as features de um array de janelas, em lotes de BATCH_MAX_WINDOWS.
+
+        Args:
+            windows: (janelas, amostras) do eixo X do acelerómetro, ou
+                (janelas, 6, amostras) com os eixos de SENSOR_COLUMNS.
+
+        Returns:
+            tuple: (DataFrame de features, número de janelas planas no eixo X do acelerómetro)
+        """
+        multi_axis = windows.ndim == 3
+        # No modo multi-eixo cada janela tem vários sinais: o lote é reduzido
+        # para manter a mesma memória por rfft.
+        batch_size = BATCH_MAX_WINDOWS // len(MULTI_AXIS_SIGNALS) if multi_axis else BATCH_MAX_WINDOWS
+        columns = {}
+        n_flat = 0
+        for start in range(0, len(windows), batch_size):
+            block = windows[start:start + batch_size]
+            if multi_axis:
+                batch = SignalAnalyzer.find_tremor_features_batch(
+                    add_magnitude_signals(block), self.sample_rate_hz, method=self.spectral_method
+                )
+                block_columns = multi_axis_feature_columns(batch)
+                n_flat += int(np.sum(batch["flat"][:, 0]))
+            else:
+                batch = SignalAnalyzer.find_tremor_features_batch(block, self.sample_rate_hz, method=self.spectral_method)
+                block_columns = {name: batch[name] for name in TREMOR_FEATURES}
+                n_flat += int(np.sum(batch["flat"]))
+            for name, values in block_columns.items():
+                columns.setdefault(name, []).append(values)
+
+        return pd.DataFrame({name: np.concatenate(parts) for name, parts in columns.items()}), n_flat
+
+    @staticmethod
+    def _warn_flat_windows(n_flat: int):
+        if n_flat:
+            print(f"⚠️ AVISO: {n_flat} janela(s) com sinal muito plano (std<0.1). Pode indicar dados inválidos ou controle desconectado.")
+
+    def iter_session_csv(self, source, chunksize: int = CSV_CHUNK_SIZE,
+                         dtype=np.float32) -> Iterator[pd.DataFrame]:
+        """
+        Lê um CSV de sessão em blocos e devolve as features incrementalmente.
+
+        Apenas as colunas de sinal são lidas, já com o tipo indicado. Entre
+        blocos é mantido um buffer com a cauda do sinal (no máximo uma janela),
+        para que as janelas que atravessam a fronteira entre blocos não se
+        percam. O consumo de memória depende do tamanho do bloco e não da
+        duração da sessão. As janelas produzidas são as mesmas de
+        process_session_df.
+
+        Args:
+            source: Caminho ou objeto de ficheiro (ex: upload do Streamlit).
+            chunksize: Número de linhas lidas por bloco.
+            dtype: Tipo numérico usado para as colunas de sinal.
+
+        Yields:
+            DataFrame de features das janelas completadas por cada bloco.
+        """
+        header = pd.read_csv(source, nrows=0)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        columns = self._signal_columns(header.columns)
+        if columns is None:
+            self._missing_columns_error(header.columns)
+            return
+
+        print(f"Processando sessão em blocos de {chunksize} linhas, janelas de {self.window_size_samples} com passo de {self.step}...")
+        tail = np.empty((0, len(columns)) if self.multi_axis else 0, dtype=dtype)
+        tail_offset = 0   # Índice global da primeira amostra do buffer
+        next_start = 0    # Índice global do início da próxima janela
+        n_flat = 0
+        tracker = self.make_tracker() if self.engine == "sliding" else None
+        held = np.empty(0, dtype=dtype)
+        reader = pd.read_csv(source, usecols=columns, dtype={col: dtype for col in columns}, chunksize=chunksize)
+        for chunk in reader:
+            values = chunk[columns].to_numpy() if self.multi_axis else chunk[columns[0]].to_numpy()
+            if tracker is not None:
+                # A última amostra só é entregue com o bloco seguinte, para que
+                # uma janela só seja emitida com uma amostra depois dela
+                features = tracker.push(np.concatenate([held, values[:-1]]))
+                held = values[-1:]
+                if len(features["flat"]):
+                    n_flat += int(np.sum(features["flat"]))
+                    yield pd.DataFrame({name: features[name] for name in TREMOR_FEATURES})
+                continue
+
+            tail = np.concatenate([tail, values])
+            n_samples = tail_offset + len(tail)
+
+            # Uma janela só é emitida quando já existe pelo menos uma amostra
+            # depois dela, tal como em range(0, n - janela, passo).
+            n_windows = len(range(next_start, n_samples - self.window_size_samples, self.step))
+            if n_windows > 0:
+                local_start = next_start - tail_offset
+                windows = self.window_view(tail, local_start, n_windows)
+                features_df, chunk_flat = self.extract_window_features(windows)
+                n_flat += chunk_flat
+                next_start += n_windows * self.step
+                yield features_df
+
+            tail = tail[next_start - tail_offset:]
+            tail_offset = next_start
+
+        self._warn_flat_windows(n_flat)
+
+    def process_session_csv(self, source, chunksize: int = CSV_CHUNK_SIZE, dtype=np.float32) -> pd.DataFrame:
+        """
+        Processa um CSV de sessão em blocos (ver iter_session_csv) e retorna
+        o DataFrame de features completo.
+        """
+        def compute() -> pd.DataFrame:
+            parts = list(self.iter_session_csv(source, chunksize=chunksize, dtype=dtype))
+            if not parts:
+                print("Aviso: A sessão de dados é mais curta que a janela de análise.")
+                return pd.DataFrame()
+            return pd.concat(parts, ignore_index=True)
+
+        return self._cached(
+            lambda params: FeatureCache.key_for_file(source, {**params, "source": "csv", "dtype": np.dtype(dtype).str}),
+            compute
+        )
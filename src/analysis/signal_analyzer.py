@@ -1,11 +1,16 @@
 import numpy as np
-from scipy.fft import fft, fftfreq
-from typing import List, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import fft, fftfreq, rfft, rfftfreq
+from typing import Dict, List, Optional, Tuple
+from config import SPECTRAL_METHOD, WELCH_SEGMENT_SEC, WELCH_WINDOW, WELCH_OVERLAP
 
 # Frequências típicas de tremor de repouso (Parkinson) em Hz
 TREMOR_FREQ_MIN = 4.0
 TREMOR_FREQ_MAX = 8.0
 
+# Estimadores espectrais disponíveis (ver SPECTRAL_METHOD em config.py)
+SPECTRAL_METHODS = ("fft", "welch")
+
 class SignalAnalyzer:
     """
     Analisa uma série temporal de dados de sensores para detectar
@@ -15,7 +20,11 @@ class SignalAnalyzer:
     @staticmethod
     def find_tremor_frequency(
         sensor_readings: List[float], 
-        sample_rate: float
+        sample_rate: float,
+        method: Optional[str] = None,
+        segment_sec: Optional[float] = None,
+        window: Optional[str] = None,
+        overlap: Optional[float] = None
     ) -> Tuple[np.ndarray, np.ndarray, float, float]:
         """
         Aplica a Transformada Rápida de Fourier (FFT) para encontrar a frequência
@@ -24,30 +33,42 @@ class SignalAnalyzer:
         Args:
             sensor_readings: Lista de leituras de um eixo do sensor (ex: aceleração em X).
             sample_rate: A taxa de amostragem em Hz (leituras por segundo).
+            method: 'fft' (uma FFT sobre todo o sinal) ou 'welch' (média de
+                FFTs curtas com janela, ver welch_spectrum). Por omissão,
+                SPECTRAL_METHOD de config.py.
+            segment_sec, window, overlap: Parâmetros do método 'welch'
+                (por omissão, WELCH_* de config.py).
 
         Returns:
             Uma tupla contendo:
             - Frequências (eixo x do gráfico de FFT)
-            - Amplitude da FFT (eixo y do gráfico de FFT)
+            - Amplitude da FFT (eixo y do gráfico de FFT); com 'welch', a
+              potência de cada bin
             - Frequência dominante na faixa de tremor
             - Amplitude dessa frequência dominante
         """
+        method = SignalAnalyzer.resolve_spectral_method(method)
         n = len(sensor_readings)
         if n == 0 or sample_rate <= 0:
             return np.array([]), np.array([]), 0.0, 0.0
 
-        # Normaliza o sinal (remove a média)
-        normalized_signal = np.array(sensor_readings) - np.mean(sensor_readings)
+        if method == "welch":
+            xf, yf = SignalAnalyzer.welch_spectrum(
+                np.asarray(sensor_readings, dtype=np.float64), sample_rate, segment_sec, window, overlap
+            )
+        else:
+            # Normaliza o sinal (remove a média)
+            normalized_signal = np.array(sensor_readings) - np.mean(sensor_readings)
 
-        # Calcula a FFT
-        yf = fft(normalized_signal)
-        xf = fftfreq(n, 1 / sample_rate)
+            # Calcula a FFT
+            yf = fft(normalized_signal)
+            xf = fftfreq(n, 1 / sample_rate)
 
-        # Pega apenas as frequências positivas
-        positive_mask = xf > 0
-        xf = xf[positive_mask]
-        # Pega a magnitude (amplitude) e normaliza
-        yf = 2.0/n * np.abs(yf[positive_mask])
+            # Pega apenas as frequências positivas
+            positive_mask = xf > 0
+            xf = xf[positive_mask]
+            # Pega a magnitude (amplitude) e normaliza
+            yf = 2.0/n * np.abs(yf[positive_mask])
 
         # Filtra para encontrar a frequência de pico na faixa de tremor
         tremor_mask = (xf >= TREMOR_FREQ_MIN) & (xf <= TREMOR_FREQ_MAX)
@@ -64,4 +85,154 @@ class SignalAnalyzer:
                 dominant_freq = freqs_in_range[max_amp_index]
                 max_amplitude = amps_in_range[max_amp_index]
 
-        return xf, yf, dominant_freq, max_amplitude
\ No newline at end of file
+        return xf, yf, dominant_freq, max_amplitude
+
+    @staticmethod
+    def resolve_spectral_method(method: Optional[str]) -> str:
+        """Retorna o estimador pedido (ou SPECTRAL_METHOD, se None), validando o nome."""
+        method = method or SPECTRAL_METHOD
+        if method not in SPECTRAL_METHODS:
+            raise ValueError(f"Estimador espectral desconhecido: '{method}'. Opções: {', '.join(SPECTRAL_METHODS)}")
+        return method
+
+    @staticmethod
+    def welch_spectrum(
+        signals: np.ndarray,
+        sample_rate: float,
+        segment_sec: Optional[float] = None,
+        window: Optional[str] = None,
+        overlap: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Estima o espectro de potência pelo método de Welch ao longo do último eixo.
+
+        O sinal é dividido em segmentos de segment_sec segundos com a sobreposição
+        indicada; cada segmento é multiplicado pela janela e transformado, e os
+        periodogramas são promediados. Em gravações longas isto reduz a variância
+        da estimativa em troca de resolução (1/segment_sec Hz). Sinais mais curtos
+        que um segmento usam um único segmento do tamanho do sinal.
+
+        Os segmentos são uma view strided sobre o sinal e são transformados com
+        uma única rfft; o resultado é o mesmo de scipy.signal.welch com
+        detrend='constant' e scaling='density' (multiplicado pela largura do bin).
+
+        Args:
+            signals: Array (..., n_amostras).
+            sample_rate: A taxa de amostragem em Hz.
+            segment_sec: Duração de cada segmento em segundos (WELCH_SEGMENT_SEC).
+            window: Janela do scipy.signal, ex: 'hann', 'hamming' (WELCH_WINDOW).
+            overlap: Fração de sobreposição entre segmentos (WELCH_OVERLAP).
+
+        Returns:
+            tuple: (frequências positivas, potência de cada bin com forma
+            (..., n_frequências)). A potência é a densidade espectral vezes a
+            largura do bin, pelo que a soma numa faixa é a potência nessa faixa.
+        """
+        segment_sec = WELCH_SEGMENT_SEC if segment_sec is None else segment_sec
+        window = window or WELCH_WINDOW
+        overlap = WELCH_OVERLAP if overlap is None else overlap
+
+        n = signals.shape[-1]
+        if n < 2:
+            return np.zeros(0), np.zeros(signals.shape[:-1] + (0,))
+        nperseg = max(2, min(n, int(round(segment_sec * sample_rate))))
+        step = max(1, nperseg - min(int(nperseg * overlap), nperseg - 1))
+        from scipy.signal import get_window  # O scipy.signal é pesado: só é importado com o método 'welch'
+        taper = get_window(window, nperseg)
+
+        segments = sliding_window_view(signals, nperseg, axis=-1)[..., ::step, :]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        segments *= taper
+        spectrum = rfft(segments, axis=-1)
+        power = np.mean(spectrum.real ** 2 + spectrum.imag ** 2, axis=-2)
+
+        # Espectro unilateral: todos os bins positivos contam a dobrar, exceto
+        # o de Nyquist (se nperseg for par)
+        power = power[..., 1:] * (2.0 / (nperseg * np.sum(taper ** 2)))
+        if nperseg % 2 == 0:
+            power[..., -1] /= 2
+        return rfftfreq(nperseg, 1 / sample_rate)[1:], power
+
+    @staticmethod
+    def find_tremor_features_batch(
+        windows: np.ndarray,
+        sample_rate: float,
+        min_std: float = 0.1,
+        method: Optional[str] = None,
+        segment_sec: Optional[float] = None,
+        window: Optional[str] = None,
+        overlap: Optional[float] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Versão vetorizada de find_tremor_frequency para várias janelas de uma vez.
+
+        Aplica uma única rfft ao longo do último eixo e calcula as features de
+        tremor como reduções por linha, com os mesmos resultados que chamar
+        find_tremor_frequency janela a janela.
+
+        Args:
+            windows: Array (..., n_amostras), ex: (n_janelas, n_amostras) ou
+                (n_janelas, n_eixos, n_amostras); pode ser uma view strided.
+            sample_rate: A taxa de amostragem em Hz.
+            min_std: Janelas com desvio padrão abaixo deste valor são
+                consideradas planas e recebem features nulas.
+            method, segment_sec, window, overlap: Estimador espectral, como em
+                find_tremor_frequency.
+
+        Returns:
+            Dicionário com arrays de forma windows.shape[:-1]: 'peak_freq',
+            'tremor_power', 'total_power', 'tremor_index' e a máscara booleana
+            'flat' (janelas planas).
+        """
+        method = SignalAnalyzer.resolve_spectral_method(method)
+        batch_shape, n = windows.shape[:-1], windows.shape[-1]
+        rows = windows.reshape(-1, n) if windows.size else np.zeros((int(np.prod(batch_shape)), n))
+        n_rows = rows.shape[0]
+        features = {
+            "peak_freq": np.zeros(n_rows), "tremor_power": np.zeros(n_rows),
+            "total_power": np.zeros(n_rows), "tremor_index": np.zeros(n_rows),
+            "flat": np.ones(n_rows, dtype=bool)
+        }
+        if n_rows > 0 and n > 0 and sample_rate > 0:
+            flat = rows.std(axis=1) < min_std
+            features["flat"] = flat
+            valid = ~flat
+            if np.any(valid):
+                if method == "welch":
+                    xf, yf = SignalAnalyzer.welch_spectrum(rows[valid], sample_rate, segment_sec, window, overlap)
+                else:
+                    xf, yf = SignalAnalyzer._fft_amplitudes(rows[valid], sample_rate)
+                SignalAnalyzer._fill_tremor_features(features, xf, yf, valid)
+
+        return {name: values.reshape(batch_shape) for name, values in features.items()}
+
+    @staticmethod
+    def _fft_amplitudes(signals: np.ndarray, sample_rate: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Amplitudes da FFT das linhas de 'signals', como em find_tremor_frequency."""
+        n = signals.shape[1]
+        normalized = signals - signals.mean(axis=1, keepdims=True)
+
+        # Frequências positivas (as mesmas que 'xf > 0' em fftfreq)
+        n_positive = (n - 1) // 2
+        xf = fftfreq(n, 1 / sample_rate)[1:n_positive + 1]
+        return xf, 2.0/n * np.abs(rfft(normalized, axis=1)[:, 1:n_positive + 1])
+
+    @staticmethod
+    def _fill_tremor_features(features: Dict[str, np.ndarray], xf: np.ndarray,
+                              yf: np.ndarray, valid: np.ndarray):
+        """Calcula as features das linhas válidas a partir do espectro e escreve-as em 'features'."""
+        tremor_mask = (xf >= TREMOR_FREQ_MIN) & (xf <= TREMOR_FREQ_MAX)
+        total_power = np.sum(yf, axis=1)
+        if np.any(tremor_mask):
+            amps_in_range = yf[:, tremor_mask]
+            peak_freq = xf[tremor_mask][np.argmax(amps_in_range, axis=1)]
+            tremor_power = np.sum(amps_in_range, axis=1)
+        else:
+            peak_freq = np.zeros(len(yf))
+            tremor_power = np.zeros(len(yf))
+
+        features["peak_freq"][valid] = peak_freq
+        features["tremor_power"][valid] = tremor_power
+        features["total_power"][valid] = total_power
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features["tremor_index"][valid] = np.where(total_power > 0, tremor_power / total_power, 0)
@@ -0,0 +1,226 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Este módulo contém a classe SlidingSpectrumTracker, que mantém as features
+de tremor de uma janela deslizante atualizadas a cada nova amostra, com uma
+DFT deslizante restrita aos bins da faixa de tremor e somas corridas para a
+variância do sinal.
+"""
+from typing import Dict, List
+import numpy as np
+from scipy.fft import rfftfreq
+from src.analysis.signal_analyzer import TREMOR_FREQ_MIN, TREMOR_FREQ_MAX
+
+# Número máximo de amostras avançadas entre recálculos exatos da DFT
+# (re-ancoragem), que limitam a acumulação de erros de arredondamento
+REANCHOR_SAMPLES = 4096
+
+class SlidingSpectrumTracker:
+    """
+    Acompanha a potência na faixa de tremor e a potência total de uma janela
+    de window_size amostras que desliza sobre um sinal recebido em blocos.
+
+    Para cada bin k da faixa de tremor, a DFT da janela que começa em s+1
+    obtém-se da anterior em O(1):
+
+        X_k(s+1) = (X_k(s) + x[s+n] - x[s]) · e^{2πik/n}
+
+    e a potência total (variância da janela, pelo teorema de Parseval) vem de
+    somas corridas de x e x². Cada nova amostra custa O(bins) em vez de uma
+    FFT de O(n log n) por janela. A cada REANCHOR_SAMPLES amostras a DFT e as
+    somas são recalculadas diretamente, para que os erros de arredondamento
+    não se acumulem.
+
+    Internamente guarda-se a DFT desmodulada Y_k(s) = X_k(s) · e^{-2πiks/n},
+    que tem a mesma potência e evolui por uma soma simples,
+    Y_k(s+1) = Y_k(s) + (x[s+n] - x[s]) · e^{-2πiks/n}; assim, as amostras
+    entre duas janelas emitidas reduzem-se a um produto por uma matriz fixa.
+
+    As features de cada janela são as mesmas de
+    SignalAnalyzer.find_tremor_features_batch com method='welch',
+    window='boxcar' e um único segmento do tamanho da janela; 'peak_freq'
+    coincide também com a do método 'fft'.
+    """
+    def __init__(self, window_size: int, sample_rate: float, step: int = 1, min_std: float = 0.1,
+                 reanchor_samples: int = REANCHOR_SAMPLES):
+        """
+        Args:
+            window_size: Tamanho da janela em amostras.
+            sample_rate: A taxa de amostragem em Hz.
+            step: São emitidas as janelas cujo início é múltiplo de 'step'.
+            min_std: Janelas com desvio padrão abaixo deste valor são
+                consideradas planas e recebem features nulas.
+            reanchor_samples: Amostras entre recálculos exatos da DFT.
+        """
+        if window_size < 2:
+            raise ValueError("A janela do SlidingSpectrumTracker precisa de pelo menos 2 amostras.")
+        self.window_size = window_size
+        self.sample_rate = sample_rate
+        self.step = max(1, step)
+        self.min_std = min_std
+        self.reanchor_samples = max(1, reanchor_samples)
+
+        # Bins positivos da faixa de tremor (os mesmos de welch_spectrum)
+        k = np.arange(1, window_size // 2 + 1)
+        freqs = rfftfreq(window_size, 1 / sample_rate)[1:]
+        band = (freqs >= TREMOR_FREQ_MIN) & (freqs <= TREMOR_FREQ_MAX)
+        self.bins = k[band]
+        self.freqs = freqs[band]
+        # Potência unilateral de cada bin: 2|X_k|²/n², ou |X_k|²/n² no bin de Nyquist
+        self._bin_scale = np.where(2 * self.bins == window_size, 1.0, 2.0) / window_size ** 2
+        # D[j, b] = e^{-2πi·k_b·j/n}; as linhas repetem-se com período n
+        self._dft_matrix = np.exp(-2j * np.pi * np.outer(np.arange(window_size), self.bins) / window_size)
+        self._segment_matrix = self._dft_matrix[np.arange(self.step) % window_size]
+        self.reset()
+
+    def reset(self):
+        """Descarta o sinal recebido até agora."""
+        self._tail = np.empty(0)       # Amostras a partir do início da janela atual
+        self._total = 0                # Amostras recebidas
+        self._start = None             # Índice global do início da janela atual (None até haver uma completa)
+        self._demodulated = np.zeros(len(self.bins), dtype=complex)   # X_k(s) · e^{-2πiks/n}
+        self._reference = 0.0          # Referência das somas corridas (evita cancelamento numérico)
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_anchor = 0
+
+    @property
+    def has_window(self) -> bool:
+        """Indica se já foi recebida pelo menos uma janela completa."""
+        return self._start is not None
+
+    def push(self, samples) -> Dict[str, np.ndarray]:
+        """
+        Acrescenta um bloco de amostras e retorna as features das janelas
+        completadas por ele (inícios múltiplos de 'step').
+
+        Returns:
+            Dicionário com arrays 'peak_freq', 'tremor_power', 'total_power',
+            'tremor_index' e a máscara 'flat', uma posição por janela emitida.
+        """
+        samples = np.asarray(samples, dtype=np.float64).ravel()
+        sequence = np.concatenate([self._tail, samples])
+        offset = self._total - len(self._tail)   # Índice global de sequence[0]
+        self._total += len(samples)
+
+        parts = []
+        if self._start is None:
+            if self._total < self.window_size:
+                self._tail = sequence
+                return self._concat(parts)
+            self._start = 0
+            self._anchor(sequence, -offset)
+            parts.append(self._features(self._demodulated[None, :], np.array([self._sum]), np.array([self._sum_sq])))
+
+        last_start = self._total - self.window_size
+        while self._start < last_start:
+            if self._since_anchor >= self.reanchor_samples:
+                self._anchor(sequence, self._start - offset)
+            count = min(last_start - self._start, self.reanchor_samples - self._since_anchor)
+            parts.append(self._advance(sequence, self._start - offset, count))
+
+        self._tail = sequence[self._start - offset:]
+        return self._concat(parts)
+
+    def current_features(self) -> Dict[str, float]:
+        """Features da janela mais recente, em O(bins)."""
+        if self._start is None:
+            raise RuntimeError("Ainda não foi recebida nenhuma janela completa.")
+        features = self._features(self._demodulated[None, :], np.array([self._sum]), np.array([self._sum_sq]))
+        return {name: values[0].item() for name, values in features.items()}
+
+    def _anchor(self, sequence: np.ndarray, local_start: int):
+        """Recalcula diretamente a DFT e as somas da janela atual, que começa em local_start."""
+        window = sequence[local_start:local_start + self.window_size]
+        self._demodulated = (window @ self._dft_matrix) * self._dft_matrix[self._start % self.window_size]
+        self._reference = float(window.mean())
+        centered = window - self._reference
+        self._sum = float(centered.sum())
+        self._sum_sq = float(centered @ centered)
+        self._since_anchor = 0
+
+    def _advance(self, sequence: np.ndarray, local_start: int, count: int) -> Dict[str, np.ndarray]:
+        """Desliza a janela 'count' amostras, todas de uma vez, e retorna as features emitidas."""
+        n, step = self.window_size, self.step
+        leaving = sequence[local_start:local_start + count]
+        entering = sequence[local_start + n:local_start + n + count]
+        diff = entering - leaving
+        diff_sq = (entering - self._reference) ** 2 - (leaving - self._reference) ** 2
+
+        # O bloco divide-se nas amostras até ao próximo início emitido, em
+        # segmentos de 'step' amostras (cada um termina numa janela emitida)
+        # e no resto, que fica pendente.
+        head = min((-self._start) % step, count)
+        n_segments = (count - head) // step
+        segments_end = head + n_segments * step
+
+        spectrum, total, total_sq = self._demodulated, self._sum, self._sum_sq
+        emitted = []
+        if head:
+            spectrum = spectrum + diff[:head] @ self._phases(self._start, head)
+            total, total_sq = total + diff[:head].sum(), total_sq + diff_sq[:head].sum()
+            if (self._start + head) % step == 0:
+                emitted.append((spectrum[None, :], np.array([total]), np.array([total_sq])))
+        if n_segments:
+            # Cada segmento contribui com d · D[início + i] = D[início] ∘ (d · D[i]):
+            # uma única multiplicação de matrizes para todos os segmentos
+            segment_starts = self._start + head + step * np.arange(n_segments)
+            segments = diff[head:segments_end].reshape(n_segments, step)
+            contributions = (segments @ self._segment_matrix) * self._dft_matrix[segment_starts % n]
+            spectra = spectrum + np.cumsum(contributions, axis=0)
+            sums = total + np.cumsum(segments.sum(axis=1))
+            sums_sq = total_sq + np.cumsum(diff_sq[head:segments_end].reshape(n_segments, step).sum(axis=1))
+            emitted.append((spectra, sums, sums_sq))
+            spectrum, total, total_sq = spectra[-1], sums[-1], sums_sq[-1]
+        if segments_end < count:
+            rest = slice(segments_end, count)
+            spectrum = spectrum + diff[rest] @ self._phases(self._start + segments_end, count - segments_end)
+            total, total_sq = total + diff[rest].sum(), total_sq + diff_sq[rest].sum()
+
+        self._demodulated, self._sum, self._sum_sq = spectrum, float(total), float(total_sq)
+        self._start += count
+        self._since_anchor += count
+        if not emitted:
+            return self._concat([])
+        return self._features(*(np.concatenate(arrays) for arrays in zip(*emitted)))
+
+    def _phases(self, global_start: int, count: int) -> np.ndarray:
+        """Linhas D[s mod n] da matriz da DFT para s = global_start, ..., global_start + count - 1."""
+        return self._dft_matrix[(global_start + np.arange(count)) % self.window_size]
+
+    def _features(self, spectra: np.ndarray, sums: np.ndarray, sums_sq: np.ndarray) -> Dict[str, np.ndarray]:
+        n = self.window_size
+        power = (spectra.real ** 2 + spectra.imag ** 2) * self._bin_scale
+        mean = sums / n
+        total_power = np.maximum(sums_sq / n - mean ** 2, 0.0)
+        flat = np.sqrt(total_power) < self.min_std
+
+        if len(self.bins):
+            tremor_power = power.sum(axis=1)
+            peak_freq = self.freqs[np.argmax(power, axis=1)]
+        else:
+            tremor_power = np.zeros(len(spectra))
+            peak_freq = np.zeros(len(spectra))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tremor_index = np.where(total_power > 0, tremor_power / total_power, 0.0)
+
+        features = {
+            "peak_freq": peak_freq, "tremor_power": tremor_power,
+            "total_power": total_power, "tremor_index": tremor_index
+        }
+        for values in features.values():
+            values[flat] = 0.0
+        features["flat"] = flat
+        return features
+
+    @staticmethod
+    def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        if not parts:
+            empty = {name: np.zeros(0) for name in ("peak_freq", "tremor_power", "total_power", "tremor_index")}
+            empty["flat"] = np.zeros(0, dtype=bool)
+            return empty
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
@@ -1,19 +1,40 @@
+import threading
 import time
-from typing import List, Dict, Any
-from src.hardware.sensor_controller import SensorController
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from src.hardware.capture_buffer import IMU_AXES
 from src.domain.movement_test import MovementTest
 from src.analysis.signal_analyzer import SignalAnalyzer
+from config import TARGET_SAMPLE_RATE, MONITOR_POLL_SEC, SPECTRAL_METHOD
+
+if TYPE_CHECKING:
+    # Importados só quando usados: o pydualsense (hidapi) na conexão e o
+    # SessionProcessor na monitorização contínua
+    from src.hardware.sensor_controller import SensorController
+    from src.analysis.online_monitor import OnlineAnomalyMonitor
 
 class AppController:
     """
     Controla o estado e a lógica de negócio da aplicação,
     independente da interface do utilizador.
+
+    A aquisição corre em threads de fundo (o teste em curso e a
+    monitorização contínua), para que a interface apenas consulte o estado
+    atual sem bloquear nem perder amostras quando é redesenhada.
     """
 
     def __init__(self):
-        self.sensor_controller: SensorController | None = None
+        self.sensor_controller: Optional["SensorController"] = None
         self.analyzer = SignalAnalyzer()
         self.results: List[Dict[str, Any]] = []
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self.monitor: Optional["OnlineAnomalyMonitor"] = None
+        self._test_thread: Optional[threading.Thread] = None
+        self._test_started_at = 0.0
+        self._test_duration = 0.0
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._monitor_stop_event = threading.Event()
 
     @property
     def is_connected(self) -> bool:
@@ -23,51 +44,142 @@ class AppController:
     def connect(self):
         """Tenta conectar-se ao controlador de sensores."""
         if not self.is_connected:
+            from src.hardware.sensor_controller import SensorController
             self.sensor_controller = SensorController()
 
     def disconnect(self):
         """Desconecta-se do controlador de sensores."""
+        self.stop_monitoring()
+        self._stop_event.set()
+        if self._test_thread is not None:
+            self._test_thread.join()
         if self.is_connected:
             self.sensor_controller.close()
             self.sensor_controller = None
 
+    @property
+    def is_test_running(self) -> bool:
+        return self._test_thread is not None and self._test_thread.is_alive()
+
+    @property
+    def test_progress(self) -> float:
+        """Progresso do teste em curso, entre 0 e 1."""
+        if not self.is_test_running or self._test_duration <= 0:
+            return 1.0
+        return min((time.time() - self._test_started_at) / self._test_duration, 1.0)
+
+    def start_test(self, test: MovementTest):
+        """
+        Inicia um teste de movimento numa thread de fundo e retorna de imediato.
+        O resultado fica em last_result (e em results) quando o teste termina.
+        """
+        if not self.is_connected:
+            raise RuntimeError("O controlador não está conectado para iniciar um teste.")
+        if self.is_test_running:
+            raise RuntimeError("Já existe um teste em curso.")
+
+        # Um teste interrompido ou sem dados não pode mostrar o resultado do anterior
+        self.last_result = None
+        self.last_error = None
+        self._stop_event.clear()
+        self._test_started_at = time.time()
+        self._test_duration = test.duration_seconds
+        self._test_thread = threading.Thread(target=self._test_worker, args=(test,), daemon=True)
+        self._test_thread.start()
+
     def run_test(self, test: MovementTest, progress_callback=None):
         """
         Executa um teste de movimento, analisa os resultados e guarda-os.
         Opcionalmente, usa um callback para reportar o progresso.
         """
+        self.start_test(test)
+        while self.is_test_running:
+            if progress_callback:
+                progress_callback(self.test_progress)
+            time.sleep(0.05)
+
+    def _test_worker(self, test: MovementTest):
+        sensor_controller = self.sensor_controller
+        sensor_controller.start_capture()
+        capture = None
+        try:
+            while time.time() - self._test_started_at < test.duration_seconds:
+                if self._stop_event.is_set():
+                    return
+                if not sensor_controller.is_alive:
+                    self.last_error = "Controle foi desconectado durante o teste!"
+                    return
+                time.sleep(0.05)
+
+            capture = sensor_controller.stop_capture(resample_hz=TARGET_SAMPLE_RATE)
+            timestamps, sensor_readings = capture['timestamps'], capture['accel_x']
+
+            if not sensor_readings:
+                self.last_error = "Nenhum dado foi coletado durante o teste."
+                return
+
+            # Sinal reamostrado para uma grelha uniforme a partir dos timestamps reais
+            sample_rate = capture['sample_rate']
+            fft_results = self.analyzer.find_tremor_frequency(sensor_readings, sample_rate)
+
+            self.last_result = {
+                "name": test.name,
+                "timestamps": timestamps,
+                "readings": sensor_readings,
+                "axes": {axis: capture[axis] for axis in IMU_AXES},
+                "fft_results": fft_results,
+                "spectral_method": SPECTRAL_METHOD,
+                "sample_rate": sample_rate,
+                "measured_sample_rate": capture['measured_sample_rate'],
+                "dropped_samples": capture['dropped_samples'],
+                "duplicate_samples": capture['duplicate_samples']
+            }
+            self.results.append(self.last_result)
+        except Exception as e:
+            # Sem isto a thread terminaria em silêncio e a interface não mostraria nada
+            self.last_error = f"Erro durante o teste: {e}"
+        finally:
+            if capture is None:
+                # Fecha a captura nos caminhos que terminam antes de a ler
+                try:
+                    sensor_controller.stop_capture()
+                except Exception:
+                    pass  # A captura já tinha sido fechada (ex: erro dentro de stop_capture)
+
+    @property
+    def is_monitoring(self) -> bool:
+        return self._monitor_thread is not None and self._monitor_thread.is_alive()
+
+    def start_monitoring(self, cluster_analyzer):
+        """
+        Inicia a monitorização contínua numa thread de fundo, que avalia as
+        janelas à medida que as amostras chegam. A linha temporal fica
+        disponível em monitor.timeline_df().
+        """
         if not self.is_connected:
-            raise RuntimeError("O controlador não está conectado para iniciar um teste.")
+            raise RuntimeError("O controlador não está conectado para iniciar a monitorização.")
+        self.stop_monitoring()
+
+        from src.analysis.online_monitor import OnlineAnomalyMonitor
+        self.last_error = None
+        self.monitor = OnlineAnomalyMonitor(cluster_analyzer)
+        self.monitor.attach(self.sensor_controller)
+        self._monitor_stop_event = threading.Event()
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_worker, args=(self.monitor, self._monitor_stop_event), daemon=True
+        )
+        self._monitor_thread.start()
+
+    def stop_monitoring(self):
+        """Para a monitorização contínua, mantendo a última linha temporal em monitor."""
+        if self._monitor_thread is not None:
+            self._monitor_stop_event.set()
+            self._monitor_thread.join()
+            self._monitor_thread = None
 
-        timestamps, sensor_readings = [], []
-        start_time = time.time()
-        
-        while time.time() - start_time < test.duration_seconds:
-            try:
-                data = self.sensor_controller.get_sensors_data()
-                timestamps.append(time.time() - start_time)
-                sensor_readings.append(data['accel_x'])
-                
-                if progress_callback:
-                    progress = (time.time() - start_time) / test.duration_seconds
-                    progress_callback(min(progress, 1.0))
-                    
-            except TimeoutError:
-                continue
-            
-            time.sleep(0.01)
-
-        if not sensor_readings:
-            print("Aviso: Nenhum dado foi coletado durante o teste.")
-            return
-
-        sample_rate = len(timestamps) / test.duration_seconds
-        fft_results = self.analyzer.find_tremor_frequency(sensor_readings, sample_rate)
-        
-        self.results.append({
-            "name": test.name,
-            "timestamps": timestamps,
-            "readings": sensor_readings,
-            "fft_results": fft_results,
-            "sample_rate": sample_rate
-        })
\ No newline at end of file
+    def _monitor_worker(self, monitor: "OnlineAnomalyMonitor", stop_event: threading.Event):
+        while not stop_event.wait(MONITOR_POLL_SEC):
+            if not self.sensor_controller.is_alive:
+                self.last_error = "Controle desconectado. Monitorização contínua interrompida."
+                return
+            monitor.update()
@@ -4,53 +4,86 @@
 # A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
 # com os termos de um contrato de licença celebrado com o autor.
 
+import os
 import streamlit as st
 import time
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 
-from src.hardware.sensor_controller import SensorController
+from src.app.app_controller import AppController
 from src.domain.movement_test import MovementTest
-from src.analysis.signal_analyzer import SignalAnalyzer
 from src.analysis.feature_extractor import extract_features
-from src.utils.plotter import plot_test_results
 from src.analysis.cluster_analyzer import ClusterAnalyzer
-from src.analysis.session_processor import SessionProcessor
-
-MODEL_PATH = "analyzer_model.joblib"
+from src.analysis import parameter_search
+from config import (MONITOR_REFRESH_SEC, MODEL_PATH, LEGACY_MODEL_PATH, PROJECTION_CACHE_MAX_ENTRIES, PROJECTION_MAX_POINTS,
+                    PARAM_SEARCH_K_MAX)
 
 @st.cache_data
-def compute_k_distance_graph(features_df: pd.DataFrame, k: int):
-    """Calcula e guarda em cache os dados para o gráfico K-Distance."""
+def compute_k_distance_matrix(features_df: pd.DataFrame, k_max: int = PARAM_SEARCH_K_MAX):
+    """
+    Calcula e guarda em cache as distâncias aos k_max vizinhos mais próximos:
+    mudar o k do gráfico K-Distance só escolhe outra coluna, sem nova consulta.
+    """
     print("INFO: (Terminal) A calcular o gráfico K-Distance...")
-    distances = ClusterAnalyzer.calculate_k_distance_graph(features_df, k=k)
+    distances = parameter_search.k_distance_matrix(features_df, k_max)
     print("INFO: (Terminal) Cálculo do K-Distance concluído.")
     return distances
 
+@st.cache_data
+def compute_parameter_sweep(features_df: pd.DataFrame, eps_values: tuple, min_samples_values: tuple):
+    """Calcula e guarda em cache o varrimento de (eps, min_samples) do DBSCAN, com as distâncias de core da cache."""
+    print("INFO: (Terminal) A calcular o varrimento de parâmetros...")
+    return parameter_search.sweep_dbscan_parameters(features_df, eps_values, min_samples_values,
+                                                    distances=compute_k_distance_matrix(features_df))
+
+@st.cache_data(max_entries=PROJECTION_CACHE_MAX_ENTRIES)
+def compute_projection(features_df: pd.DataFrame, method: str, n_components: int = 2, perplexity: int = 30,
+                       labels: np.ndarray = None):
+    """
+    Calcula e guarda em cache uma projeção 2D das features. A chave é o
+    conteúdo do DataFrame com o método e os parâmetros, pelo que os reruns
+    provocados por outros widgets não voltam a calcular o PCA nem o t-SNE.
+    Os rótulos estratificam a amostra do t-SNE/UMAP em sessões grandes.
+    """
+    print(f"INFO: (Terminal) A calcular a projeção {method}...")
+    if method == "pca":
+        return ClusterAnalyzer.reduce_dimensions_pca(features_df, n_components=n_components)
+    if method == "tsne":
+        return ClusterAnalyzer.reduce_dimensions_tsne(features_df, n_components=n_components, perplexity=perplexity,
+                                                      labels=labels)
+    if method == "umap":
+        return ClusterAnalyzer.reduce_dimensions_umap(features_df, n_components=n_components, labels=labels)
+    raise ValueError(f"Método de projeção desconhecido: '{method}'")
+
 class StreamlitApp:
+    TESTS = {
+        "Repouso na Mão": MovementTest(name="Repouso na Mão", instructions="Segure o controle parado na sua mão, apoiado na perna.", duration_seconds=10),
+        # "Teste de Tapping Rápido": MovementTest(name="Teste de Tapping Rápido", instructions="Pressione o botão 'R1' o mais rápido que conseguir.", duration_seconds=10),
+    }
+
     def __init__(self):
-        st.set_page_config(page_title="APOLO", layout="wide")
+        # O Streamlit recria esta classe a cada rerun: todo o estado duradouro
+        # (incluindo as threads de aquisição) vive no AppController da sessão.
         self._initialize_session_state()
-        
-        self.TESTS = {
-            "Repouso na Mão": MovementTest(name="Repouso na Mão", instructions="Segure o controle parado na sua mão, apoiado na perna.", duration_seconds=10),
-            # "Teste de Tapping Rápido": MovementTest(name="Teste de Tapping Rápido", instructions="Pressione o botão 'R1' o mais rápido que conseguir.", duration_seconds=10),
-        }
 
     def _initialize_session_state(self):
-        if 'controller' not in st.session_state: st.session_state.controller = None
+        if 'app_controller' not in st.session_state: st.session_state.app_controller = AppController()
         if 'analyzer' not in st.session_state: st.session_state.analyzer = None
         if 'model_loaded' not in st.session_state: st.session_state.model_loaded = False
         if 'last_test_result' not in st.session_state: st.session_state.last_test_result = None
 
+    @property
+    def app_controller(self) -> AppController:
+        return st.session_state.app_controller
+
     def run(self):
         st.sidebar.title("APOLO")
         mode = st.sidebar.radio("Navegação", ["Monitorização", "Análise de Sessão de Jogo", "Ferramentas de Análise"])
 
         if not st.session_state.model_loaded:
             try:
-                st.session_state.analyzer = ClusterAnalyzer.load_model(MODEL_PATH)
+                model_path = MODEL_PATH if os.path.exists(MODEL_PATH) else LEGACY_MODEL_PATH
+                st.session_state.analyzer = ClusterAnalyzer.load_model(model_path)
                 st.session_state.model_loaded = True
             except FileNotFoundError:
                 st.session_state.model_loaded = False
@@ -69,12 +102,14 @@ class StreamlitApp:
         uploaded_file = st.file_uploader("Escolha um ficheiro CSV de features para explorar", type="csv")
         
         if uploaded_file is not None:
+            # O matplotlib só é importado quando há algo para desenhar
+            import matplotlib.pyplot as plt
             df = pd.read_csv(uploaded_file)
             with st.sidebar:
                 st.header("Configuração da Ferramenta")
                 all_features = df.drop(columns=['label'], errors='ignore').columns.tolist()
                 features_to_use = st.multiselect("Selecione as features para a análise:", options=all_features, default=all_features)
-                min_samples_for_k = st.slider("Amostras Mínimas (k) para o gráfico:", 1, 20, 10, 1)
+                min_samples_for_k = st.slider("Amostras Mínimas (k) para o gráfico:", 1, PARAM_SEARCH_K_MAX, 10, 1)
 
             if not features_to_use:
                 st.warning("Selecione pelo menos uma feature.")
@@ -83,18 +118,43 @@ class StreamlitApp:
             features_df = df[features_to_use]
 
             with st.spinner("A calcular gráfico K-Distance..."):
-                distances = compute_k_distance_graph(features_df, k=min_samples_for_k)
-            
+                k_distances = compute_k_distance_matrix(features_df)
+            if min_samples_for_k > k_distances.shape[1]:
+                st.warning(f"O dataset só tem {k_distances.shape[1]} janela(s): escolha um k menor.")
+                return
+            distances = parameter_search.k_distance_curve(k_distances, min_samples_for_k)
+            knee = parameter_search.find_knee(distances)
+
             fig_k, ax_k = plt.subplots()
             ax_k.plot(distances)
+            if knee is not None:
+                ax_k.axhline(distances[knee], color="red", linestyle="--", label=f"eps sugerido = {distances[knee]:.3f}")
+                ax_k.plot(knee, distances[knee], "ro")
+                ax_k.legend()
             ax_k.set_title(f"Gráfico K-Distance (para k = {min_samples_for_k})")
             ax_k.set_xlabel("Pontos de Dados (ordenados por distância)")
             ax_k.set_ylabel(f"Distância ao {min_samples_for_k}º Vizinho")
             ax_k.grid(True)
-            plot_col, _ = st.columns([0.7, 0.3])
+            plot_col, info_col = st.columns([0.7, 0.3])
             with plot_col:
                 st.pyplot(fig_k)
-            st.success("Analise o 'cotovelo' no gráfico para estimar o melhor `eps` para usar no seu script de treino offline.")
+            if knee is None:
+                st.warning("Não foi possível encontrar o 'cotovelo' do gráfico: a curva é demasiado curta ou plana.")
+                return
+            suggested_eps = float(distances[knee])
+            with info_col:
+                st.metric(label="eps sugerido (cotovelo)", value=f"{suggested_eps:.4f}")
+                st.caption(f"Para usar no treino: `--eps {suggested_eps:.4f}` ou `--eps auto`.")
+
+            st.subheader("Varrimento de Parâmetros")
+            st.caption("Clusters e ruído do DBSCAN em torno do eps sugerido, calculados a partir de uma única "
+                       "consulta de vizinhança, sem treinar nenhum modelo.")
+            min_samples_values = tuple(sorted({max(2, min_samples_for_k // 2), min_samples_for_k, min_samples_for_k * 2}))
+            with st.spinner("A calcular o varrimento..."):
+                sweep = compute_parameter_sweep(features_df, tuple(parameter_search.eps_grid(suggested_eps)),
+                                                min_samples_values)
+            st.dataframe(sweep, hide_index=True)
+            st.success("Escolha um `eps` com poucos clusters e pouco ruído para usar no seu script de treino offline.")
 
     def _render_analysis_view(self):
         st.title("📊 Análise de Sessão de Jogo Gravada")
@@ -114,23 +174,64 @@ class StreamlitApp:
         uploaded_file = st.file_uploader("Escolha um ficheiro CSV de sessão de jogo", type="csv")
         
         if uploaded_file is not None:
-            raw_df = pd.read_csv(uploaded_file)
-            
+            import matplotlib.pyplot as plt
+            from src.analysis.session_processor import SessionProcessor
+            from src.analysis.feature_cache import FeatureCache
+            from src.analysis.feature_extractor import is_multi_axis_feature_set
+            try:
+                # As features têm de ser extraídas como no treino do modelo
+                processor = SessionProcessor.from_feature_params(
+                    analyzer.feature_params, cache=FeatureCache(),
+                    multi_axis=is_multi_axis_feature_set(analyzer.feature_columns or []))
+            except ValueError as e:
+                st.error(str(e))
+                return
             with st.spinner("A processar a sessão e a extrair features... Isto pode demorar."):
-                processor = SessionProcessor()
-                features_df = processor.process_session_df(raw_df)
+                features_df = processor.process_session_csv(uploaded_file)
 
             if features_df.empty:
                 st.warning("Não foi possível extrair features do arquivo fornecido.")
                 return
 
             st.success(f"Sessão processada! Foram extraídas features de {len(features_df)} janelas.")
+            if processor.cache.hits:
+                st.caption("Features reaproveitadas da cache (sessão já analisada com os mesmos parâmetros).")
             
             with st.spinner("A aplicar o modelo pré-treinado..."):
-                predicted_labels = st.session_state.analyzer.predict_clusters(features_df)
+                distances, _ = analyzer.score_batch(features_df)
+                predicted_labels = analyzer.labels_from_scores(distances)
             
             df_display = features_df.copy()
             df_display['cluster'] = predicted_labels
+            df_display['distancia_normal'] = distances
+
+            from src.analysis.episode_segmenter import segment_episodes, summarize_session
+            step_sec = processor.step / processor.sample_rate_hz
+            episodes = segment_episodes(predicted_labels, features_df, window_sec=processor.window_size_sec,
+                                        step_sec=step_sec, distances=distances)
+            session_summary = summarize_session(predicted_labels, episodes)
+
+            st.subheader("Episódios de Tremor")
+            col_episodes, col_total, col_longest, col_fraction = st.columns(4)
+            col_episodes.metric("Episódios", session_summary['n_episodes'])
+            col_total.metric("Tempo em Episódio", f"{session_summary['total_episode_s']:.0f} s")
+            col_longest.metric("Episódio Mais Longo", f"{session_summary['longest_episode_s']:.0f} s")
+            col_fraction.metric("Janelas Anómalas", f"{session_summary['anomalous_fraction']:.1%}")
+            if len(episodes):
+                st.caption("Janelas anómalas consecutivas agrupadas num episódio; a gravidade é a maior distância "
+                           "ao ponto normal mais próximo do modelo.")
+                st.dataframe(episodes.rename(columns={
+                    'start_s': 'Início (s)', 'end_s': 'Fim (s)', 'duration_s': 'Duração (s)', 'n_windows': 'Janelas',
+                    'mean_peak_freq': 'Freq. Pico Média (Hz)', 'max_tremor_power': 'Potência Tremor Máx.',
+                    'max_distance': 'Gravidade Máx.'
+                }).drop(columns=['first_window', 'last_window']), hide_index=True, use_container_width=True)
+
+            if np.any(predicted_labels == -1):
+                st.subheader("Janelas Mais Anómalas")
+                st.caption("Distância de cada janela ao ponto normal mais próximo do modelo (nas features "
+                           f"normalizadas); acima de eps = {analyzer.eps} a janela é anómala.")
+                top_anomalies = df_display[df_display['cluster'] == -1].nlargest(10, 'distancia_normal')
+                st.dataframe(top_anomalies.drop(columns=['cluster']))
 
             # st.header("Resultados da Clusterização")
             # col1, col2 = st.columns(2)
@@ -146,13 +247,20 @@ class StreamlitApp:
                 st.info("Comparação de dois métodos de redução dimensional para visualizar os clusters encontrados pelo DBSCAN.")
                 
                 with st.spinner("A aplicar PCA e t-SNE para redução dimensional..."):
-                    reduced_pca = ClusterAnalyzer.reduce_dimensions_pca(features_df, n_components=2)
-                    reduced_tsne = ClusterAnalyzer.reduce_dimensions_tsne(features_df, n_components=2, perplexity=30)
+                    if analyzer.projection_method:
+                        # Projeção ajustada no treino: só é aplicada, não reajustada
+                        reduced_pca = analyzer.project(features_df)
+                        projection_name = analyzer.projection_method.upper()
+                    else:
+                        reduced_pca = compute_projection(features_df, "pca", n_components=2)
+                        projection_name = "PCA"
+                    reduced_tsne = compute_projection(features_df, "tsne", n_components=2, perplexity=30,
+                                                      labels=predicted_labels)
                 
                 col_pca, col_tsne = st.columns(2)
                 
                 with col_pca:
-                    st.markdown("#### 📊 PCA + Clusters DBSCAN")
+                    st.markdown(f"#### 📊 {projection_name} + Clusters DBSCAN")
                     fig_pca, ax_pca = plt.subplots(figsize=(8, 6))
                     
                     for cluster_id in sorted(np.unique(predicted_labels)):
@@ -180,13 +288,18 @@ class StreamlitApp:
                             linewidth=1.5 if cluster_id == -1 else 0
                         )
                     
-                    ax_pca.set_title("Projeção PCA (Linear)", fontsize=12, fontweight='bold')
-                    ax_pca.set_xlabel("Componente Principal 1", fontsize=10)
-                    ax_pca.set_ylabel("Componente Principal 2", fontsize=10)
+                    ax_pca.set_title(f"Projeção {projection_name}" + (" do Treino" if analyzer.projection_method else " (Linear)"),
+                                     fontsize=12, fontweight='bold')
+                    axis_name = "Componente Principal" if projection_name == "PCA" else f"Dimensão {projection_name}"
+                    ax_pca.set_xlabel(f"{axis_name} 1", fontsize=10)
+                    ax_pca.set_ylabel(f"{axis_name} 2", fontsize=10)
                     ax_pca.legend(loc='best', fontsize=8)
                     ax_pca.grid(True, alpha=0.3)
                     st.pyplot(fig_pca)
-                    st.caption("**PCA:** Método linear, rápido. Preserva variância global.")
+                    if analyzer.projection_method:
+                        st.caption(f"**{projection_name}:** Ajustado no treino e guardado com o modelo. As coordenadas são comparáveis entre sessões.")
+                    else:
+                        st.caption("**PCA:** Método linear, rápido. Preserva variância global.")
                 
                 with col_tsne:
                     st.markdown("#### 🔍 t-SNE + Clusters DBSCAN")
@@ -224,12 +337,14 @@ class StreamlitApp:
                     ax_tsne.grid(True, alpha=0.3)
                     st.pyplot(fig_tsne)
                     st.caption("**t-SNE:** Método não-linear. Melhor separação visual de clusters.")
+                    if len(features_df) > PROJECTION_MAX_POINTS:
+                        st.caption(f"Sessão grande: o t-SNE foi calculado sobre cerca de {PROJECTION_MAX_POINTS} janelas "
+                                   "(com prioridade às anomalias) e as restantes foram posicionadas pelos vizinhos mais próximos.")
                 
                 
                 st.subheader("Estatísticas por Cluster")
                 cluster_stats = []
-                for cluster_id in sorted(np.unique(predicted_labels)):
-                    count = list(predicted_labels).count(cluster_id)
+                for cluster_id, count in session_summary['cluster_counts'].items():
                     percentage = (count / len(predicted_labels)) * 100
                     cluster_stats.append({
                         'Cluster': '🚨 Anomalia' if cluster_id == -1 else f'Cluster {cluster_id}',
@@ -250,6 +365,7 @@ class StreamlitApp:
             return
         
         st.success("Modelo de deteção de anomalias carregado e pronto para uso.", icon="🤖")
+        app = self.app_controller
         with st.sidebar:
             self._render_connection_controls()
             st.divider()
@@ -259,17 +375,83 @@ class StreamlitApp:
             st.metric(label="Amostras Mínimas", value=f"{analyzer.min_samples}")
             st.divider()
             st.header("Realizar Novo Teste")
-            selected_test_name = st.selectbox("Escolha um teste para monitorizar:", options=list(self.TESTS.keys()), disabled=(st.session_state.controller is None))
-            if st.button("🚀 Iniciar Teste de Monitorização", type="primary", disabled=(st.session_state.controller is None)):
+            busy = not app.is_connected or app.is_test_running
+            selected_test_name = st.selectbox("Escolha um teste para monitorizar:", options=list(self.TESTS.keys()), disabled=busy)
+            if st.button("🚀 Iniciar Teste de Monitorização", type="primary", disabled=busy):
                 selected_test = self.TESTS[selected_test_name]
                 self._run_test_logic(selected_test)
+            st.divider()
+            self._render_continuous_monitoring_controls()
+        if app.last_error:
+            st.error(f"❌ {app.last_error}")
+        if app.is_test_running:
+            self._render_test_progress()
+        if app.is_monitoring:
+            self._render_live_timeline()
         self._render_monitoring_results()
 
+    def _render_continuous_monitoring_controls(self):
+        st.header("Monitorização Contínua")
+        app = self.app_controller
+        if not app.is_monitoring:
+            if st.button("▶️ Iniciar Monitorização Contínua", disabled=not app.is_connected):
+                app.start_monitoring(st.session_state.analyzer)
+                st.rerun()
+        else:
+            st.caption("Cada janela de 2 s (50% de overlap) é avaliada assim que fica completa.")
+            if st.button("⏹️ Parar Monitorização Contínua"):
+                app.stop_monitoring()
+                st.rerun()
+
+    def _render_test_progress(self):
+        """Mostra o progresso do teste em curso; a captura corre na thread do AppController."""
+        @st.fragment(run_every=MONITOR_REFRESH_SEC)
+        def test_progress():
+            app = self.app_controller
+            if not app.is_test_running:
+                # Teste terminou: redesenha a página inteira com o resultado
+                st.session_state.last_test_result = app.last_result
+                st.rerun()
+            st.progress(app.test_progress, text="Teste em curso... a página continua disponível.")
+
+        test_progress()
+
+    def _render_live_timeline(self):
+        """Mostra a linha temporal da monitorização contínua, atualizada sem bloquear o script."""
+        @st.fragment(run_every=MONITOR_REFRESH_SEC)
+        def live_timeline():
+            app = self.app_controller
+            if not app.is_monitoring:
+                st.rerun()
+
+            timeline = app.monitor.timeline_df()
+            st.header("Linha Temporal em Tempo Real")
+            if timeline.empty:
+                st.info("A aguardar a primeira janela completa...")
+                return
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Janelas Avaliadas", len(timeline))
+            col2.metric("Janelas Anómalas", int(timeline['anomalous'].sum()))
+            col3.metric("Latência por Janela", f"{timeline['latency_ms'].iloc[-1]:.1f} ms")
+
+            if timeline['anomalous'].iloc[-1]:
+                st.error("🚨 ALERTA: Anomalia detectada na última janela!", icon="🚨")
+            else:
+                st.success("✅ Última janela dentro da normalidade.", icon="✅")
+
+            chart_df = timeline.set_index('time_s')[['tremor_index']].copy()
+            chart_df['anomalia'] = timeline['anomalous'].astype(float).to_numpy()
+            st.line_chart(chart_df)
+
+        live_timeline()
+
     def _render_connection_controls(self):
-        if st.session_state.controller is None:
+        app = self.app_controller
+        if not app.is_connected:
             if st.button("🔌 Conectar ao Controle"):
                 try:
-                    st.session_state.controller = SensorController()
+                    app.connect()
                     st.success("✅ Controlador Conectado")
                 except ConnectionError as e:
                     st.error(f"Falha na conexão: {e}")
@@ -279,10 +461,9 @@ class StreamlitApp:
             st.success("✅ Controlador Conectado")
             if st.button("🔌 Desconectar"):
                 try:
-                    st.session_state.controller.close()
+                    app.disconnect()
                 except:
-                    pass
-                st.session_state.controller = None
+                    app.sensor_controller = None
                 time.sleep(0.5)  # Aguarda USB liberar
                 st.rerun()
 
@@ -294,6 +475,9 @@ class StreamlitApp:
             return
         
         st.write(f"### Análise para: {last_result['name']}")
+        st.caption(f"Taxa de amostragem medida: {last_result.get('measured_sample_rate', 0):.1f} Hz · "
+                   f"amostras perdidas: {last_result.get('dropped_samples', 0)} · "
+                   f"duplicadas: {last_result.get('duplicate_samples', 0)}")
         
         # Valida se os dados são válidos
         readings = np.array(last_result.get('readings', []))
@@ -302,50 +486,39 @@ class StreamlitApp:
             if signal_std < 0.1:
                 st.warning("⚠️ Sinal muito plano detectado. Pode indicar que o controle está desconectado ou os dados são inválidos.")
         
+        analyzer: ClusterAnalyzer = st.session_state.analyzer
+        from src.analysis.session_processor import SessionProcessor
+        from src.analysis.feature_extractor import is_multi_axis_feature_set
+        try:
+            # As features do teste são as do motor 'batch' com o SPECTRAL_METHOD atual:
+            # um modelo treinado com outro motor ou estimador teria features noutra escala
+            SessionProcessor(multi_axis=is_multi_axis_feature_set(analyzer.feature_columns or [])
+                             ).check_feature_params(analyzer.feature_params)
+        except ValueError as e:
+            st.error(f"❌ O teste não pode ser avaliado com o modelo carregado. {e}")
+            return
         features = extract_features(last_result)
-        is_anomalous = st.session_state.analyzer.predict_is_anomalous(features)
+        is_anomalous = analyzer.predict_is_anomalous(features)
         if is_anomalous:
             st.error("🚨 ALERTA: Anomalia detectada no padrão de movimento!", icon="🚨")
         else:
             st.success("✅ Padrão de movimento dentro da normalidade.", icon="✅")
         if "Repouso" in last_result['name']:
-            fig = plot_test_results(time_axis=last_result['timestamps'], sensor_data=last_result['readings'], fft_results=last_result['fft_results'], test_name=last_result['name'])
+            from src.utils.plotter import plot_test_results
+            fig = plot_test_results(time_axis=last_result['timestamps'], sensor_data=last_result['readings'], fft_results=last_result['fft_results'], test_name=last_result['name'],
+                                    spectral_method=last_result.get('spectral_method'))
             plot_col, _ = st.columns([0.7, 0.3])
             with plot_col:
                 st.pyplot(fig)
 
     def _run_test_logic(self, test: MovementTest):
-        result_data = None
-        with st.spinner(f"Executando '{test.name}'..."):
-            if "Repouso" in test.name:
-                timestamps, readings = [], []
-                start_time = time.time()
-                disconnected = False
-                
-                while time.time() - start_time < test.duration_seconds:
-                    try:
-                        readings.append(st.session_state.controller.get_sensors_data()['accel_x'])
-                        timestamps.append(time.time() - start_time)
-                    except TimeoutError:
-                        continue
-                    except Exception as e:
-                        # Se qualquer outra exceção, controle foi desconectado
-                        disconnected = True
-                        break
-                    time.sleep(0.01)
-                
-                if disconnected:
-                    st.error("❌ Controle foi desconectado durante o teste!")
-                    st.session_state.controller = None
-                    return
-                
-                if readings:
-                    analyzer = SignalAnalyzer()
-                    sample_rate = len(readings) / test.duration_seconds
-                    fft_results = analyzer.find_tremor_frequency(readings, sample_rate)
-                    result_data = {"name": test.name, "timestamps": timestamps, "readings": readings, "fft_results": fft_results, "sample_rate": sample_rate}
-        st.session_state.last_test_result = result_data
+        """Inicia o teste em segundo plano; o progresso e o resultado são mostrados nos reruns seguintes."""
+        if "Repouso" in test.name:
+            st.session_state.last_test_result = None
+            self.app_controller.start_test(test)
+            st.rerun()
 
 if __name__ == "__main__":
+    st.set_page_config(page_title="APOLO", layout="wide")
     app = StreamlitApp()
-    app.run()
\ No newline at end of file
+    app.run()
@@ -0,0 +1,124 @@
+# src/hardware/capture_buffer.py
+
+from typing import Optional, Tuple
+import numpy as np
+
+IMU_AXES = ('accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z')
+
+class SampleRingBuffer:
+    """
+    Buffer circular pré-alocado com as amostras dos seis eixos da IMU e o
+    respetivo timestamp monotónico em nanossegundos.
+
+    É escrito por um único produtor (a thread de leitura do controle) e lido
+    por cursores: cada leitor guarda o número total de amostras já lidas e
+    pede apenas as novas.
+
+    Não usa locks: o produtor escreve a amostra e só depois publica o novo
+    total; o leitor copia as linhas e, no fim, volta a ler o total para
+    descartar as que o produtor possa ter substituído durante a cópia,
+    incluindo a que pode estar a ser escrita nesse momento.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._timestamps_ns = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, len(IMU_AXES)), dtype=np.float64)
+        self._total_written = 0
+
+    @property
+    def total_written(self) -> int:
+        """Número total de amostras escritas desde a criação do buffer."""
+        return self._total_written
+
+    def append(self, timestamp_ns: int, values: Tuple[float, ...]):
+        """Escreve uma amostra (na ordem de IMU_AXES), substituindo a mais antiga se cheio."""
+        index = self._total_written % self.capacity
+        self._timestamps_ns[index] = timestamp_ns
+        self._values[index] = values
+        # Publica a amostra só depois de escrita
+        self._total_written += 1
+
+    def latest(self, out: Optional[np.ndarray] = None) -> Tuple[int, np.ndarray]:
+        """
+        Retorna o timestamp e os valores da amostra mais recente.
+
+        Args:
+            out: Array de 6 posições para onde os valores são copiados, evitando
+                alocações quando chamado repetidamente.
+
+        Raises:
+            TimeoutError: Se ainda não foi escrita nenhuma amostra.
+        """
+        end = self._total_written
+        if end == 0:
+            raise TimeoutError("Dados dos sensores ainda não estão disponíveis.")
+        index = (end - 1) % self.capacity
+        if out is None:
+            out = np.empty(len(IMU_AXES), dtype=np.float64)
+        out[:] = self._values[index]
+        return int(self._timestamps_ns[index]), out
+
+    def read_since(self, cursor: int) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Copia as amostras escritas depois de 'cursor'.
+
+        Returns:
+            tuple: (timestamps_ns, valores (n, 6), novo_cursor, amostras_perdidas),
+            onde amostras_perdidas conta as que foram substituídas antes de lidas.
+        """
+        end = self._total_written
+        start = max(cursor, end - self.capacity)
+        indices = np.arange(start, end) % self.capacity
+        timestamps_ns = self._timestamps_ns[indices]
+        values = self._values[indices]
+
+        # Linhas que o produtor pode ter reescrito enquanto copiávamos. O
+        # append escreve a posição _total_written % capacity antes de publicar
+        # o novo total, pelo que essa linha (em curso) também é descartada
+        overwritten = self._total_written + 1 - self.capacity - start
+        if overwritten > 0:
+            # Se o produtor deu uma volta inteira durante a cópia, nada se aproveita
+            overwritten = min(overwritten, end - start)
+            timestamps_ns, values = timestamps_ns[overwritten:], values[overwritten:]
+            start += overwritten
+        return timestamps_ns, values, end, start - cursor
+
+
+def interpolate_at(timestamps_ns: np.ndarray, values: np.ndarray, query_ns: np.ndarray) -> np.ndarray:
+    """
+    Interpola linearmente os valores (n,) ou (n, eixos) nos instantes query_ns,
+    todos os eixos de uma vez. Instantes fora do intervalo usam o segmento
+    mais próximo.
+    """
+    # Índice do segmento [t[i-1], t[i]] que contém cada instante pedido
+    right = np.clip(np.searchsorted(timestamps_ns, query_ns, side='right'), 1, len(timestamps_ns) - 1)
+    left = right - 1
+    span = (timestamps_ns[right] - timestamps_ns[left]).astype(np.float64)
+    offset = (query_ns - timestamps_ns[left]).astype(np.float64)
+    weight = np.divide(offset, span, out=np.zeros_like(span), where=span > 0)
+    if values.ndim == 2:
+        weight = weight[:, None]
+    return values[left] * (1.0 - weight) + values[right] * weight
+
+
+def resample_uniform(timestamps_ns: np.ndarray, values: np.ndarray,
+                     rate_hz: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reamostra amostras com timestamps irregulares para uma grelha uniforme,
+    por interpolação linear, todos os eixos de uma vez.
+
+    Args:
+        timestamps_ns: Timestamps monotónicos (n,) em nanossegundos.
+        values: Valores (n, eixos) ou (n,).
+        rate_hz: Taxa da grelha de saída em Hz.
+
+    Returns:
+        tuple: (tempos da grelha em s desde a primeira amostra, valores interpolados)
+    """
+    if len(timestamps_ns) < 2 or rate_hz <= 0:
+        return np.zeros(0), values[:0]
+
+    period_ns = 1e9 / rate_hz
+    n_points = int(np.ceil((timestamps_ns[-1] - timestamps_ns[0]) / period_ns))
+    grid_ns = timestamps_ns[0] + np.round(np.arange(n_points) * period_ns).astype(np.int64)
+    return (grid_ns - timestamps_ns[0]) / 1e9, interpolate_at(timestamps_ns, values, grid_ns)
@@ -1,49 +1,151 @@
 # src/hardware/sensor_controller.py
 
 import time
-from typing import Dict, List
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
 from pydualsense import pydualsense
+from src.hardware.capture_buffer import SampleRingBuffer, IMU_AXES, resample_uniform
+from config import CAPTURE_BUFFER_SECONDS, CAPTURE_MAX_RATE_HZ
 
 class SensorController:
     """
     Gerencia a conexão e a leitura de dados de um controle
     Sony DualSense, incluindo sensores de movimento e botões.
+
+    Cada relatório HID recebido pelos callbacks do pydualsense é guardado
+    como uma amostra num buffer circular, com timestamp de perf_counter_ns,
+    o que permite capturar à taxa nativa do controle sem polling.
     """
     def __init__(self):
         self.dualsense = None
-        self._latest_sensor_data: Dict[str, float] = {}
+        self._buffer = SampleRingBuffer(int(CAPTURE_BUFFER_SECONDS * CAPTURE_MAX_RATE_HZ))
+        self._accel = (0.0, 0.0, 0.0)
+        self._gyro = (0.0, 0.0, 0.0)
+        self._accel_timestamp_ns = 0
+        self._accel_pending = False
+        self._capture_cursor = None
 
         ds = pydualsense()
         ds.init()
-        
+
         ds.accelerometer_changed += self._on_accelerometer_update
         ds.gyro_changed += self._on_gyro_update
 
         time.sleep(0.5)
-        
-        if not self._latest_sensor_data:
+
+        if self._buffer.total_written == 0:
             try:
                 ds.close()
             except:
                 pass
             raise ConnectionError("Controlador conectado, mas não recebe dados dos sensores.")
-        
+
         self.dualsense = ds
 
+    # O pydualsense dispara accelerometer_changed e depois gyro_changed para
+    # o mesmo relatório, e só quando os valores mudam. A amostra é fechada no
+    # callback do giroscópio; se este não disparar, fecha-se no próximo
+    # callback do acelerómetro.
     def _on_accelerometer_update(self, x: float, y: float, z: float):
-        self._latest_sensor_data['accel_x'] = x
-        self._latest_sensor_data['accel_y'] = y
-        self._latest_sensor_data['accel_z'] = z
+        if self._accel_pending:
+            self._commit_sample(self._accel_timestamp_ns)
+        self._accel_timestamp_ns = time.perf_counter_ns()
+        self._accel = (x, y, z)
+        self._accel_pending = True
 
     def _on_gyro_update(self, pitch: float, yaw: float, roll: float):
-        self._latest_sensor_data['gyro_x'] = pitch
-        self._latest_sensor_data['gyro_y'] = yaw
-        self._latest_sensor_data['gyro_z'] = roll
+        self._gyro = (pitch, yaw, roll)
+        timestamp_ns = self._accel_timestamp_ns if self._accel_pending else time.perf_counter_ns()
+        self._commit_sample(timestamp_ns)
+
+    def _commit_sample(self, timestamp_ns: int):
+        self._buffer.append(timestamp_ns, self._accel + self._gyro)
+        self._accel_pending = False
+
+    @property
+    def is_alive(self) -> bool:
+        """Indica se a thread do pydualsense continua a receber relatórios."""
+        return self.dualsense is not None and getattr(self.dualsense, 'connected', True)
+
+    def get_latest_sample(self, out: Optional[np.ndarray] = None) -> Tuple[int, np.ndarray]:
+        """
+        Retorna (timestamp_ns, valores na ordem de IMU_AXES) da amostra mais
+        recente, copiando para 'out' se fornecido (sem alocações).
+        """
+        return self._buffer.latest(out)
 
     def get_sensors_data(self) -> Dict[str, float]:
-        if not self._latest_sensor_data:
-            raise TimeoutError("Dados dos sensores ainda não estão disponíveis.")
-        return self._latest_sensor_data.copy()
+        """
+        Retorna a amostra mais recente como dicionário. Cria um dicionário novo
+        a cada chamada: em ciclos de leitura frequentes use get_latest_sample(out).
+        """
+        _, values = self._buffer.latest()
+        return dict(zip(IMU_AXES, values.tolist()))
+
+    @property
+    def sample_cursor(self) -> int:
+        """Cursor atual do buffer de captura (total de amostras recebidas)."""
+        return self._buffer.total_written
+
+    def read_samples_since(self, cursor: int) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        """
+        Lê as amostras recebidas depois de 'cursor' (ver SampleRingBuffer.read_since).
+
+        Returns:
+            tuple: (timestamps_ns, valores (n, 6), novo_cursor, amostras_perdidas)
+        """
+        return self._buffer.read_since(cursor)
+
+    def start_capture(self):
+        """Marca o início de uma captura; as amostras seguintes ficam reservadas para stop_capture()."""
+        self._capture_cursor = self._buffer.total_written
+
+    def stop_capture(self, resample_hz: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Termina a captura iniciada com start_capture() e retorna as amostras.
+
+        Args:
+            resample_hz: Se indicado, os eixos são reamostrados por interpolação
+                linear para uma grelha uniforme a esta taxa, e 'sample_rate'
+                passa a ser esta taxa (a taxa real fica em 'measured_sample_rate').
+
+        Returns:
+            dict com 'timestamps' (s desde a primeira amostra), uma lista por
+            eixo da IMU (ex: 'accel_x'), 'sample_rate' medida a partir dos
+            timestamps, 'dropped_samples' (relatórios em falta estimados pelos
+            intervalos e amostras substituídas no buffer) e
+            'duplicate_samples' (amostras iguais à anterior).
+        """
+        if self._capture_cursor is None:
+            raise RuntimeError("Nenhuma captura em curso. Chame start_capture() primeiro.")
+        timestamps_ns, values, _, overwritten = self._buffer.read_since(self._capture_cursor)
+        self._capture_cursor = None
+
+        capture: Dict[str, Any] = {
+            "timestamps": ((timestamps_ns - timestamps_ns[0]) / 1e9).tolist() if len(timestamps_ns) else [],
+            "sample_rate": 0.0, "dropped_samples": overwritten, "duplicate_samples": 0
+        }
+        for i, axis in enumerate(IMU_AXES):
+            capture[axis] = values[:, i].tolist()
+
+        if len(timestamps_ns) > 1:
+            intervals = np.diff(timestamps_ns)
+            duration_s = (timestamps_ns[-1] - timestamps_ns[0]) / 1e9
+            capture["sample_rate"] = (len(timestamps_ns) - 1) / duration_s if duration_s > 0 else 0.0
+            nominal = np.median(intervals)
+            if nominal > 0:
+                gaps = intervals[intervals > 1.5 * nominal]
+                capture["dropped_samples"] += int(np.sum(np.round(gaps / nominal) - 1))
+            capture["duplicate_samples"] = int(np.sum(np.all(values[1:] == values[:-1], axis=1)))
+
+        capture["measured_sample_rate"] = capture["sample_rate"]
+        if resample_hz:
+            grid, resampled = resample_uniform(timestamps_ns, values, resample_hz)
+            capture["timestamps"] = grid.tolist()
+            for i, axis in enumerate(IMU_AXES):
+                capture[axis] = resampled[:, i].tolist()
+            capture["sample_rate"] = float(resample_hz) if len(grid) else 0.0
+        return capture
 
     def close(self):
         if self.dualsense is not None:
@@ -1,24 +1,90 @@
 import matplotlib.pyplot as plt
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from config import PLOT_MAX_POINTS, PLOT_DECIMATION, SPECTRUM_MAX_FREQ_HZ, SPECTRAL_METHOD
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Divide o sinal em max_points // 2 grupos de amostras consecutivas e mantém
+    o mínimo e o máximo de cada um, por ordem temporal: os picos e a
+    envolvente ficam iguais aos do sinal completo à resolução do gráfico.
+    """
+    n_buckets = max(1, max_points // 2)
+    bucket = -(-len(y) // n_buckets)
+    # Completa o último grupo repetindo a última amostra
+    padded = np.concatenate([y, np.repeat(y[-1:], n_buckets * bucket - len(y))]).reshape(n_buckets, bucket)
+    offsets = np.arange(n_buckets) * bucket
+    keep = np.concatenate([offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, len(y) - 1]])
+    keep = np.unique(np.minimum(keep, len(y) - 1))
+    return x[keep], y[keep]
+
+def decimate_lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets: mantém o primeiro e o último ponto e, de
+    cada um dos max_points - 2 grupos intermédios, o ponto que forma o maior
+    triângulo com o ponto escolhido no grupo anterior e a média do seguinte.
+    """
+    n_points = len(y)
+    edges = np.linspace(1, n_points - 1, max_points - 1).astype(np.intp)
+    keep = np.empty(max_points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n_points - 1
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n_points
+        next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        prev_x, prev_y = x[keep[i]], y[keep[i]]
+        areas = np.abs((prev_x - next_x) * (y[start:end] - prev_y) - (prev_x - x[start:end]) * (next_y - prev_y))
+        keep[i + 1] = start + np.argmax(areas)
+    return x[keep], y[keep]
+
+def decimate(x, y, max_points: Optional[int] = PLOT_MAX_POINTS,
+             method: str = PLOT_DECIMATION) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduz uma curva a cerca de max_points pontos para a desenhar; curvas mais
+    curtas (ou max_points=None) são devolvidas sem alterações.
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if max_points is None or len(y) <= max_points:
+        return x, y
+    if method == "minmax":
+        return decimate_minmax(x, y, max_points)
+    if method == "lttb":
+        return decimate_lttb(x, y, max_points)
+    raise ValueError(f"Método de decimação desconhecido: '{method}'")
+
+def truncate_spectrum(fft_x, fft_y, max_freq: float = SPECTRUM_MAX_FREQ_HZ) -> Tuple[np.ndarray, np.ndarray]:
+    """Mantém só as frequências até max_freq (mais um bin, para a curva chegar à margem do gráfico)."""
+    fft_x, fft_y = np.asarray(fft_x), np.asarray(fft_y)
+    end = min(len(fft_x), np.searchsorted(fft_x, max_freq, side="right") + 1)
+    return fft_x[:end], fft_y[:end]
 
 def plot_test_results(
     time_axis: List[float],
     sensor_data: List[float],
     fft_results: Tuple[np.ndarray, np.ndarray, float, float],
     test_name: str,
-    sensor_axis: str = "Aceleração Eixo X (g)"
+    sensor_axis: str = "Aceleração Eixo X (g)",
+    max_points: Optional[int] = PLOT_MAX_POINTS,
+    spectral_method: Optional[str] = None
 ) -> plt.Figure:
     """
     Cria e retorna uma figura Matplotlib com os resultados do teste.
+    O sinal e o espectro (só até SPECTRUM_MAX_FREQ_HZ) são decimados para
+    max_points pontos, para que o tempo de desenho não cresça com a duração
+    da gravação; max_points=None desenha todas as amostras.
+    spectral_method é o estimador que calculou fft_results (por omissão,
+    SPECTRAL_METHOD): com 'welch' o espectro é de potência.
     """
+    spectral_method = spectral_method or SPECTRAL_METHOD
     
     fft_x, fft_y, dominant_freq, max_amplitude = fft_results
+    plot_time, plot_data = decimate(time_axis, sensor_data, max_points)
+    fft_x, fft_y = decimate(*truncate_spectrum(fft_x, fft_y), max_points)
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     fig.suptitle(f"Resultados do Teste: {test_name}", fontsize=16)
     
-    ax1.plot(time_axis, sensor_data, label=f"Dados do Sensor ({sensor_axis})")
+    ax1.plot(plot_time, plot_data, label=f"Dados do Sensor ({sensor_axis})")
     ax1.set_title("Sinal do Sensor no Tempo")
     ax1.set_xlabel("Tempo (s)")
     ax1.set_ylabel("Amplitude do Sensor (g)")
@@ -31,12 +97,16 @@ def plot_test_results(
         ax2.plot(dominant_freq, max_amplitude, 'ro', markersize=10)
         ax2.annotate(f"Pico: {dominant_freq:.2f} Hz", (dominant_freq, max_amplitude),
                      textcoords="offset points", xytext=(0,10), ha='center', color='red')
-    ax2.set_title("Análise de Frequência (FFT)")
+    if spectral_method == "welch":
+        ax2.set_title("Análise de Frequência (Welch)")
+        ax2.set_ylabel("Potência")
+    else:
+        ax2.set_title("Análise de Frequência (FFT)")
+        ax2.set_ylabel("Amplitude")
     ax2.set_xlabel("Frequência (Hz)")
-    ax2.set_ylabel("Amplitude")
-    ax2.set_xlim(0, 20)
+    ax2.set_xlim(0, SPECTRUM_MAX_FREQ_HZ)
     ax2.grid(True)
     ax2.legend()
     plt.tight_layout(rect=[0, 0.03, 1, 0.95])
     
-    return fig
\ No newline at end of file
+    return fig
@@ -0,0 +1,175 @@
+# Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
+#
+# Este software é propriedade confidencial e proprietária de Thauanny Kyssy Ramos Pereira.
+# A utilização, cópia ou divulgação deste ficheiro só é permitida de acordo
+# com os termos de um contrato de licença celebrado com o autor.
+
+"""
+Formato binário de gravação de sessões de jogo.
+
+Um ficheiro de sessão é composto por um cabeçalho fixo de HEADER_SIZE bytes
+seguido de registos de tamanho fixo (RECORD_DTYPE), escritos em blocos
+durante a gravação. Como o número de registos é deduzido do tamanho do
+ficheiro, uma gravação interrompida continua legível até ao último bloco
+escrito. O ficheiro pode ser aberto com np.memmap sem cópias.
+
+Conversão pela linha de comando:
+    python -m src.utils.session_file sessao.apolo sessao.csv
+    python -m src.utils.session_file sessao.csv sessao.apolo
+"""
+import os
+import struct
+import sys
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"APOLOSES"
+FORMAT_VERSION = 1
+SESSION_FILE_EXTENSION = ".apolo"
+
+# magic, versão, tamanho do cabeçalho, tamanho do registo, taxa de amostragem nominal
+_HEADER_STRUCT = struct.Struct("<8sHHIf")
+HEADER_SIZE = 32
+
+SENSOR_COLUMNS = ['accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z']
+BUTTON_COLUMNS = ['R1', 'L1', 'DpadUp', 'DpadDown', 'DpadLeft', 'DpadRight', 'L2_force', 'R2_force']
+CSV_COLUMNS = ['timestamp'] + SENSOR_COLUMNS + BUTTON_COLUMNS
+
+# Registo de 40 bytes: timestamp float64, 6 sensores float32 e 8 botões uint8
+RECORD_DTYPE = np.dtype(
+    [('timestamp', '<f8')]
+    + [(name, '<f4') for name in SENSOR_COLUMNS]
+    + [(name, 'u1') for name in BUTTON_COLUMNS]
+)
+
+
+def _pack_header(sample_rate_hz: float) -> bytes:
+    header = _HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, HEADER_SIZE, RECORD_DTYPE.itemsize, sample_rate_hz)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def read_session_header(path: str) -> Dict:
+    """
+    Lê e valida o cabeçalho de um ficheiro de sessão binário.
+
+    Returns:
+        dict: 'version', 'sample_rate_hz' e 'n_records' (registos completos).
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"Ficheiro '{path}' é demasiado curto para ser uma sessão APOLO.")
+
+    magic, version, header_size, record_size, sample_rate_hz = _HEADER_STRUCT.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"Ficheiro '{path}' não é uma sessão APOLO (assinatura inválida).")
+    if version != FORMAT_VERSION or header_size != HEADER_SIZE or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Versão de sessão não suportada em '{path}' (versão {version}).")
+
+    n_records = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    return {"version": version, "sample_rate_hz": sample_rate_hz, "n_records": n_records}
+
+
+def open_session_memmap(path: str) -> np.memmap:
+    """
+    Abre um ficheiro de sessão como um array estruturado mapeado em memória.
+
+    Cada campo (ex: records['accel_x']) é uma view sem cópia sobre o ficheiro.
+    Registos incompletos no fim do ficheiro (gravação interrompida) são ignorados.
+    """
+    header = read_session_header(path)
+    if header["n_records"] == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(header["n_records"],))
+
+
+class BinarySessionWriter:
+    """
+    Grava amostras num ficheiro de sessão binário, em blocos de tamanho fixo.
+
+    As amostras são acumuladas num bloco pré-alocado e escritas no disco
+    sempre que o bloco enche, pelo que a memória usada não cresce com a
+    duração da gravação e uma falha perde no máximo um bloco.
+    """
+    def __init__(self, path: str, sample_rate_hz: float, block_size: int = 1000):
+        self.path = path
+        self.n_written = 0
+        self._block = np.zeros(block_size, dtype=RECORD_DTYPE)
+        self._n_pending = 0
+        self._file = open(path, "wb")
+        self._file.write(_pack_header(sample_rate_hz))
+        self._file.flush()
+
+    def append(self, row: Sequence):
+        """Adiciona uma amostra na ordem de CSV_COLUMNS."""
+        self._block[self._n_pending] = tuple(row)
+        self._n_pending += 1
+        if self._n_pending == len(self._block):
+            self.flush()
+
+    def append_records(self, records: np.ndarray):
+        """Escreve diretamente um array de registos (RECORD_DTYPE) já montado."""
+        self.flush()
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+        self._file.flush()
+        self.n_written += len(records)
+
+    def flush(self):
+        """Escreve no disco as amostras pendentes do bloco atual."""
+        if self._n_pending == 0:
+            return
+        self._file.write(self._block[:self._n_pending].tobytes())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.n_written += self._n_pending
+        self._n_pending = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def csv_to_binary(csv_path: str, binary_path: str, sample_rate_hz: float = 100, chunksize: int = 100_000):
+    """Converte uma sessão CSV (layout do GameDataLogger) para o formato binário."""
+    with BinarySessionWriter(binary_path, sample_rate_hz) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            missing = [col for col in CSV_COLUMNS if col not in chunk.columns]
+            if missing:
+                raise ValueError(f"Colunas em falta no CSV '{csv_path}': {missing}")
+            records = np.zeros(len(chunk), dtype=RECORD_DTYPE)
+            for col in CSV_COLUMNS:
+                records[col] = chunk[col].to_numpy()
+            writer.append_records(records)
+    print(f"Sessão convertida: '{csv_path}' -> '{binary_path}' ({writer.n_written} amostras)")
+
+
+def binary_to_csv(binary_path: str, csv_path: str, chunksize: int = 100_000):
+    """Converte uma sessão binária para o layout CSV do GameDataLogger."""
+    records = open_session_memmap(binary_path)
+    with open(csv_path, "w", newline="") as f:
+        pd.DataFrame(columns=CSV_COLUMNS).to_csv(f, index=False)
+        for start in range(0, len(records), chunksize):
+            chunk = pd.DataFrame(records[start:start + chunksize])
+            chunk.to_csv(f, index=False, header=False)
+    print(f"Sessão convertida: '{binary_path}' -> '{csv_path}' ({len(records)} amostras)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    source, destination = sys.argv[1], sys.argv[2]
+    if source.endswith(SESSION_FILE_EXTENSION):
+        binary_to_csv(source, destination)
+    else:
+        csv_to_binary(source, destination)
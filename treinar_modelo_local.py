@@ -1,44 +1,227 @@
 # Copyright (c) 2025 Thauanny Kyssy Ramos Pereira. Todos os Direitos Reservados.
 # ... (cabeçalho)
 
+"""
+Treina o modelo pessoal a partir de uma ou mais sessões de jogo gravadas.
+
+Cada argumento pode ser um ficheiro de sessão (.csv ou .apolo), uma pasta
+(são usadas todas as sessões lá dentro) ou um padrão glob. As sessões são
+processadas em paralelo, uma por processo, e o ClusterAnalyzer é treinado
+uma única vez com as features de todas.
+
+Uso:
+    python treinar_modelo_local.py                      # usa DATASET_PATH
+    python treinar_modelo_local.py sessoes/ --workers 8
+    python treinar_modelo_local.py "sessoes/paciente01_*.csv" --multi-eixo
+    python treinar_modelo_local.py sessoes/ --eps auto --varrimento
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
 import pandas as pd
+
 from config import (
     DATASET_PATH,
     MODEL_PATH,
     DBSCAN_EPS,
+    NORMAL_SET_COMPRESSION,
     get_min_samples_for_dimensions
 )
-from src.analysis.cluster_analyzer import ClusterAnalyzer
+from src.analysis.cluster_analyzer import ClusterAnalyzer, PROJECTION_METHODS, COMPRESSION_METHODS
+from src.analysis.parameter_search import suggest_eps, eps_grid, sweep_dbscan_parameters
 from src.analysis.session_processor import SessionProcessor
+from src.analysis.feature_cache import FeatureCache
+from src.utils.session_file import SESSION_FILE_EXTENSION
+
+SESSION_EXTENSIONS = (".csv", SESSION_FILE_EXTENSION)
+
+
+def find_sessions(sources: List[str]) -> List[str]:
+    """Expande ficheiros, pastas e padrões glob numa lista ordenada de sessões, sem repetições."""
+    sessions = []
+    for source in sources:
+        if os.path.isdir(source):
+            candidates = [os.path.join(source, name) for name in os.listdir(source)]
+        elif glob.has_magic(source):
+            candidates = glob.glob(source, recursive=True)
+        else:
+            candidates = [source]
+        sessions.extend(sorted(path for path in candidates
+                               if path == source or path.lower().endswith(SESSION_EXTENSIONS)))
+    return list(dict.fromkeys(sessions))
+
+
+def process_session(path: str, processor_options: Dict) -> Tuple[pd.DataFrame, float, str, bool]:
+    """
+    Extrai as features de uma sessão (executado num processo do pool).
+
+    Returns:
+        tuple: (DataFrame de features, tempo de processamento em s, mensagens
+        do SessionProcessor, se as features vieram da cache)
+    """
+    start_time = time.perf_counter()
+    log = io.StringIO()
+    processor = SessionProcessor(**processor_options)
+    with contextlib.redirect_stdout(log):
+        df_features = processor.process_session_file(path)
+    from_cache = processor.cache is not None and processor.cache.hits > 0
+    return df_features, time.perf_counter() - start_time, log.getvalue(), from_cache
+
+
+def extract_features_parallel(sessions: List[str], processor_options: Dict, workers: int,
+                              verbose: bool = False) -> pd.DataFrame:
+    """
+    Processa as sessões num ProcessPoolExecutor e concatena as features pela
+    ordem das sessões, reportando o tempo de cada uma à medida que terminam.
+    """
+    results: Dict[str, pd.DataFrame] = {}
+    start_time = time.perf_counter()
+    busy_time = 0.0
+
+    def prefix(index: int, path: str) -> str:
+        return f"  [{index:>{len(str(len(sessions)))}}/{len(sessions)}] {path}:"
+
+    def report(index: int, path: str, df_features: pd.DataFrame, elapsed: float, log: str, from_cache: bool):
+        print(f"{prefix(index, path)} {len(df_features)} janelas em {elapsed:.2f}s{' (cache)' if from_cache else ''}")
+        if log and (verbose or df_features.empty):
+            print("".join(f"      {line}\n" for line in log.strip().splitlines()), end="")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(process_session, path, processor_options): path for path in sessions}
+        for index, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                df_features, elapsed, log, from_cache = future.result()
+            except Exception as e:
+                print(f"{prefix(index, path)} ERRO - {e}")
+                continue
+            busy_time += elapsed
+            results[path] = df_features
+            report(index, path, df_features, elapsed, log, from_cache)
+
+    wall_time = time.perf_counter() - start_time
+    frames = [results[path] for path in sessions if path in results and not results[path].empty]
+    n_windows = sum(len(frame) for frame in frames)
+    print(f"Extração concluída em {wall_time:.2f}s ({n_windows / wall_time if wall_time > 0 else 0:.0f} janelas/s, "
+          f"{busy_time:.2f}s de processamento somado, paralelismo efetivo {busy_time / wall_time if wall_time > 0 else 0:.1f}x)")
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def parse_eps(value: str):
+    """'auto' ou um número positivo."""
+    if value == "auto":
+        return value
+    try:
+        eps = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"eps inválido: '{value}' (use um número ou 'auto')")
+    if eps <= 0:
+        raise argparse.ArgumentTypeError("eps tem de ser positivo")
+    return eps
+
+
+def print_sweep(df_features: pd.DataFrame, eps: float, min_samples: int):
+    """Mostra o DBSCAN de uma grelha de (eps, min_samples) em torno dos valores escolhidos."""
+    start = time.perf_counter()
+    sweep = sweep_dbscan_parameters(df_features, eps_grid(eps),
+                                    sorted({max(2, min_samples // 2), min_samples, min_samples * 2}))
+    print(f"\nVarrimento de parâmetros ({len(sweep)} combinações em {time.perf_counter() - start:.1f} s):")
+    print(sweep.to_string(index=False, float_format=lambda value: f"{value:.4f}"))
+    print()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Treina o modelo pessoal a partir de sessões de jogo gravadas.")
+    parser.add_argument("sessoes", nargs="*", default=[DATASET_PATH],
+                        help="Ficheiros (.csv/.apolo), pastas ou padrões glob (default: DATASET_PATH)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos de extração (default: número de CPUs)")
+    parser.add_argument("--saida", default=MODEL_PATH, help=f"Caminho do modelo treinado (default: {MODEL_PATH})")
+    parser.add_argument("--motor", choices=("batch", "loop", "sliding"), default="batch",
+                        help="Motor do SessionProcessor (default: batch). O 'sliding' produz features noutra escala "
+                             "(potências); o motor é guardado com o modelo e a interface e a monitorização usam-no")
+    parser.add_argument("--multi-eixo", action="store_true", help="Extrai features dos seis eixos da IMU (só com --motor batch)")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Não usa nem atualiza a cache de features (FEATURE_CACHE_DIR)")
+    parser.add_argument("--eps", type=parse_eps, default=DBSCAN_EPS,
+                        help="Raio do DBSCAN, ou 'auto' para o cotovelo do gráfico K-Distance (default: DBSCAN_EPS)")
+    parser.add_argument("--varrimento", action="store_true",
+                        help="Mostra o número de clusters e o ruído para uma grelha de (eps, min_samples) antes do treino")
+    parser.add_argument("--treino", choices=("sklearn", "chunked"), default=None,
+                        help="Implementação do DBSCAN: 'chunked' treina linhas de base grandes com memória limitada "
+                             "(default: DBSCAN_TRAINING_ENGINE)")
+    parser.add_argument("--compressao", choices=COMPRESSION_METHODS + ("none",), default=NORMAL_SET_COMPRESSION or "none",
+                        help="Guarda só os core points ('core') ou uma rede de cobertura ('net') dos pontos normais, "
+                             "ou todos ('none'). Com 'core'/'net' algumas janelas na orla da normalidade podem passar "
+                             "a anómalas (nunca o contrário) (default: NORMAL_SET_COMPRESSION)")
+    parser.add_argument("--projecao", choices=PROJECTION_METHODS, default=None,
+                        help="Ajusta também uma projeção 2D no treino, guardada com o modelo para a visualização")
+    parser.add_argument("--verbose", action="store_true", help="Mostra as mensagens do processamento de cada sessão")
+    args = parser.parse_args()
+    if args.multi_eixo and args.motor != "batch":
+        parser.error("--multi-eixo só está disponível com --motor batch")
+    return args
+
 
 def main():
+    args = parse_args()
     print("--- INICIANDO TREINO OFFLINE COM DATASET LOCAL ---")
-    try:
-        df_session = pd.read_csv(DATASET_PATH)
-    except FileNotFoundError:
-        print(f"ERRO: Dataset '{DATASET_PATH}' não encontrado.")
+
+    sessions = find_sessions(args.sessoes)
+    missing = [path for path in sessions if not os.path.isfile(path)]
+    for path in missing:
+        print(f"ERRO: Dataset '{path}' não encontrado.")
+    sessions = [path for path in sessions if path not in missing]
+    if not sessions:
+        print("ERRO: Nenhuma sessão para processar.")
         return
 
-    print("A processar sessão de jogo e a extrair features...")
-    processor = SessionProcessor()
-    df_features = processor.process_session_df(df_session)
+    workers = max(1, min(args.workers, len(sessions)))
+    print(f"A processar {len(sessions)} sessão(ões) de jogo com {workers} processo(s) e a extrair features...")
+    processor_options = {"engine": args.motor, "multi_axis": args.multi_eixo,
+                         "cache": None if args.sem_cache else FeatureCache()}
+    df_features = extract_features_parallel(sessions, processor_options, workers, verbose=args.verbose)
 
     if df_features.empty:
         print("ERRO: Nenhuma feature foi extraída.")
         return
-        
+
     print(f"Foram extraídas features de {len(df_features)} janelas de análise.")
 
     num_features = df_features.shape[1]
     min_samples_calculado = get_min_samples_for_dimensions(num_features)
-    
-    print(f"A treinar o modelo com eps={DBSCAN_EPS} e min_samples={min_samples_calculado}...")
-    
-    cluster_analyzer = ClusterAnalyzer(eps=DBSCAN_EPS, min_samples=min_samples_calculado)
-    cluster_analyzer.fit(df_features)
 
-    cluster_analyzer.save_model(MODEL_PATH)
-    print(f"\n--- SUCESSO! Modelo pessoal treinado e salvo em '{MODEL_PATH}' ---")
+    eps = args.eps
+    if eps == "auto":
+        eps = suggest_eps(df_features, min_samples_calculado)
+        if eps is None:
+            print(f"AVISO: Não foi possível encontrar o cotovelo do gráfico K-Distance; a usar eps={DBSCAN_EPS}.")
+            eps = DBSCAN_EPS
+        else:
+            eps = round(eps, 4)
+            print(f"eps sugerido pelo gráfico K-Distance (k={min_samples_calculado}): {eps}")
+
+    if args.varrimento:
+        print_sweep(df_features, eps, min_samples_calculado)
+
+    print(f"A treinar o modelo com eps={eps} e min_samples={min_samples_calculado}...")
+
+    cluster_analyzer = ClusterAnalyzer(eps=eps, min_samples=min_samples_calculado)
+    # Guardados com o modelo para que as novas sessões sejam processadas da mesma forma
+    feature_params = SessionProcessor(engine=args.motor, multi_axis=args.multi_eixo).feature_params()
+    cluster_analyzer.fit(df_features, projection=args.projecao, engine=args.treino, compression=None if args.compressao == "none" else args.compressao,
+                         feature_params=feature_params)
+
+    cluster_analyzer.save_model(args.saida)
+    print(f"\n--- SUCESSO! Modelo pessoal treinado e salvo em '{args.saida}' ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()